@@ -5,6 +5,8 @@ from sqlalchemy import pool
 
 from alembic import context
 from src.app.models.user import User  # Импорт всех моделей
+from src.app.models.task_result import TaskResult  # noqa: F401
+from src.app.models.outbox import OutboxMessage  # noqa: F401
 
 config = context.config
 fileConfig(config.config_file_name)
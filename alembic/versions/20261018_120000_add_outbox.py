@@ -0,0 +1,34 @@
+"""add outbox
+
+Revision ID: 7b1e2c9d4a10
+Revises: 45cd3bbd4c7e
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import func
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1e2c9d4a10'
+down_revision: Union[str, None] = '45cd3bbd4c7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column('routing_key', sa.String(255), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('reply_to', sa.String(255), nullable=True),
+        sa.Column('correlation_id', sa.String(64), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('outbox')
@@ -0,0 +1,35 @@
+"""add user search indexes
+
+Revision ID: c3f8a1d2e5b7
+Revises: 7b1e2c9d4a10
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a1d2e5b7'
+down_revision: Union[str, None] = '7b1e2c9d4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в users, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_surname_name', 'users', ['surname', 'name'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_users_created_at_id', 'users', ['created_at', 'id'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_created_at_id', 'users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_surname_name', 'users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""add user text search
+
+Revision ID: d9a4b6e1f3c2
+Revises: c3f8a1d2e5b7
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a4b6e1f3c2'
+down_revision: Union[str, None] = 'c3f8a1d2e5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Выражение должно совпадать с src.app.models.user.search_vector, иначе индекс не используется
+SEARCH_VECTOR = "to_tsvector('simple'::regconfig, (coalesce(name, '') || ' ') || coalesce(surname, ''))"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        # Триграммы ускоряют ILIKE 'префикс%' и '%подстрока%' по имени и фамилии
+        op.create_index(
+            'ix_users_name_trgm', 'users', ['name'],
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_users_surname_trgm', 'users', ['surname'],
+            postgresql_using='gin', postgresql_ops={'surname': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_fts ON users USING gin ({SEARCH_VECTOR})")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_fts', 'users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_surname_trgm', 'users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_name_trgm', 'users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,86 @@
+"""partition task_results
+
+Revision ID: e5b2c7a9d1f4
+Revises: d9a4b6e1f3c2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c7a9d1f4'
+down_revision: Union[str, None] = 'd9a4b6e1f3c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько дневных партиций создать вперёд; дальше их создаёт TaskResultRetention
+PREMAKE_DAYS = 7
+
+
+def partition_name(day) -> str:
+    return f"task_results_p{day:%Y%m%d}"
+
+
+def upgrade() -> None:
+    # Старая таблица без копирования данных становится партицией до конца текущих суток
+    op.execute("UPDATE task_results SET created_at = now() WHERE created_at IS NULL")
+    op.execute("ALTER TABLE task_results ALTER COLUMN created_at SET NOT NULL")
+    op.execute("ALTER TABLE task_results RENAME TO task_results_legacy")
+    op.execute("ALTER TABLE task_results_legacy RENAME CONSTRAINT task_results_pkey TO task_results_legacy_pkey")
+    op.execute("ALTER INDEX ix_task_results_status RENAME TO ix_task_results_legacy_status")
+
+    op.execute(
+        """
+        CREATE TABLE task_results (
+            id VARCHAR(36) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            status VARCHAR(50),
+            result JSON,
+            error VARCHAR,
+            updated_at TIMESTAMP WITH TIME ZONE,
+            CONSTRAINT task_results_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.create_index('ix_task_results_status', 'task_results', ['status'])
+    op.create_index('ix_task_results_created_at', 'task_results', ['created_at'])
+
+    today = datetime.now(timezone.utc).date()
+    start = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc) + timedelta(days=1)
+    op.execute(
+        f"ALTER TABLE task_results ATTACH PARTITION task_results_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{start.isoformat()}')"
+    )
+    for offset in range(PREMAKE_DAYS):
+        day_start = start + timedelta(days=offset)
+        op.execute(
+            f"CREATE TABLE {partition_name(day_start)} PARTITION OF task_results "
+            f"FOR VALUES FROM ('{day_start.isoformat()}') TO ('{(day_start + timedelta(days=1)).isoformat()}')"
+        )
+    # Страховка, если партиции не были созданы заранее; в норме остаётся пустой
+    op.execute("CREATE TABLE task_results_default PARTITION OF task_results DEFAULT")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE task_results RENAME TO task_results_partitioned")
+    op.execute("ALTER TABLE task_results_partitioned RENAME CONSTRAINT task_results_pkey TO task_results_partitioned_pkey")
+    op.execute("ALTER INDEX ix_task_results_status RENAME TO ix_task_results_partitioned_status")
+    op.create_table(
+        'task_results',
+        sa.Column('id', sa.String(length=36), primary_key=True),
+        sa.Column('status', sa.String(length=50), index=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+    )
+    op.execute(
+        "INSERT INTO task_results (id, status, result, error, created_at, updated_at) "
+        "SELECT DISTINCT ON (id) id, status, result, error, created_at, updated_at "
+        "FROM task_results_partitioned ORDER BY id, created_at DESC"
+    )
+    op.execute("DROP TABLE task_results_partitioned")
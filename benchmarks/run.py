@@ -0,0 +1,429 @@
+"""Нагрузочные бенчмарки UserHubAPI на локальных заменах инфраструктуры.
+
+API и worker работают в одном процессе поверх InProcessTransport,
+БД — SQLite (по умолчанию) или Postgres из --database-url. Результаты
+печатаются одним JSON-документом, чтобы сравнивать их между коммитами.
+
+    python -m benchmarks.run --scenario all --duration 10 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCENARIOS = ("validation", "hashing", "worker", "api-users", "api-tasks", "api-static", "startup")
+
+SEED_USERS = 1000
+SEED_TASKS = 1000
+NAMES = ("Anna", "Boris", "Vera", "Gleb", "Daria", "Egor")
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0) * 1000, 3),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------- Микробенчмарки ----------
+
+def bench_validation(iterations: int) -> dict:
+    """Стоимость валидации UserCreate (pydantic + проверка сложности пароля)"""
+    from src.app.schemas.user import UserCreate
+
+    payload = {"name": "Test", "surname": "User", "password": "TestPass123"}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        UserCreate.model_validate(payload)
+    elapsed = time.perf_counter() - start
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / elapsed, 1),
+        "us_per_op": round(elapsed / iterations * 1e6, 3),
+    }
+
+
+async def bench_hashing(iterations: int) -> dict:
+    """Хеширование bcrypt: задержка одного вызова и пропускная способность пула"""
+    from src.app.services.hashing import PasswordHasher
+    from src.app.settings import BCRYPT_ROUNDS, HASHING_MAX_WORKERS
+
+    hasher = PasswordHasher(rounds=BCRYPT_ROUNDS, max_workers=HASHING_MAX_WORKERS, max_pending=iterations)
+    try:
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await hasher.hash("TestPass123")
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await hasher.hash_many(["TestPass123"] * iterations)
+        parallel = time.perf_counter() - start
+    finally:
+        hasher.close()
+
+    return {
+        "rounds": BCRYPT_ROUNDS,
+        "workers": HASHING_MAX_WORKERS,
+        "iterations": iterations,
+        "sequential": latency_summary(latencies),
+        "parallel_hashes_per_sec": round(iterations / parallel, 1),
+    }
+
+
+# ---------- Окружение ----------
+
+async def prepare_database(database_url: str):
+    """Создаёт таблицы и заполняет их исходными пользователями и задачами"""
+    from sqlalchemy import event, insert
+
+    from src.app.db import SessionLocal, get_engine
+    from src.app.models import outbox, task_result  # noqa: F401
+    from src.app.models.task_result import TaskResult
+    from src.app.models.user import Base, User
+    from src.app.services.task_ids import new_task_id, task_id_time
+
+    engine = get_engine()
+    if database_url.startswith("sqlite"):
+        # WAL позволяет читать, пока worker пишет
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_wal(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.close()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with SessionLocal() as session:
+        await session.execute(
+            insert(User),
+            [{"name": f"Name{i}", "surname": "Bench", "password": "x" * 60} for i in range(SEED_USERS)],
+        )
+        task_ids = [new_task_id() for _ in range(SEED_TASKS)]
+        await session.execute(
+            insert(TaskResult),
+            [
+                {"id": task_id, "created_at": task_id_time(task_id), "status": "done", "result": {"id": 1}}
+                for task_id in task_ids
+            ],
+        )
+        await session.commit()
+    return task_ids
+
+
+async def stop_task(task: asyncio.Task):
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+# ---------- Worker ----------
+
+async def bench_worker(messages: int) -> dict:
+    """Пропускная способность worker: смесь create/update/read, от публикации до ack"""
+    from src.app.models.user import UserAction
+    from src.app.services.task_ids import new_task_id
+    from src.app.services.transport import USER_ACTIONS_QUEUE, InProcessTransport
+    from src.app.settings import WORKER_BATCH_SIZE
+    from src.app.worker import worker
+
+    rng = random.Random(42)
+    transport = InProcessTransport()
+    queue = transport.queue(USER_ACTIONS_QUEUE)
+
+    worker_task = worker.start_inline(transport)
+    start = time.perf_counter()
+    for n in range(messages):
+        roll = rng.random()
+        if roll < 0.5:
+            action, data = UserAction.CREATE, {"name": f"W{n}", "surname": "Bench", "password": "x" * 60}
+        elif roll < 0.8:
+            action, data = UserAction.UPDATE, {"user_id": rng.randint(1, SEED_USERS), "name": f"U{n}"}
+        else:
+            action, data = UserAction.READ, {"user_id": rng.randint(1, SEED_USERS)}
+        await transport.publish(USER_ACTIONS_QUEUE, {"task_id": new_task_id(), "action": action, "data": data})
+
+    while queue.acked + queue.rejected < messages:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    await stop_task(worker_task)
+    await transport.close()
+
+    return {
+        "messages": messages,
+        "batch_size": WORKER_BATCH_SIZE,
+        "messages_per_sec": round(messages / elapsed, 1),
+        "rejected": queue.rejected,
+    }
+
+
+# ---------- HTTP API ----------
+
+def users_mix(rng: random.Random):
+    """Смесь запросов к /users: в основном чтения, часть записей"""
+    roll = rng.random()
+    if roll < 0.5:
+        return "GET", f"/users/{rng.randint(1, SEED_USERS)}", None
+    if roll < 0.7:
+        return "GET", "/users?limit=20", None
+    if roll < 0.85:
+        return "PATCH", f"/users/{rng.randint(1, SEED_USERS)}", {"name": rng.choice(NAMES)}
+    return "POST", "/users", {"name": "Bench", "surname": "User", "password": "TestPass123"}
+
+
+def static_mix(rng: random.Random):
+    """Статические страницы; httpx по умолчанию принимает gzip"""
+    return "GET", rng.choice(("/", "/tasks")), None
+
+
+def tasks_mix(task_ids: list[str]):
+    def mix(rng: random.Random):
+        return "GET", f"/tasks/{rng.choice(task_ids)}", None
+    return mix
+
+
+async def load(client, mix, duration: float, concurrency: int) -> dict:
+    """Держит concurrency параллельных клиентов в течение duration секунд"""
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(seed: int):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            method, url, body = mix(rng)
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(seed) for seed in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "duration_sec": round(elapsed, 3),
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        **latency_summary(latencies),
+        "statuses": statuses,
+    }
+
+
+async def bench_api(mix, duration: float, concurrency: int) -> dict:
+    """HTTP-нагрузка на API со встроенным worker"""
+    import httpx
+
+    from src.app.asgi import app, start_services
+    from src.app.services.transport import InProcessTransport
+    from src.app.worker import worker
+
+    transport = InProcessTransport()
+    await start_services(app, transport)
+    worker_task = worker.start_inline(transport)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            return await load(client, mix, duration, concurrency)
+    finally:
+        await stop_task(worker_task)
+        await app.state.outbox_relay.stop()
+        if app.state.task_retention is not None:
+            await app.state.task_retention.stop()
+        await app.state.static_pages.stop()
+        await transport.close()
+        app.state.hasher.close()
+
+
+# ---------- Холодный старт ----------
+
+async def probe_api() -> dict:
+    """Отметки времени нового процесса API: импорт, старт сервисов, первый ответ, /readyz"""
+    import httpx
+
+    marks = {}
+    from src.app.asgi import app, app_shutdown, app_startup
+    marks["imported"] = time.time()
+    await app_startup(app)
+    marks["started"] = time.time()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            response = await client.get("/users?limit=1")
+            response.raise_for_status()
+            marks["first_response"] = time.time()
+            # Момент, когда Kubernetes начал бы направлять трафик на под
+            while (await client.get("/readyz")).status_code != 200:
+                await asyncio.sleep(0.005)
+            marks["ready"] = time.time()
+    finally:
+        await app_shutdown(app)
+    return marks
+
+
+async def probe_worker() -> dict:
+    """Отметки времени нового процесса worker: импорт и первое подтверждённое сообщение"""
+    marks = {}
+    from src.app.models.user import UserAction
+    from src.app.services.task_ids import new_task_id
+    from src.app.services.transport import USER_ACTIONS_QUEUE, InProcessTransport
+    from src.app.worker import worker
+    marks["imported"] = time.time()
+
+    transport = InProcessTransport()
+    queue = transport.queue(USER_ACTIONS_QUEUE)
+    await transport.publish(
+        USER_ACTIONS_QUEUE, {"task_id": new_task_id(), "action": UserAction.READ, "data": {"user_id": 1}}
+    )
+    worker_task = worker.start_inline(transport)
+    while queue.acked + queue.rejected < 1:
+        await asyncio.sleep(0.001)
+    marks["first_consume"] = time.time()
+    await stop_task(worker_task)
+    await transport.close()
+    return marks
+
+
+def bench_startup(runs: int) -> dict:
+    """Время от запуска нового процесса до готовности: медиана по runs запускам.
+
+    Каждый замер — отдельный интерпретатор (как новый под при масштабировании),
+    транспорт в памяти и уже созданная БД бенчмарка.
+    """
+    env = {**os.environ, "MESSAGE_TRANSPORT": "inprocess"}
+    samples: dict[str, dict[str, list[float]]] = {"api": {}, "worker": {}}
+    for _ in range(runs):
+        for kind in samples:
+            spawned = time.time()
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.run", "--probe", kind],
+                capture_output=True, text=True, check=True, env=env,
+            ).stdout
+            # Последняя строка — отметки времени; выше может быть вывод приложения
+            marks = json.loads(output.strip().splitlines()[-1])
+            for name, moment in marks.items():
+                samples[kind].setdefault(f"{name}_sec", []).append(moment - spawned)
+
+    return {
+        "runs": runs,
+        **{
+            kind: {name: round(percentile(values, 0.5), 3) for name, values in metrics.items()}
+            for kind, metrics in samples.items()
+        },
+    }
+
+
+# ---------- CLI ----------
+
+async def run(args) -> dict:
+    import src.app.asgi  # noqa: F401 — настраивает логгеры приложения
+
+    # Построчные логи в stderr и файлы искажают замеры
+    for name in ("worker", "rabbitmq", "app", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    results = {}
+
+    if "validation" in scenarios:
+        results["validation"] = bench_validation(args.validation_iterations)
+    if "hashing" in scenarios:
+        results["hashing"] = await bench_hashing(args.hash_iterations)
+
+    if {"worker", "api-users", "api-tasks", "api-static", "startup"} & set(scenarios):
+        task_ids = await prepare_database(args.database_url)
+        if "worker" in scenarios:
+            results["worker"] = await bench_worker(args.messages)
+        if "api-users" in scenarios:
+            results["api_users"] = await bench_api(users_mix, args.duration, args.concurrency)
+        if "api-tasks" in scenarios:
+            results["api_tasks"] = await bench_api(tasks_mix(task_ids), args.duration, args.concurrency)
+        if "api-static" in scenarios:
+            results["api_static"] = await bench_api(static_mix, args.duration, args.concurrency)
+        if "startup" in scenarios:
+            results["startup"] = await asyncio.to_thread(bench_startup, args.startup_runs)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UserHubAPI benchmarks on local stand-ins")
+    parser.add_argument("--scenario", choices=("all",) + SCENARIOS, default="all")
+    parser.add_argument("--duration", type=float, default=10, help="длительность HTTP-нагрузки, секунды")
+    parser.add_argument("--concurrency", type=int, default=32, help="число параллельных HTTP-клиентов")
+    parser.add_argument("--messages", type=int, default=5000, help="число сообщений для worker")
+    parser.add_argument("--validation-iterations", type=int, default=100000)
+    parser.add_argument("--hash-iterations", type=int, default=16)
+    parser.add_argument("--startup-runs", type=int, default=5, help="число запусков новых процессов API и worker")
+    # Внутренний режим: один замер холодного старта в дочернем процессе
+    parser.add_argument("--probe", choices=("api", "worker"), help=argparse.SUPPRESS)
+    parser.add_argument("--database-url", help="по умолчанию — новый файл SQLite во временном каталоге")
+    parser.add_argument("--output", help="файл для JSON с результатами (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    if args.probe:
+        probe = probe_api if args.probe == "api" else probe_worker
+        print(json.dumps(asyncio.run(probe())))
+        return
+
+    if not args.database_url:
+        path = Path(tempfile.gettempdir()) / "userhub-bench.db"
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        args.database_url = f"sqlite+aiosqlite:///{path}"
+    # Должно быть задано до первого обращения к БД
+    os.environ["DATABASE_URL"] = args.database_url
+
+    started = datetime.now(timezone.utc)
+    results = asyncio.run(run(args))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": started.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": args.database_url.split(":", 1)[0],
+            "transport": "inprocess",
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,6 @@
+import asyncio
+import logging
+
 from litestar import Litestar
 from litestar.di import Provide
 from litestar.openapi import OpenAPIConfig
@@ -7,44 +10,275 @@ from src.app.dependencies import (
     provide_session,
     provide_task_repository,
     get_rabbitmq_service,
+    provide_password_hasher,
+    provide_rpc_client,
+    provide_task_publisher,
+)
+from src.app.logging_config import setup_logging, logging_stats
+from src.app.db import SessionLocal, get_engine, pool_stats
+from src.app.services.cache import (
+    USER_INVALIDATION_EXCHANGE,
+    InMemoryCacheBackend,
+    LRUCache,
+    UserCache,
+)
+from src.app.services.hashing import PasswordHasher
+from src.app.services.metrics import registry
+from src.app.services.outbox import OutboxRelay
+from src.app.services.readiness import Readiness, migration_revisions, wait_for_schema
+from src.app.services.retention import TaskResultRetention
+from src.app.services.sharding import is_shard_queue, shard_queues
+from src.app.services.single_flight import SingleFlight, parse_scope
+from src.app.services.transport import MessageTransport, create_transport
+from src.app.services.rpc import RpcClient
+from src.app.services.task_events import TASK_EVENTS_EXCHANGE, TaskDispatcher
+from src.app.settings import (
+    RMQ_URL,
+    RMQ_CHANNEL_POOL_SIZE,
+    MESSAGE_TRANSPORT,
+    MESSAGE_FORMAT,
+    BCRYPT_ROUNDS,
+    HASHING_MAX_WORKERS,
+    HASHING_MAX_PENDING,
+    USER_CACHE_ENABLED,
+    USER_CACHE_MAX_SIZE,
+    USER_CACHE_TTL,
+    USER_CACHE_LIST_TTL,
+    USER_CACHE_SHARED_BACKEND,
+    SINGLE_FLIGHT_SCOPE,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_POLL_INTERVAL,
+    TASK_RESULTS_RETENTION_DAYS,
+    TASK_RESULTS_PURGE_INTERVAL,
+    TASK_RESULTS_PURGE_BATCH_SIZE,
+    TASK_RESULTS_PARTITION_PREMAKE_DAYS,
+    STATIC_MAX_AGE,
+    STATIC_RELOAD,
+    STATIC_RELOAD_INTERVAL,
+    DB_POOL_SIZE,
+    DB_POOL_WARMUP,
+    DB_CREATE_TABLES,
+    RMQ_CHANNEL_WARMUP,
+    STARTUP_DB_ATTEMPTS,
+    STARTUP_BACKOFF_BASE,
+    STARTUP_BACKOFF_MAX,
+    STARTUP_WARMUP_TIMEOUT,
+    USER_ACTION_SHARDS,
 )
-from src.app.logging_config import setup_logging
-from src.app.migrate import create_tables_if_not_exist
+from src.app.routes.metrics_routes import MetricsController
+from src.app.routes.static_pages import StaticPages
 from src.app.routes.system_routes import SystemController
 from src.app.routes.users_routes import UserController
 from src.app.routes.task_routes import TaskController
 
-logger = setup_logging()
-
-# Конфигурация OpenAPI
-openapi_config = OpenAPIConfig(
-    title="UserHubAPI",
-    version="1.0.0",
-    description="API для управления пользователями",
-)
+logger = logging.getLogger("app")
 
 
-async def app_startup():
+async def app_startup(app: Litestar):
     logger.info("Application started")
-    await create_tables_if_not_exist()
-
-
-app = Litestar(
-    route_handlers=[UserController, TaskController, SystemController],
-    openapi_config=openapi_config,
-    on_startup=[app_startup],
-    dependencies={
-        "session": Provide(provide_session, sync_to_thread=False, use_cache=False),
-        "user_repo": Provide(provide_user_repository, sync_to_thread=False, use_cache=False),
-        "task_repo": Provide(provide_task_repository, sync_to_thread=False, use_cache=False),
-        "rabbitmq": Provide(get_rabbitmq_service),
-    },
-)
+    engine = get_engine()
+    app.state.readiness = Readiness(
+        engine,
+        # Соединения сверх pool_size закрываются при возврате, греть их бесполезно
+        db_connections=min(DB_POOL_WARMUP, DB_POOL_SIZE),
+        channels=RMQ_CHANNEL_WARMUP,
+        timeout=STARTUP_WARMUP_TIMEOUT,
+    )
+    known, parents = migration_revisions()
+    revisions = await wait_for_schema(
+        engine,
+        known - parents,
+        attempts=STARTUP_DB_ATTEMPTS,
+        base=STARTUP_BACKOFF_BASE,
+        cap=STARTUP_BACKOFF_MAX,
+        create_tables=DB_CREATE_TABLES,
+        known=known,
+    )
+    app.state.readiness.schema_revision = ",".join(sorted(revisions)) if revisions else None
+
+    transport = create_transport(
+        MESSAGE_TRANSPORT, RMQ_URL, pool_size=RMQ_CHANNEL_POOL_SIZE, message_format=MESSAGE_FORMAT
+    )
+    await start_services(app, transport)
+
+    app.state.inline_worker = None
+    if MESSAGE_TRANSPORT == "inprocess":
+        # Без брокера задачи выполняет worker внутри процесса API
+        from src.app.worker import worker
+        app.state.inline_worker = worker.start_inline(transport)
+
+    # /readyz отвечает 200 после прогрева пула БД и каналов брокера
+    await app.state.readiness.start(transport)
+
+
+async def start_services(app: Litestar, rabbitmq: MessageTransport):
+    """Создаёт общие сервисы приложения поверх заданного брокера"""
+    app.state.static_pages = create_static_pages()
+    app.state.hasher = PasswordHasher(
+        rounds=BCRYPT_ROUNDS,
+        max_workers=HASHING_MAX_WORKERS,
+        max_pending=HASHING_MAX_PENDING,
+    )
+    app.state.rabbitmq = rabbitmq
+    try:
+        await app.state.rabbitmq.connect()
+        # Очереди шардов объявляются заранее: задачи не теряются, пока worker не подписался
+        for queue_name in shard_queues(USER_ACTION_SHARDS):
+            await app.state.rabbitmq.declare_queue(queue_name, single_active_consumer=is_shard_queue(queue_name))
+    except Exception as e:
+        # Соединение будет установлено при первой публикации
+        logger.warning(f"RabbitMQ is not available on startup: {e}")
+
+    app.state.single_flight = SingleFlight(parse_scope(SINGLE_FLIGHT_SCOPE))
+    app.state.user_cache = await create_user_cache(app.state.rabbitmq, app.state.single_flight)
+    app.state.task_dispatcher = await create_task_dispatcher(app.state.rabbitmq)
+    app.state.rpc = await create_rpc_client(app.state.rabbitmq)
+
+    app.state.outbox_relay = OutboxRelay(
+        app.state.rabbitmq,
+        SessionLocal,
+        batch_size=OUTBOX_BATCH_SIZE,
+        poll_interval=OUTBOX_POLL_INTERVAL,
+    )
+    await app.state.outbox_relay.start()
+
+    # Партиции создаются заранее и при TASK_RESULTS_RETENTION_DAYS=0: иначе строки уйдут в DEFAULT
+    app.state.task_retention = TaskResultRetention(
+        SessionLocal,
+        retention_days=TASK_RESULTS_RETENTION_DAYS,
+        interval=TASK_RESULTS_PURGE_INTERVAL,
+        batch_size=TASK_RESULTS_PURGE_BATCH_SIZE,
+        premake_days=TASK_RESULTS_PARTITION_PREMAKE_DAYS,
+    )
+    await app.state.task_retention.start()
+
+    register_stats_metrics(app)
+
+
+def register_stats_metrics(app: Litestar):
+    """Публикует счётчики сервисов из /system/stats в /metrics"""
+    state = app.state
+    registry.register_stats("db_pool", pool_stats)
+    registry.register_stats("logging", logging_stats)
+    registry.register_stats("rabbitmq", state.rabbitmq.stats)
+    registry.register_stats("hashing", state.hasher.stats)
+    registry.register_stats("outbox", state.outbox_relay.stats)
+    registry.register_stats("static", state.static_pages.stats)
+    registry.register_stats("single_flight", state.single_flight.stats)
+    for name in ("user_cache", "task_dispatcher", "rpc", "task_retention", "readiness"):
+        # readiness создаётся только в app_startup, бенчмарки запускают сервисы без него
+        service = getattr(state, name, None)
+        if service is not None:
+            registry.register_stats(name, service.stats)
+
+
+def create_static_pages() -> StaticPages:
+    """Шаблоны читаются один раз при старте; дальше ответы отдаются из памяти"""
+    pages = StaticPages(max_age=STATIC_MAX_AGE)
+    pages.load()
+    if STATIC_RELOAD:
+        pages.start_watching(STATIC_RELOAD_INTERVAL)
+    return pages
+
+
+async def create_user_cache(
+    rabbitmq: MessageTransport, flights: SingleFlight | None = None
+) -> UserCache | None:
+    """Кэш работает, только если получилось подписаться на инвалидацию от worker"""
+    if not USER_CACHE_ENABLED:
+        return None
+
+    cache = UserCache(
+        local=LRUCache(max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL),
+        shared=InMemoryCacheBackend() if USER_CACHE_SHARED_BACKEND == "memory" else None,
+        list_ttl=USER_CACHE_LIST_TTL,
+        flights=flights,
+    )
+    try:
+        await rabbitmq.subscribe_fanout(USER_INVALIDATION_EXCHANGE, cache.handle_invalidation)
+    except Exception as e:
+        logger.warning(f"User cache disabled, invalidation subscription failed: {e}")
+        return None
+    return cache
+
+
+async def create_task_dispatcher(rabbitmq: MessageTransport) -> TaskDispatcher | None:
+    """Без подписки на события worker ожидание задач недоступно"""
+    dispatcher = TaskDispatcher()
+    try:
+        await rabbitmq.subscribe_fanout(TASK_EVENTS_EXCHANGE, dispatcher.handle_event)
+    except Exception as e:
+        logger.warning(f"Task completion events disabled, subscription failed: {e}")
+        return None
+    return dispatcher
+
+
+async def create_rpc_client(rabbitmq: MessageTransport) -> RpcClient | None:
+    """Без callback-очереди запросы с sync=true выполняются асинхронно"""
+    rpc = RpcClient(rabbitmq)
+    try:
+        await rpc.start()
+    except Exception as e:
+        logger.warning(f"Synchronous writes disabled, reply queue setup failed: {e}")
+        return None
+    return rpc
+
+
+async def app_shutdown(app: Litestar):
+    # Старт мог прерваться на любом шаге (например, схема БД не готова):
+    # останавливаем только то, что успело запуститься, не скрывая исходную ошибку
+    state = app.state
+    # Сначала снимаем готовность, чтобы балансировщик перестал направлять запросы
+    readiness = getattr(state, "readiness", None)
+    if readiness is not None:
+        await readiness.stop()
+    inline_worker = getattr(state, "inline_worker", None)
+    if inline_worker is not None:
+        inline_worker.cancel()
+        try:
+            await inline_worker
+        except asyncio.CancelledError:
+            pass
+    for name in ("outbox_relay", "task_retention", "static_pages"):
+        service = getattr(state, name, None)
+        if service is not None:
+            await service.stop()
+    rabbitmq = getattr(state, "rabbitmq", None)
+    if rabbitmq is not None:
+        await rabbitmq.close()
+    hasher = getattr(state, "hasher", None)
+    if hasher is not None:
+        hasher.close()
+    logger.info("Application stopped")
+
+
+def create_app() -> Litestar:
+    """Собирает приложение; engine, брокер и сервисы создаются при старте, а не при импорте"""
+    setup_logging()
+    return Litestar(
+        route_handlers=[UserController, TaskController, SystemController, MetricsController],
+        openapi_config=OpenAPIConfig(
+            title="UserHubAPI",
+            version="1.0.0",
+            description="API для управления пользователями",
+        ),
+        on_startup=[app_startup],
+        on_shutdown=[app_shutdown],
+        dependencies={
+            "session": Provide(provide_session, sync_to_thread=False, use_cache=False),
+            "user_repo": Provide(provide_user_repository, sync_to_thread=False, use_cache=False),
+            "task_repo": Provide(provide_task_repository, sync_to_thread=False, use_cache=False),
+            "rabbitmq": Provide(get_rabbitmq_service),
+            "hasher": Provide(provide_password_hasher),
+            "rpc": Provide(provide_rpc_client),
+            "publisher": Provide(provide_task_publisher),
+        },
+    )
+
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
-    import asyncio
-
-    asyncio.run(app_startup())
 
     uvicorn.run(app, host="127.0.0.1", port=8000)
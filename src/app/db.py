@@ -1,15 +1,21 @@
 import os
-from pathlib import Path
+from functools import lru_cache
+from uuid import uuid4
 
-from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 
+from src.app.db_pool import InstrumentedPool, pool_metrics
 from src.app.logging_config import setup_sql_logger
-
-setup_sql_logger()
-
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+from src.app.services.metrics import instrument_sqlalchemy
+from src.app.settings import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_TRANSACTION_POOLER,
+)
 
 
 def is_docker_container():
@@ -27,25 +33,87 @@ def get_default_db_host():
         return "localhost"
 
 
-# Параметры подключения
-DB_HOST = get_default_db_host()
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME", "users_db")
-DB_USER = os.getenv("DB_USER", "user")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
+@lru_cache
+def database_url() -> str:
+    """URL подключения; DATABASE_URL задаёт его целиком (например, SQLite для бенчмарков).
 
-# Формирование URL подключения
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    Вычисляется при первом обращении, поэтому импорт модуля не трогает файловую систему.
+    """
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return url
+    host = get_default_db_host()
+    port = os.getenv("DB_PORT", "5432")
+    name = os.getenv("DB_NAME", "users_db")
+    user = os.getenv("DB_USER", "user")
+    password = os.getenv("DB_PASSWORD", "password")
+    return f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{name}"
 
-engine = create_async_engine(
-    DATABASE_URL,
-    pool_pre_ping=True  # Проверяем соединение перед использованием
-)
 
-# Асинхронная сессия
-SessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False
-)
+def statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options(url: str | None = None) -> dict:
+    """Параметры пула и драйвера для create_async_engine"""
+    url = url or database_url()
+    if not url.startswith("postgresql+asyncpg"):
+        # Настройки кэша выражений есть только у asyncpg
+        connect_args = {}
+    elif DB_TRANSACTION_POOLER:
+        # PgBouncer отдаёт разные серверные соединения между транзакциями,
+        # поэтому подготовленные выражения не кэшируются и не переиспользуют имена
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": statement_name,
+        }
+    else:
+        connect_args = {
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+
+    return {
+        "poolclass": InstrumentedPool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    """Общий engine процесса; создаётся при первом обращении к БД"""
+    setup_sql_logger()
+    engine = create_async_engine(database_url(), **engine_options())
+    pool_metrics.attach(engine)
+    instrument_sqlalchemy()
+    return engine
+
+
+@lru_cache
+def get_session_factory() -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=get_engine(),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False
+    )
+
+
+class LazySessionFactory:
+    """Асинхронная сессия: SessionLocal() создаёт engine при первом вызове, а не при импорте"""
+
+    def __call__(self, **kwargs) -> AsyncSession:
+        return get_session_factory()(**kwargs)
+
+
+SessionLocal = LazySessionFactory()
+
+
+def pool_stats() -> dict:
+    return pool_metrics.stats(get_engine(), DB_POOL_SIZE + DB_MAX_OVERFLOW)
@@ -0,0 +1,116 @@
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """Метрики пула соединений: ожидание при выдаче, загрузка и оборот соединений.
+
+    Ожидание — время до выдачи соединения без времени установки нового
+    соединения с БД: оно учитывается отдельно (connect_*).
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connects = 0
+        self.connects_timed = 0
+        self.connect_total = 0.0
+        self.connect_max = 0.0
+        self.closes = 0
+        self.invalidations = 0
+
+    def observe_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def observe_connect(self, seconds: float):
+        self.connects_timed += 1
+        self.connect_total += seconds
+        self.connect_max = max(self.connect_max, seconds)
+
+    def attach(self, engine: AsyncEngine):
+        """Подписывается на события пула; подписка переживает пересоздание пула"""
+        target = engine.sync_engine
+        event.listen(target, "connect", self._on_connect)
+        event.listen(target, "close", self._on_close)
+        event.listen(target, "close_detached", self._on_close)
+        event.listen(target, "invalidate", self._on_invalidate)
+        event.listen(target, "soft_invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_close(self, dbapi_connection, *args):
+        self.closes += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def stats(self, engine: AsyncEngine, capacity: int) -> dict:
+        pool = engine.sync_engine.pool
+        checked_out = pool.checkedout() if isinstance(pool, AsyncAdaptedQueuePool) else 0
+        return {
+            "size": pool.size() if isinstance(pool, AsyncAdaptedQueuePool) else 0,
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "utilization": round(checked_out / capacity, 3) if capacity else 0,
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "connects": self.connects,
+            "connect_avg_ms": (
+                round(self.connect_total / self.connects_timed * 1000, 3) if self.connects_timed else 0
+            ),
+            "connect_max_ms": round(self.connect_max * 1000, 3),
+            "closes": self.closes,
+            "invalidations": self.invalidations,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+# Время подключений к БД внутри текущей выдачи соединения
+_checkout_connect_time: ContextVar[list[float] | None] = ContextVar("checkout_connect_time", default=None)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Очередь соединений, замеряющая время ожидания свободного соединения"""
+
+    metrics = pool_metrics
+
+    def _do_get(self):
+        if _checkout_connect_time.get() is not None:
+            # Повторный вызов из QueuePool._do_get: замер уже идёт
+            return super()._do_get()
+        connect_time = [0.0]
+        token = _checkout_connect_time.set(connect_time)
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.checkout_timeouts += 1
+            raise
+        finally:
+            _checkout_connect_time.reset(token)
+        self.metrics.observe_wait(time.perf_counter() - start - connect_time[0])
+        return connection
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.observe_connect(elapsed)
+            connect_time = _checkout_connect_time.get()
+            if connect_time is not None:
+                connect_time[0] += elapsed
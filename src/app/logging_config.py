@@ -1,45 +1,169 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+from src.app.settings import (
+    LOG_FORMAT,
+    LOG_QUEUE_SIZE,
+    LOG_SAMPLING,
+    SQLALCHEMY_LOG_LEVEL,
+)
+
 # Формат логов
 formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
 
+# Фоновые потоки записи, останавливаются при выходе из процесса
+_listeners: list[QueueListener] = []
+_queue_handlers: list["BoundedQueueHandler"] = []
+
+
+class JsonFormatter(logging.Formatter):
+    """Структурированный формат: одна JSON-запись на строку"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Кладёт записи в ограниченную очередь; при переполнении отбрасывает их со счётчиком.
+
+    prepare остаётся от QueueHandler: сообщение и трассировка форматируются
+    до постановки в очередь, а args и exc_info очищаются — поток записи не
+    держит кадры стека и не видит изменённые позже аргументы.
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю записей ниже WARNING по имени логгера; предупреждения и ошибки проходят всегда.
+
+    Доля берётся по самому длинному совпавшему префиксу имени: "sqlalchemy.engine"
+    действует и на "sqlalchemy.engine.Engine". Логгеры без доли не прореживаются.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def rate_for(self, name: str) -> float | None:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        if rate is None or rate >= 1:
+            return True
+        return random.random() < rate
+
+
+def parse_sampling(value: str) -> dict[str, float]:
+    """Разбирает строку вида "sqlalchemy.engine=0.01,app=1" """
+    rates = {}
+    for part in value.split(","):
+        name, _, rate = part.strip().partition("=")
+        if name and rate:
+            rates[name] = float(rate)
+    return rates
 
-def setup_logging():
-    # Основной логгер приложения
-    logger = logging.getLogger("app")
-    logger.setLevel(logging.INFO)
 
-    # Файловый обработчик с ротацией
-    log_file_handler = RotatingFileHandler(
-        filename="logs/app.log",
+SAMPLING_RATES = parse_sampling(LOG_SAMPLING)
+sampling_filter = SamplingFilter(SAMPLING_RATES)
+
+
+def sample_root_handlers():
+    """Прореживание для логгеров без своей очереди (worker, httpx, aio_pika): они пишут через корневой"""
+    if not SAMPLING_RATES:
+        return
+    for handler in logging.getLogger().handlers:
+        if sampling_filter not in handler.filters:
+            handler.addFilter(sampling_filter)
+
+
+def _file_handler(filename: str) -> RotatingFileHandler:
+    # Каталог создаётся при подключении первого файлового логгера, а не при импорте
+    log_dir.mkdir(exist_ok=True)
+    handler = RotatingFileHandler(
+        filename=filename,
         maxBytes=5 * 1024 * 1024,  # 5 MB
         backupCount=3,
         encoding="utf-8"
     )
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else formatter)
+    return handler
+
+
+def _attach_async_handler(logger: logging.Logger, filename: str):
+    """Подключает к логгеру запись в файл через очередь и фоновый поток"""
+    queue_handler = BoundedQueueHandler(LOG_QUEUE_SIZE)
+    # Фильтр на обработчике видит и записи дочерних логгеров (app.*, sqlalchemy.engine.*)
+    queue_handler.addFilter(sampling_filter)
+
+    listener = QueueListener(queue_handler.queue, _file_handler(filename), respect_handler_level=True)
+    listener.start()
+
+    logger.addHandler(queue_handler)
+    _listeners.append(listener)
+    _queue_handlers.append(queue_handler)
+
+
+def setup_logging():
+    # Основной логгер приложения
+    logger = logging.getLogger("app")
+    logger.setLevel(logging.INFO)
 
-    log_file_handler.setFormatter(formatter)
-    logger.addHandler(log_file_handler)
+    if not logger.handlers:
+        _attach_async_handler(logger, "logs/app.log")
+    sample_root_handlers()
 
     return logger
 
 
 def setup_sql_logger():
-    # Логгер SQLAlchemy
+    # Логгер SQLAlchemy: по умолчанию только предупреждения, без текста каждого запроса
     sql_logger = logging.getLogger("sqlalchemy.engine")
-    sql_logger.setLevel(logging.INFO)
+    sql_logger.setLevel(SQLALCHEMY_LOG_LEVEL)
 
-    # Файловый обработчик с ротацией
-    sql_file_handler = RotatingFileHandler(
-        filename="logs/sql.log",
-        maxBytes=5 * 1024 * 1024,  # 5 MB
-        backupCount=3,
-        encoding="utf-8"
-    )
+    if not sql_logger.handlers:
+        _attach_async_handler(sql_logger, "logs/sql.log")
+
+
+def logging_stats() -> dict:
+    """Заполненность очередей логов и число отброшенных записей"""
+    return {
+        "queued": sum(h.queue.qsize() for h in _queue_handlers),
+        "dropped": sum(h.dropped for h in _queue_handlers),
+    }
 
-    sql_file_handler.setFormatter(formatter)
 
-    sql_logger.addHandler(sql_file_handler)
+@atexit.register
+def stop_logging():
+    """Дописывает оставшиеся в очередях записи и останавливает фоновые потоки"""
+    while _listeners:
+        _listeners.pop().stop()
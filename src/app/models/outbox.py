@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.sql import func
+
+from .user import Base, BigIntegerId
+
+
+class OutboxMessage(Base):
+    """Сообщение, ожидающее публикации в брокер (transactional outbox)"""
+    __tablename__ = 'outbox'
+
+    id = Column(BigIntegerId, primary_key=True, autoincrement=True)
+    routing_key = Column(String(255), nullable=False)
+    payload = Column(JSON, nullable=False)
+    reply_to = Column(String(255), nullable=True)
+    correlation_id = Column(String(64), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -7,8 +7,10 @@ class TaskResult(Base):
     __tablename__ = 'task_results'
 
     id = Column(String(36), primary_key=True)
+    # Ключ партиционирования по времени входит в первичный ключ;
+    # для задач с UUIDv7 равен времени из id (см. services.task_ids)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
     status = Column(String(50), index=True)
     result = Column(JSON, nullable=True)
     error = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,21 +1,63 @@
+from datetime import datetime, timezone
 from enum import Enum
 
-from sqlalchemy import Column, BigInteger, String, DateTime
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, DDL, Index, event, text
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
 
 Base = declarative_base()
 
+# В SQLite автоинкремент работает только для INTEGER PRIMARY KEY
+BigIntegerId = BigInteger().with_variant(Integer, "sqlite")
+
+
+def utc_now() -> datetime:
+    """Время изменения из Python: CURRENT_TIMESTAMP в SQLite — с точностью до секунды,
+    и ETag не менялся бы при изменении в ту же секунду"""
+    return datetime.now(timezone.utc)
+
 
 class User(Base):
     __tablename__ = 'users'
 
-    id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    id = Column(BigIntegerId, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), index=True)
     surname = Column(String(255))
     password = Column(String(255))
     created_at = Column(DateTime(timezone=True), server_default=func.now())  # UTC
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())  # UTC
+    updated_at = Column(DateTime(timezone=True), onupdate=utc_now)  # UTC
+
+    __table_args__ = (
+        # Точный поиск по фамилии (и имени) и keyset-пагинация с сортировкой по created_at
+        Index("ix_users_surname_name", "surname", "name"),
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
+
+
+def search_vector():
+    """Документ полнотекстового поиска; должен совпадать с выражением индекса ix_users_fts"""
+    return func.to_tsvector(
+        text("'simple'::regconfig"),
+        func.coalesce(User.name, text("''")).op("||")(text("' '")).op("||")(
+            func.coalesce(User.surname, text("''"))
+        ),
+    )
+
+
+# Индексы поиска только для PostgreSQL (pg_trgm и full-text), как в миграции add_user_search_indexes
+Index(
+    "ix_users_name_trgm", User.name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_surname_trgm", User.surname, postgresql_using="gin", postgresql_ops={"surname": "gin_trgm_ops"}
+).ddl_if(dialect="postgresql")
+Index("ix_users_fts", search_vector(), postgresql_using="gin").ddl_if(dialect="postgresql")
+
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
 
 
 class UserAction(str, Enum):
@@ -23,3 +65,6 @@ class UserAction(str, Enum):
     READ = "read"
     UPDATE = "update"
     DELETE = "delete"
+    BATCH_CREATE = "batch_create"
+    BATCH_UPDATE = "batch_update"
+    BATCH_DELETE = "batch_delete"
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Type, List
+from datetime import datetime
+from typing import Any, AsyncIterator, Generic, TypeVar, Type, List
+
+from src.app.schemas.search import UserSearchFilters
 
 T = TypeVar("T")
 
@@ -10,6 +13,25 @@ class UserRepository(ABC, Generic[T]):
     @abstractmethod
     async def get_all(self) -> List[T]: ...
 
+    @abstractmethod
+    async def get_page(self, limit: int, after_id: int | None = None) -> List[T]: ...
+
+    @abstractmethod
+    async def get_page_version(
+        self, limit: int, after_id: int | None = None
+    ) -> tuple[int, int | None, datetime | None]:
+        """Версия страницы get_page: (число записей, max(id), время последнего изменения)"""
+
+    @abstractmethod
+    async def search(self, filters: UserSearchFilters, limit: int) -> List[T]: ...
+
+    @abstractmethod
+    async def explain_search(self, filters: UserSearchFilters, limit: int) -> List[Any]:
+        """План запроса search в формате СУБД"""
+
+    @abstractmethod
+    def stream_all(self, batch_size: int = 1000) -> AsyncIterator[T]: ...
+
     @abstractmethod
     async def get_by_id(self, obj_id: int) -> T | None: ...
 
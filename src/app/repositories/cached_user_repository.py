@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, List
+
+from src.app.models.user import User
+from src.app.repositories.base import UserRepository
+from src.app.repositories.user_repository import SQLAlchemyUserRepository
+from src.app.schemas.records import modified_at, user_dict
+from src.app.schemas.search import UserSearchFilters
+from src.app.services.cache import UserCache
+
+
+class CachedUserRepository(UserRepository[User]):
+    """Репозиторий с read-through кэшем для чтения; запись идёт напрямую.
+
+    Чтение возвращает словари с полями UserOut, а не ORM-объекты.
+    """
+    model = User
+
+    def __init__(self, repo: SQLAlchemyUserRepository, cache: UserCache):
+        self.repo = repo
+        self.cache = cache
+
+    @staticmethod
+    def _dump(user: User | None) -> dict | None:
+        if user is None:
+            return None
+        # Время изменения нужно для ETag/Last-Modified без повторного запроса
+        return {**user_dict(user), "modified": modified_at(user)}
+
+    async def get_all(self) -> List[dict]:
+        return await self.cache.get_list(
+            ("all",), lambda: self._load_list(self.repo.get_all())
+        )
+
+    async def get_page(self, limit: int, after_id: int | None = None) -> List[dict]:
+        return await self.cache.get_list(
+            ("page", limit, after_id), lambda: self._load_list(self.repo.get_page(limit, after_id))
+        )
+
+    async def get_page_version(
+        self, limit: int, after_id: int | None = None
+    ) -> tuple[int, int | None, datetime | None]:
+        return await self.cache.get_list(
+            ("page_version", limit, after_id), lambda: self.repo.get_page_version(limit, after_id)
+        )
+
+    async def search(self, filters: UserSearchFilters, limit: int) -> List[User]:
+        # Сочетаний фильтров слишком много для кэша: поиск всегда идёт в БД
+        return await self.repo.search(filters, limit)
+
+    async def explain_search(self, filters: UserSearchFilters, limit: int) -> List[Any]:
+        return await self.repo.explain_search(filters, limit)
+
+    def stream_all(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        return self.repo.stream_all(batch_size)
+
+    async def get_by_id(self, obj_id: int) -> dict | None:
+        async def load():
+            return self._dump(await self.repo.get_by_id(obj_id))
+
+        return await self.cache.get_user(obj_id, load)
+
+    async def create(self, obj: User) -> User:
+        return await self.repo.create(obj)
+
+    async def update(self, obj: User, update_data: dict) -> User:
+        return await self.repo.update(obj, update_data)
+
+    async def delete(self, obj_id: int) -> None:
+        return await self.repo.delete(obj_id)
+
+    async def _load_list(self, query) -> List[dict]:
+        return [self._dump(user) for user in await query]
@@ -0,0 +1,64 @@
+from typing import List
+
+from sqlalchemy import Select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.app.models.outbox import OutboxMessage
+
+# Класс advisory-блокировок outbox (первый ключ pg_try_advisory_xact_lock)
+OUTBOX_LOCK_CLASS = 7211
+
+
+def locked_routing_keys_query() -> Select:
+    """Очереди с неотправленными сообщениями, которые удалось заблокировать до конца транзакции.
+
+    Блокировка берётся на очередь, а не на строки: relay другой реплики не
+    публикует следующие сообщения той же очереди параллельно с этим.
+    """
+    keys = select(OutboxMessage.routing_key).distinct().subquery()
+    return select(keys.c.routing_key).where(
+        func.pg_try_advisory_xact_lock(OUTBOX_LOCK_CLASS, func.hashtext(keys.c.routing_key))
+    )
+
+
+class SQLAlchemyOutboxRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def add(
+        self,
+        routing_key: str,
+        payload: dict,
+        reply_to: str | None = None,
+        correlation_id: str | None = None,
+    ) -> OutboxMessage:
+        """Добавляет сообщение в текущую транзакцию; коммит выполняет вызывающий код"""
+        message = OutboxMessage(
+            routing_key=routing_key,
+            payload=payload,
+            reply_to=reply_to,
+            correlation_id=correlation_id,
+        )
+        self.session.add(message)
+        return message
+
+    async def fetch_batch(self, limit: int) -> List[OutboxMessage]:
+        """Блокирует до limit неотправленных сообщений, пропуская занятые другими репликами.
+
+        В PostgreSQL берутся только сообщения очередей, заблокированных этой
+        транзакцией: каждую очередь в один момент публикует один relay, и
+        задачи одного шарда уходят в брокер по порядку при любом числе реплик API.
+        """
+        query = select(OutboxMessage).order_by(OutboxMessage.id).limit(limit)
+        if self.session.get_bind().dialect.name == "postgresql":
+            routing_keys = list(await self.session.scalars(locked_routing_keys_query()))
+            if not routing_keys:
+                return []
+            query = query.where(OutboxMessage.routing_key.in_(routing_keys))
+        result = await self.session.execute(query.with_for_update(skip_locked=True))
+        return list(result.scalars().all())
+
+    async def delete(self, ids: List[int]) -> None:
+        if ids:
+            await self.session.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(ids)))
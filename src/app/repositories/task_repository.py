@@ -1,24 +1,33 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.sql import func
 import json
 
 from src.app.models.task_result import TaskResult
+from src.app.services.single_flight import SingleFlight, flight_session
+from src.app.services.task_ids import task_id_time
 
 
 class SQLAlchemyTaskResultRepository:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, flights: SingleFlight | None = None):
         self.session = session
+        self.flights = flights
 
-    async def create(self, task_id: str):
-        task = TaskResult(id=task_id, status="queued")
+    async def create(self, task_id: str, commit: bool = True):
+        created_at = task_id_time(task_id) or datetime.now(timezone.utc)
+        task = TaskResult(id=task_id, created_at=created_at, status="queued")
         self.session.add(task)
-        await self.session.commit()
+        if commit:
+            await self.session.commit()
         return task
 
     async def update(self, task_id: str, status: str, result: dict | None = None, error: str | None = None):
-        task = await self.session.get(TaskResult, task_id)
+        task = await self.get(task_id, shared=False)
         if not task:
-            task = TaskResult(id=task_id)
+            task = TaskResult(id=task_id, created_at=task_id_time(task_id) or datetime.now(timezone.utc))
             self.session.add(task)
         task.status = status
         task.result = result
@@ -27,5 +36,65 @@ class SQLAlchemyTaskResultRepository:
         await self.session.refresh(task)
         return task
 
-    async def get(self, task_id: str) -> TaskResult | None:
-        return await self.session.get(TaskResult, task_id)
+    async def update_many(self, results: list[dict]) -> None:
+        """Записывает статусы пакета задач одним INSERT ... ON CONFLICT DO UPDATE.
+
+        Каждый элемент results — словарь с ключами id, status, result, error.
+        Коммит выполняет вызывающий код вместе с остальными изменениями пакета.
+        """
+        if not results:
+            return
+        # Повторно доставленное сообщение может дать дубль id в одном пакете
+        results = list({r["id"]: r for r in results}.values())
+        created = await self._created_at([r["id"] for r in results])
+        results = [{**r, "created_at": created[r["id"]]} for r in results]
+        # SQLite (локальные бенчмарки) поддерживает тот же ON CONFLICT DO UPDATE
+        dialect = self.session.get_bind().dialect.name
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        statement = insert(TaskResult).values(results)
+        statement = statement.on_conflict_do_update(
+            index_elements=[TaskResult.id, TaskResult.created_at],
+            set_={
+                "status": statement.excluded.status,
+                "result": statement.excluded.result,
+                "error": statement.excluded.error,
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(statement)
+
+    async def _created_at(self, task_ids: list[str]) -> dict[str, datetime]:
+        """created_at задач (часть первичного ключа) для upsert по (id, created_at)"""
+        created = {task_id: task_id_time(task_id) for task_id in task_ids}
+        legacy = [task_id for task_id, value in created.items() if value is None]
+        if legacy:
+            # id без времени (не UUIDv7): берём created_at существующей строки
+            rows = await self.session.execute(
+                select(TaskResult.id, TaskResult.created_at).where(TaskResult.id.in_(legacy))
+            )
+            created.update(dict(rows.all()))
+        now = datetime.now(timezone.utc)
+        return {task_id: value or now for task_id, value in created.items()}
+
+    async def get(self, task_id: str, shared: bool = True) -> TaskResult | None:
+        """Поиск по первичному ключу; для UUIDv7 — в одной партиции по времени из id.
+
+        При shared одновременные чтения одной задачи объединяются (см. SingleFlight):
+        результат может прийти из запроса, начатого раньше вызова, и только для чтения:
+        он загружен отдельной сессией и отсоединён.
+        """
+        if shared and self.flights is not None:
+            return await self.flights.do("tasks", task_id, lambda: self._get_detached(task_id))
+        return await self._get(self.session, task_id)
+
+    async def _get_detached(self, task_id: str) -> TaskResult | None:
+        async with flight_session(self.session) as session:
+            return await self._get(session, task_id)
+
+    @staticmethod
+    async def _get(session: AsyncSession, task_id: str) -> TaskResult | None:
+        created_at = task_id_time(task_id)
+        if created_at is not None:
+            return await session.get(TaskResult, (task_id, created_at))
+        result = await session.execute(select(TaskResult).where(TaskResult.id == task_id).limit(1))
+        return result.scalars().first()
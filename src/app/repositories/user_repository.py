@@ -1,25 +1,143 @@
+from datetime import datetime
+
+from sqlalchemy import Select, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.sql import func
-from typing import List
+from typing import Any, AsyncIterator, List
 
-from src.app.models.user import User
+from src.app.models.user import User, search_vector, utc_now
 from src.app.repositories.base import UserRepository
+from src.app.schemas.search import UserSearchFilters
+from src.app.services.single_flight import SingleFlight, flight_session
+
+
+def like_prefix(value: str) -> str:
+    """Шаблон LIKE для префикса с экранированием спецсимволов"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
 
 
 class SQLAlchemyUserRepository(UserRepository[User]):
     model = User
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, flights: SingleFlight | None = None):
         self.session = session
+        # Только для чтения в API: объект загружен отдельной сессией и отсоединён
+        self.flights = flights
 
     async def get_all(self) -> List[User]:
         result = await self.session.execute(select(self.model))
         return list(result.scalars().all())
 
+    async def get_page(self, limit: int, after_id: int | None = None) -> List[User]:
+        """Keyset-пагинация по id: страница из limit записей после after_id"""
+        query = select(self.model).order_by(self.model.id).limit(limit)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def get_page_version(
+        self, limit: int, after_id: int | None = None
+    ) -> tuple[int, int | None, datetime | None]:
+        """Агрегат по той же странице, что и get_page, без чтения самих строк"""
+        page = (
+            select(self.model.id, func.coalesce(self.model.updated_at, self.model.created_at).label("modified"))
+            .order_by(self.model.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            page = page.where(self.model.id > after_id)
+        page = page.subquery()
+        result = await self.session.execute(
+            select(func.count(), func.max(page.c.id), func.max(page.c.modified))
+        )
+        count, max_id, modified = result.one()
+        return count, max_id, modified
+
+    def _search_query(self, filters: UserSearchFilters, limit: int) -> Select:
+        """Запрос поиска; условия подобраны под индексы users (см. миграции поиска)"""
+        model = self.model
+        postgresql = self.session.get_bind().dialect.name == "postgresql"
+        query = select(model)
+        if filters.name is not None:
+            query = query.where(model.name == filters.name)
+        if filters.surname is not None:
+            query = query.where(model.surname == filters.surname)
+        if filters.name_prefix is not None:
+            query = query.where(model.name.ilike(like_prefix(filters.name_prefix), escape="\\"))
+        if filters.surname_prefix is not None:
+            query = query.where(model.surname.ilike(like_prefix(filters.surname_prefix), escape="\\"))
+        if filters.query is not None:
+            if postgresql:
+                query = query.where(
+                    search_vector().op("@@")(func.plainto_tsquery(text("'simple'::regconfig"), filters.query))
+                )
+            else:
+                # Без full-text поиска: каждое слово должно встречаться в имени или фамилии
+                for word in filters.query.split():
+                    pattern = f"%{like_prefix(word)}"
+                    query = query.where(
+                        model.name.ilike(pattern, escape="\\") | model.surname.ilike(pattern, escape="\\")
+                    )
+        if filters.created_from is not None:
+            query = query.where(model.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            query = query.where(model.created_at < filters.created_to)
+
+        descending = filters.sort.startswith("-")
+        if filters.sort.lstrip("-") == "created_at":
+            created_at, after_created_at = model.created_at, filters.after_created_at
+            if not postgresql:
+                # SQLite хранит время строкой: server_default без долей секунды, параметры — с ними
+                created_at, after_created_at = func.datetime(created_at), func.datetime(after_created_at)
+            key = tuple_(created_at, model.id)
+            after = tuple_(after_created_at, filters.after_id)
+            order = (created_at.desc(), model.id.desc()) if descending else (created_at, model.id)
+        else:
+            key, after = model.id, filters.after_id
+            order = (model.id.desc(),) if descending else (model.id,)
+        if filters.after_id is not None:
+            query = query.where(key < after if descending else key > after)
+        return query.order_by(*order).limit(limit)
+
+    async def search(self, filters: UserSearchFilters, limit: int) -> List[User]:
+        result = await self.session.execute(self._search_query(filters, limit))
+        return list(result.scalars().all())
+
+    async def explain_search(self, filters: UserSearchFilters, limit: int) -> List[Any]:
+        """EXPLAIN для того же SQL и параметров, что выполняет search"""
+        connection = await self.session.connection()
+        dialect = connection.dialect
+        compiled = self._search_query(filters, limit).compile(dialect=dialect)
+        params = compiled.construct_params()
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+
+        prefix = "EXPLAIN" if dialect.name == "postgresql" else "EXPLAIN QUERY PLAN"
+        result = await connection.exec_driver_sql(f"{prefix} {compiled.string}", params)
+        # Строки плана: в PostgreSQL — единственный столбец, в SQLite — последний (detail)
+        return [row[-1] for row in result]
+
+    async def stream_all(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        """Построчное чтение всей таблицы через серверный курсор"""
+        result = await self.session.stream_scalars(
+            select(self.model)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for user in result:
+            yield user
+
     async def get_by_id(self, obj_id: int) -> User | None:
+        if self.flights is not None:
+            return await self.flights.do("users", obj_id, lambda: self._get_detached(obj_id))
         return await self.session.get(self.model, obj_id)
 
+    async def _get_detached(self, obj_id: int) -> User | None:
+        async with flight_session(self.session) as session:
+            return await session.get(self.model, obj_id)
+
     async def create(self, obj: User) -> User:
         self.session.add(obj)
         await self.session.commit()
@@ -29,7 +147,7 @@ class SQLAlchemyUserRepository(UserRepository[User]):
     async def update(self, obj: User, update_data: dict) -> User:
         for key, value in update_data.items():
             setattr(obj, key, value)
-        obj.updated_at = func.now()
+        obj.updated_at = utc_now()
         await self.session.commit()
         await self.session.refresh(obj)
         return obj
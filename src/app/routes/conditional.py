@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping, Optional
+
+from litestar import Response
+from litestar.status_codes import HTTP_304_NOT_MODIFIED
+
+# Клиент хранит ответ, но перед использованием обязан его перепроверить
+CACHE_CONTROL = "private, no-cache"
+
+
+def _utc(moment: datetime) -> datetime:
+    # SQLite возвращает время без часового пояса; в БД хранится UTC
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def _version(moment: Optional[datetime]) -> str:
+    return format(int(_utc(moment).timestamp() * 1_000_000), "x") if moment else "0"
+
+
+def user_etag(user_id: int, modified: Optional[datetime]) -> str:
+    """Сильный ETag пользователя: тело ответа однозначно определяется id и updated_at"""
+    return f'"u{user_id}-{_version(modified)}"'
+
+
+def page_etag(count: int, max_id: Optional[int], modified: Optional[datetime]) -> str:
+    """Слабый ETag страницы по агрегату (число строк, max(id), max(updated_at))"""
+    return f'W/"p{count}-{max_id or 0}-{_version(modified)}"'
+
+
+def validator_headers(etag: str, modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(modified), usegmt=True)
+    return headers
+
+
+def _opaque(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, modified: Optional[datetime]) -> bool:
+    """Проверка If-None-Match (слабое сравнение), иначе If-Modified-Since"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque(etag) in {_opaque(tag.strip()) for tag in if_none_match.split(",")}
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # Last-Modified передаётся с точностью до секунды
+        return _utc(modified).replace(microsecond=0) <= _utc(since)
+    return False
+
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(content=None, status_code=HTTP_304_NOT_MODIFIED, headers=headers)
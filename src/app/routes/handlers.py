@@ -1,5 +1,4 @@
 import datetime
-import uuid
 from functools import wraps
 
 from litestar import Response
@@ -7,8 +6,14 @@ from litestar.status_codes import *
 from pydantic import ValidationError
 
 from src.app.models.user import UserAction
-from src.app.services.rabbitmq import RabbitMQService
+from src.app.services.hashing import HashingOverloadedError
+from src.app.repositories.outbox_repository import SQLAlchemyOutboxRepository
 from src.app.repositories.task_repository import SQLAlchemyTaskResultRepository
+from src.app.services.outbox import OutboxRelay
+from src.app.services.rpc import RpcClient
+from src.app.services.sharding import route_task
+from src.app.services.task_ids import new_task_id
+from src.app.settings import USER_ACTION_SHARDS
 
 
 def handle_errors_and_logging(logger):
@@ -16,7 +21,7 @@ def handle_errors_and_logging(logger):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             try:
-                logger.info(f"Starting {func.__name__}")
+                logger.debug("Starting %s", func.__name__)
                 result = await func(*args, **kwargs)
                 return result
             except ValidationError as e:
@@ -25,6 +30,13 @@ def handle_errors_and_logging(logger):
                     content={"status": "error", "details": e.errors()},
                     status_code=HTTP_400_BAD_REQUEST,
                 )
+            except HashingOverloadedError as e:
+                logger.warning(f"Backpressure in {func.__name__}: {e}")
+                return Response(
+                    content={"status": "error", "message": "Server is busy, retry later"},
+                    status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": "1"},
+                )
             except Exception as e:
                 logger.error(f"Error in {func.__name__}: {str(e)}", exc_info=True)
                 return Response(
@@ -41,15 +53,35 @@ def handle_errors_and_logging(logger):
 
 
 class RabbitMQHandler:
-    def __init__(self, rabbitmq: RabbitMQService, task_repo):
-        self.rabbitmq = rabbitmq
+    """Постановка задач в очередь через transactional outbox.
+
+    Строка task_results и сообщение для брокера записываются одним коммитом,
+    публикацию в RabbitMQ выполняет OutboxRelay в фоне. При shards > 1
+    задачи одного пользователя направляются в один шард очереди.
+    """
+
+    def __init__(
+        self,
+        task_repo: SQLAlchemyTaskResultRepository,
+        outbox_repo: SQLAlchemyOutboxRepository,
+        relay: OutboxRelay | None = None,
+        shards: int = USER_ACTION_SHARDS,
+    ):
         self.task_repo = task_repo
+        self.outbox_repo = outbox_repo
+        self.relay = relay
+        self.shards = shards
 
     async def publish_task(
-        self, queue_name: str, action: UserAction, data: dict = None
+        self,
+        queue_name: str,
+        action: UserAction,
+        data: dict = None,
+        task_id: str | None = None,
+        reply_to: str | None = None,
     ):
 
-        task_id = str(uuid.uuid4())
+        task_id = task_id or new_task_id()
         message_data = {
             "task_id": task_id,
             "action": action,
@@ -59,14 +91,44 @@ class RabbitMQHandler:
             },
         }
 
-        await self.rabbitmq.publish(
-            queue_name=queue_name,
-            message_data=message_data,
+        self.outbox_repo.add(
+            routing_key=route_task(queue_name, self.shards, data, task_id),
+            payload=message_data,
+            reply_to=reply_to,
+            correlation_id=task_id if reply_to else None,
         )
-
         await self.task_repo.create(task_id)
+        if self.relay is not None:
+            self.relay.notify()
 
         return {
             "status": "queued",
             "task_id": task_id,
         }
+
+    async def publish_task_and_wait(
+        self,
+        queue_name: str,
+        action: UserAction,
+        data: dict,
+        rpc: RpcClient,
+        timeout: float,
+    ) -> dict:
+        """Публикует задачу с reply_to и ждёт ответа worker не дольше timeout.
+
+        Возвращает ответ worker (status, result, error) или, по таймауту,
+        обычный ответ о постановке задачи в очередь.
+        """
+        task_id = new_task_id()
+        future = rpc.dispatcher.subscribe(task_id)
+        try:
+            queued = await self.publish_task(
+                queue_name, action, data, task_id=task_id, reply_to=rpc.callback_queue
+            )
+            reply = await rpc.dispatcher.wait(future, timeout)
+        finally:
+            rpc.dispatcher.unsubscribe(task_id, future)
+
+        if reply is None:
+            return queued
+        return {**reply, "task_id": task_id}
@@ -0,0 +1,40 @@
+import time
+
+from litestar import Controller, get, Response
+from litestar.types import ASGIApp, Receive, Scope, Send
+
+from src.app.services.metrics import CONTENT_TYPE, http_latency, http_requests, registry
+
+
+def metrics_middleware(app: ASGIApp) -> ASGIApp:
+    """Считает запросы и задержку по обработчикам контроллера"""
+
+    async def middleware(scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await app(scope, receive, send_wrapper)
+        finally:
+            handler = scope["route_handler"].handler_name
+            http_latency.observe(time.perf_counter() - start, handler, scope["method"])
+            http_requests.inc(handler, scope["method"], str(status))
+
+    return middleware
+
+
+class MetricsController(Controller):
+    @get("/metrics", include_in_schema=False)
+    async def metrics(self) -> Response:
+        """Метрики процесса в формате Prometheus"""
+        return Response(content=registry.render(), media_type=CONTENT_TYPE)
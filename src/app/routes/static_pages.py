@@ -0,0 +1,173 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping, Optional
+
+from litestar import MediaType, Response
+from litestar.status_codes import HTTP_200_OK
+
+from src.app.routes.conditional import is_not_modified, not_modified_response
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+logger = logging.getLogger("app")
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+# Предпочтение при равных весах в Accept-Encoding
+ENCODINGS = ("br", "gzip")
+
+
+@dataclass
+class StaticPage:
+    """Страница, загруженная в память, с заранее сжатыми вариантами"""
+    name: str
+    mtime: float
+    variants: dict[str, bytes] = field(default_factory=dict)
+    etags: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "StaticPage":
+        body = path.read_bytes()
+        page = cls(name=path.name, mtime=path.stat().st_mtime)
+        page.variants["identity"] = body
+        compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(body, quality=11)
+        for encoding, data in compressed.items():
+            if len(data) < len(body):
+                page.variants[encoding] = data
+
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        # Сильный ETag различается у разных кодировок одного содержимого
+        for encoding in page.variants:
+            suffix = "" if encoding == "identity" else f"-{encoding}"
+            page.etags[encoding] = f'"{digest}{suffix}"'
+        return page
+
+
+def encoding_weights(header: Optional[str]) -> dict[str, float]:
+    """Веса кодировок из Accept-Encoding (q, по умолчанию 1)"""
+    weights = {}
+    for part in (header or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    return weights
+
+
+def choose_encoding(header: Optional[str], available) -> str:
+    """Сжатый вариант с наибольшим весом; q=0 запрещает кодировку, в том числе при "*" """
+    weights = encoding_weights(header)
+    best, best_weight = "identity", 0.0
+    for encoding in ENCODINGS:
+        # Явно указанный вес важнее веса "*"
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if encoding in available and weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class StaticPages:
+    """HTML-страницы из templates: читаются с диска один раз при старте.
+
+    Ответ выбирается из готовых вариантов (identity, gzip и, если установлен
+    пакет brotli, br) по Accept-Encoding. В режиме разработки фоновая задача
+    следит за временем изменения файлов и перечитывает изменённые.
+    """
+
+    def __init__(self, directory: Path = TEMPLATES_DIR, max_age: int = 60):
+        self.directory = directory
+        self.cache_control = f"public, max-age={max_age}"
+        self.pages: dict[str, StaticPage] = {}
+        self._watcher: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.served: dict[str, int] = {"not_modified": 0}
+
+    def load(self):
+        for path in sorted(self.directory.glob("*.html")):
+            self.pages[path.name] = StaticPage.load(path)
+        logger.info(f"Loaded {len(self.pages)} static pages, encodings: {', '.join(self.encodings())}")
+
+    def encodings(self) -> list[str]:
+        return sorted({encoding for page in self.pages.values() for encoding in page.variants})
+
+    def response(self, name: str, headers: Mapping[str, str]) -> Response:
+        page = self.pages[name]
+        encoding = choose_encoding(headers.get("accept-encoding"), page.variants)
+
+        response_headers = {
+            "ETag": page.etags[encoding],
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+
+        if is_not_modified(headers, page.etags[encoding], None):
+            self.served["not_modified"] += 1
+            return not_modified_response(response_headers)
+
+        self.served[encoding] = self.served.get(encoding, 0) + 1
+        return Response(
+            content=page.variants[encoding],
+            status_code=HTTP_200_OK,
+            media_type=MediaType.HTML,
+            headers=response_headers,
+        )
+
+    def start_watching(self, interval: float):
+        self._watcher = asyncio.create_task(self._watch(interval))
+
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_changed)
+            except Exception as e:
+                logger.error(f"Failed to reload static pages: {e}", exc_info=True)
+
+    def reload_changed(self) -> list[str]:
+        """Перечитывает страницы, изменённые или добавленные после загрузки"""
+        changed = []
+        for path in self.directory.glob("*.html"):
+            page = self.pages.get(path.name)
+            if page is None or path.stat().st_mtime != page.mtime:
+                self.pages[path.name] = StaticPage.load(path)
+                changed.append(path.name)
+        if changed:
+            self.reloads += len(changed)
+            logger.info(f"Reloaded static pages: {', '.join(sorted(changed))}")
+        return changed
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    def stats(self) -> dict:
+        return {
+            "pages": len(self.pages),
+            "reloads": self.reloads,
+            **{f"served_{key}": value for key, value in self.served.items()},
+        }
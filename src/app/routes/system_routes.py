@@ -1,22 +1,52 @@
 import logging
-from pathlib import Path
 
-from litestar import Controller, get, MediaType
+from litestar import Controller, Request, Response, get
+from litestar.datastructures import State
+from litestar.status_codes import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from src.app.db import pool_stats
+from src.app.logging_config import logging_stats
 
 logger = logging.getLogger("app")
 
 
 class SystemController(Controller):
-    @get("/", media_type=MediaType.HTML, include_in_schema=False)
-    async def index(self) -> str:
+    @get("/", include_in_schema=False)
+    async def index(self, request: Request, state: State) -> Response:
         """Главная страница с приветственной документацией"""
-        logger.debug("Accessing index page")
-        template_path = Path(__file__).parent.parent / "templates" / "index.html"
-
-        try:
-            html_content = template_path.read_text(encoding="utf-8")
-            logger.debug("Index page loaded successfully")
-            return html_content
-        except Exception as e:
-            logger.error(f"Failed to load index page: {e}", exc_info=True)
-            raise Exception("Failed to load the index page")
+        return state.static_pages.response("index.html", request.headers)
+
+    @get("/healthz", include_in_schema=False)
+    async def healthz(self) -> dict:
+        """Liveness: процесс обслуживает HTTP; внешние зависимости не проверяются"""
+        return {"status": "ok"}
+
+    @get("/readyz", include_in_schema=False)
+    async def readyz(self, state: State) -> Response:
+        """Readiness: схема проверена, пул БД и каналы брокера прогреты, остановка не началась"""
+        readiness = getattr(state, "readiness", None)
+        if readiness is None:
+            # Старт ещё не дошёл до создания Readiness
+            return Response(content={"status": "starting"}, status_code=HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(
+            content=readiness.stats(),
+            status_code=HTTP_200_OK if readiness.is_ready else HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    @get("/system/stats", include_in_schema=False)
+    async def stats(self, state: State) -> dict:
+        """Внутренние метрики процесса"""
+        return {
+            "rabbitmq": state.rabbitmq.stats(),
+            "hashing": state.hasher.stats(),
+            "user_cache": state.user_cache.stats() if state.user_cache else None,
+            "single_flight": state.single_flight.stats(),
+            "task_events": state.task_dispatcher.stats() if state.task_dispatcher else None,
+            "rpc": state.rpc.stats() if state.rpc else None,
+            "outbox": state.outbox_relay.stats(),
+            "task_retention": state.task_retention.stats() if state.task_retention else None,
+            "readiness": state.readiness.stats() if getattr(state, "readiness", None) else None,
+            "static": state.static_pages.stats(),
+            "logging": logging_stats(),
+            "db_pool": pool_stats(),
+        }
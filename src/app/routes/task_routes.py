@@ -1,26 +1,104 @@
-import json
-from pathlib import Path
-from litestar import Controller, get, Response, MediaType
+from typing import AsyncIterator
+
+from litestar import Controller, Request, get, Response
+from litestar.datastructures import State
+from litestar.params import Parameter
+from litestar.response import ServerSentEvent, ServerSentEventMessage
 from litestar.status_codes import HTTP_200_OK, HTTP_404_NOT_FOUND
 
+from src.app.db import SessionLocal
+from src.app.models.task_result import TaskResult
 from src.app.repositories.task_repository import SQLAlchemyTaskResultRepository
+from src.app.routes.metrics_routes import metrics_middleware
+from src.app.services.codec import json_encode
+from src.app.services.task_events import TERMINAL_STATUSES
+
+MAX_WAIT_SECONDS = 30
+
+
+def task_status(status: str, result=None, error: str | None = None) -> dict:
+    data = {"status": status}
+    if result is not None:
+        data["result"] = result
+    if error:
+        data["error"] = error
+    return data
+
+
+def task_to_dict(task: TaskResult) -> dict:
+    return task_status(task.status, task.result, task.error)
+
+
+def event_to_dict(event: dict) -> dict:
+    return task_status(event["status"], event.get("result"), event.get("error"))
 
 
 class TaskController(Controller):
-    @get("/tasks", media_type=MediaType.HTML, include_in_schema=False)
-    async def task_page(self) -> str:
-        template_path = Path(__file__).parent.parent / "templates" / "tasks.html"
-        return template_path.read_text(encoding="utf-8")
+    middleware = [metrics_middleware]
+
+    @get("/tasks", include_in_schema=False)
+    async def task_page(self, request: Request, state: State) -> Response:
+        return state.static_pages.response("tasks.html", request.headers)
 
     @get("/tasks/{task_id:str}")
-    async def get_task(self, task_id: str, task_repo: SQLAlchemyTaskResultRepository) -> Response:
-        task = await task_repo.get(task_id)
-        if not task:
-            return Response(content={"status": "not_found"}, status_code=HTTP_404_NOT_FOUND)
-
-        data = {"status": task.status}
-        if task.result is not None:
-            data["result"] = task.result
-        if task.error:
-            data["error"] = task.error
-        return Response(content=data, status_code=HTTP_200_OK)
+    async def get_task(
+        self,
+        task_id: str,
+        task_repo: SQLAlchemyTaskResultRepository,
+        state: State,
+        wait: float = Parameter(default=0, ge=0, le=MAX_WAIT_SECONDS, description="Long-poll, секунд"),
+    ) -> Response:
+        dispatcher = state.task_dispatcher
+        if not wait or dispatcher is None:
+            task = await task_repo.get(task_id)
+            if not task:
+                return Response(content={"status": "not_found"}, status_code=HTTP_404_NOT_FOUND)
+            return Response(content=task_to_dict(task), status_code=HTTP_200_OK)
+
+        # Подписываемся до чтения из БД, чтобы не пропустить событие завершения
+        future = dispatcher.subscribe(task_id)
+        try:
+            # Чтение должно начаться после подписки, поэтому без объединения с уже идущими
+            task = await task_repo.get(task_id, shared=False)
+            if not task:
+                return Response(content={"status": "not_found"}, status_code=HTTP_404_NOT_FOUND)
+            if task.status in TERMINAL_STATUSES:
+                return Response(content=task_to_dict(task), status_code=HTTP_200_OK)
+
+            event = await dispatcher.wait(future, wait)
+            data = event_to_dict(event) if event else task_to_dict(task)
+            return Response(content=data, status_code=HTTP_200_OK)
+        finally:
+            dispatcher.unsubscribe(task_id, future)
+
+    @get("/tasks/{task_id:str}/events")
+    async def task_events(
+        self,
+        task_id: str,
+        state: State,
+        timeout: float = Parameter(default=MAX_WAIT_SECONDS, gt=0, le=300),
+    ) -> ServerSentEvent:
+        """SSE-поток: текущий статус задачи и событие о её завершении"""
+        dispatcher = state.task_dispatcher
+
+        async def generate() -> AsyncIterator[ServerSentEventMessage]:
+            # Подписка внутри генератора: если клиент ушёл до начала потока, ожидание не остаётся
+            future = dispatcher.subscribe(task_id) if dispatcher else None
+            try:
+                # Сессия открывается только на чтение статуса, а не на всё время ожидания
+                async with SessionLocal() as session:
+                    task = await SQLAlchemyTaskResultRepository(session).get(task_id)
+                if not task:
+                    yield ServerSentEventMessage(data=json_encode({"status": "not_found"}), event="status")
+                    return
+                yield ServerSentEventMessage(data=json_encode(task_to_dict(task)), event="status")
+                if future is None or task.status in TERMINAL_STATUSES:
+                    return
+                event = await dispatcher.wait(future, timeout)
+                if event:
+                    yield ServerSentEventMessage(data=json_encode(event_to_dict(event)), event="status")
+            finally:
+                if future is not None:
+                    dispatcher.unsubscribe(task_id, future)
+
+        return ServerSentEvent(generate())
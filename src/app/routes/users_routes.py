@@ -1,50 +1,279 @@
 import logging
+from datetime import datetime
+from typing import AsyncIterator, Optional
 
-from litestar import Controller, get, post, patch, delete, Response
+from litestar import Controller, Request, get, post, patch, delete, Response
+from litestar.params import Parameter
+from litestar.response import Stream
 from litestar.status_codes import *
+from pydantic import ValidationError
+
+from src.app.db import SessionLocal
 
 from src.app.models.user import UserAction
 from src.app.repositories.base import UserRepository
+from src.app.routes.conditional import (
+    is_not_modified,
+    not_modified_response,
+    page_etag,
+    user_etag,
+    validator_headers,
+)
 from src.app.routes.handlers import handle_errors_and_logging, RabbitMQHandler
-from src.app.schemas.user import UserCreate, UserUpdate, UserOut
-from src.app.services.rabbitmq import RabbitMQService
-from src.app.repositories.task_repository import SQLAlchemyTaskResultRepository
+from src.app.routes.metrics_routes import metrics_middleware
+from src.app.repositories.user_repository import SQLAlchemyUserRepository
+from src.app.schemas.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    InvalidCursorError,
+    UserPage,
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_search_cursor,
+)
+from src.app.schemas.records import modified_at, user_record
+from src.app.schemas.search import SearchSort, UserSearchFilters, UserSearchPage
+from src.app.schemas.user import UserCreate, UserUpdate, UserBatchUpdate, UserBatchDelete
+from src.app.services.codec import json_decode, json_encode
+from src.app.services.hashing import PasswordHasher
+from src.app.services.rpc import RpcClient
+from src.app.services.task_events import TASK_ERROR_NOT_FOUND
+from src.app.settings import RPC_TIMEOUT, RPC_MAX_TIMEOUT, BATCH_MAX_ITEMS, DEBUG
 
 logger = logging.getLogger("app")
 
+SyncParam = Parameter(default=False, description="Дождаться выполнения задачи и вернуть результат")
+PreferHeader = Parameter(header="Prefer", default=None, description="wait=<секунды> включает синхронный режим")
+
+
+def sync_timeout(sync: bool, prefer: Optional[str]) -> float | None:
+    """Время ожидания ответа worker или None для обычного асинхронного режима"""
+    for preference in (prefer or "").split(","):
+        name, _, value = preference.strip().partition("=")
+        if name.lower() == "wait":
+            try:
+                return min(float(value), RPC_MAX_TIMEOUT) if value else RPC_TIMEOUT
+            except ValueError:
+                return RPC_TIMEOUT
+    return RPC_TIMEOUT if sync else None
+
+
+async def submit_user_action(
+    action: UserAction,
+    data: dict,
+    publisher: RabbitMQHandler,
+    rpc: Optional[RpcClient],
+    timeout: float | None,
+    success_status: int,
+) -> Response:
+    """Ставит задачу в очередь; в синхронном режиме отдаёт результат worker"""
+    if timeout is None or rpc is None:
+        result = await publisher.publish_task(queue_name="user_actions", action=action, data=data)
+        return Response(content=result, status_code=HTTP_202_ACCEPTED)
+
+    reply = await publisher.publish_task_and_wait(
+        queue_name="user_actions", action=action, data=data, rpc=rpc, timeout=timeout
+    )
+    if reply["status"] == "done":
+        content = reply.get("result") or {"status": "done", "task_id": reply["task_id"]}
+        return Response(content=content, status_code=success_status)
+    if reply["status"] == "failed":
+        error = reply.get("error") or "Task failed"
+        return Response(
+            content={"status": "error", "message": error, "task_id": reply["task_id"]},
+            status_code=HTTP_404_NOT_FOUND
+            if reply.get("code") == TASK_ERROR_NOT_FOUND
+            else HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    # Worker не успел ответить: клиент продолжит по task_id
+    return Response(content=reply, status_code=HTTP_202_ACCEPTED)
+
+
+class BatchTooLargeError(ValueError):
+    """В пакете больше BATCH_MAX_ITEMS элементов"""
+
+
+async def read_batch_items(request: Request) -> AsyncIterator:
+    """Читает элементы пакета из JSON-массива или NDJSON (построчно, по мере поступления)"""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" not in content_type and "jsonlines" not in content_type:
+        items = json_decode(await request.body())
+        if not isinstance(items, list):
+            raise ValueError("Batch body must be a JSON array")
+        for item in items:
+            yield item
+        return
+
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json_decode(line)
+    if buffer.strip():
+        yield json_decode(buffer)
+
+
+async def validate_batch(request: Request, schema: type) -> tuple[list, list]:
+    """Валидирует элементы пакета; возвращает (валидные модели, ошибки по индексам)"""
+    valid, errors = [], []
+    index = 0
+    async for item in read_batch_items(request):
+        if index >= BATCH_MAX_ITEMS:
+            raise BatchTooLargeError(f"Batch is limited to {BATCH_MAX_ITEMS} items")
+        try:
+            valid.append(schema.model_validate(item))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors(include_url=False, include_context=False, include_input=False)})
+        index += 1
+    return valid, errors
+
+
+def batch_error(message: str, details: list | None = None) -> Response:
+    content = {"status": "error", "message": message}
+    if details:
+        content["details"] = details
+    return Response(content=content, status_code=HTTP_400_BAD_REQUEST)
+
 
 class UserController(Controller):
+    middleware = [metrics_middleware]
+
     @post("/users")
     @handle_errors_and_logging(logger)
     async def create_user(
-        self, data: UserCreate, rabbitmq: RabbitMQService, task_repo: SQLAlchemyTaskResultRepository
+        self,
+        data: UserCreate,
+        publisher: RabbitMQHandler,
+        hasher: PasswordHasher,
+        rpc: Optional[RpcClient],
+        sync: bool = SyncParam,
+        prefer: Optional[str] = PreferHeader,
     ) -> Response:
         """Создает нового пользователя через очередь задач"""
         user_data = data.dict()
-        result = await RabbitMQHandler(rabbitmq, task_repo).publish_task(
-            queue_name="user_actions",
-            action=UserAction.CREATE,
-            data=user_data,
+        user_data["password"] = await hasher.hash(data.password)
+        return await submit_user_action(
+            UserAction.CREATE, user_data, publisher, rpc,
+            timeout=sync_timeout(sync, prefer),
+            success_status=HTTP_201_CREATED,
         )
-        return Response(content=result, status_code=HTTP_202_ACCEPTED)
 
     @get("/users")
     @handle_errors_and_logging(logger)
-    async def get_all_users(self, user_repo: UserRepository) -> Response:
-        """Получает список всех пользователей"""
-        users = await user_repo.get_all()
+    async def get_all_users(
+        self,
+        request: Request,
+        user_repo: UserRepository,
+        limit: int = Parameter(default=DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+        after: Optional[str] = Parameter(default=None, description="Курсор следующей страницы"),
+    ) -> Response:
+        """Получает страницу пользователей (keyset-пагинация по id).
 
-        data = [UserOut.model_validate(u) for u in users]
-        return Response(content=data, status_code=HTTP_200_OK)
+        Слабый ETag страницы считается агрегатом до чтения строк, поэтому
+        на совпавший If-None-Match отдаётся 304 без выборки и сериализации.
+        """
+        try:
+            after_id = decode_cursor(after) if after else None
+        except InvalidCursorError as e:
+            return Response(
+                content={"status": "error", "message": str(e)},
+                status_code=HTTP_400_BAD_REQUEST,
+            )
+
+        count, max_id, modified = await user_repo.get_page_version(limit=limit, after_id=after_id)
+        headers = validator_headers(page_etag(count, max_id, modified), modified)
+        if is_not_modified(request.headers, headers["ETag"], modified):
+            return not_modified_response(headers)
+
+        users = [user_record(u) for u in await user_repo.get_page(limit=limit, after_id=after_id)]
+
+        next_cursor = encode_cursor(users[-1].id) if len(users) == limit else None
+        page = UserPage(data=users, next_cursor=next_cursor)
+        return Response(content=page, status_code=HTTP_200_OK, headers=headers)
+
+    @get("/users/search")
+    @handle_errors_and_logging(logger)
+    async def search_users(
+        self,
+        user_repo: UserRepository,
+        name: Optional[str] = Parameter(default=None, min_length=1, description="Имя, точное совпадение"),
+        surname: Optional[str] = Parameter(default=None, min_length=1, description="Фамилия, точное совпадение"),
+        name_prefix: Optional[str] = Parameter(default=None, min_length=1, description="Начало имени, без учёта регистра"),
+        surname_prefix: Optional[str] = Parameter(default=None, min_length=1, description="Начало фамилии, без учёта регистра"),
+        q: Optional[str] = Parameter(default=None, min_length=1, description="Полнотекстовый поиск по имени и фамилии"),
+        created_from: Optional[datetime] = Parameter(default=None, description="created_at >= created_from"),
+        created_to: Optional[datetime] = Parameter(default=None, description="created_at < created_to"),
+        sort: SearchSort = Parameter(default="id", description="id, -id, created_at или -created_at"),
+        limit: int = Parameter(default=DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+        after: Optional[str] = Parameter(default=None, description="Курсор следующей страницы"),
+        explain: bool = Parameter(default=False, description="План запроса (только при DEBUG)"),
+    ) -> Response:
+        """Поиск пользователей по фильтрам с сортировкой и keyset-пагинацией"""
+        try:
+            after_id, after_created_at = decode_search_cursor(after, sort) if after else (None, None)
+        except InvalidCursorError as e:
+            return Response(
+                content={"status": "error", "message": str(e)},
+                status_code=HTTP_400_BAD_REQUEST,
+            )
+
+        filters = UserSearchFilters(
+            name=name,
+            surname=surname,
+            name_prefix=name_prefix,
+            surname_prefix=surname_prefix,
+            query=q,
+            created_from=created_from,
+            created_to=created_to,
+            sort=sort,
+            after_id=after_id,
+            after_created_at=after_created_at,
+        )
+        users = await user_repo.search(filters, limit)
+
+        next_cursor = None
+        if len(users) == limit:
+            last = users[-1]
+            next_cursor = encode_search_cursor(
+                sort, last.id, last.created_at if sort.lstrip("-") == "created_at" else None
+            )
+        page = UserSearchPage(data=[user_record(u) for u in users], next_cursor=next_cursor)
+        if explain and DEBUG:
+            page.plan = await user_repo.explain_search(filters, limit)
+        return Response(content=page, status_code=HTTP_200_OK)
+
+    @get("/users/export", media_type="application/x-ndjson")
+    async def export_users(self) -> Stream:
+        """Выгружает всех пользователей в формате NDJSON с постоянным расходом памяти"""
+
+        async def generate() -> AsyncIterator[bytes]:
+            # Сессия живёт, пока отдаётся ответ, поэтому открываем её здесь, а не через DI
+            async with SessionLocal() as session:
+                async for user in SQLAlchemyUserRepository(session).stream_all():
+                    yield json_encode(user_record(user)) + b"\n"
+
+        return Stream(generate(), media_type="application/x-ndjson")
 
     @get("/users/{user_id:int}")
     @handle_errors_and_logging(logger)
-    async def get_user_by_id(self, user_id: int, user_repo: UserRepository) -> Response:
-        """Получает определенного пользователя"""
+    async def get_user_by_id(self, request: Request, user_id: int, user_repo: UserRepository) -> Response:
+        """Получает определенного пользователя (поддерживает If-None-Match и If-Modified-Since)"""
         user = await user_repo.get_by_id(user_id)
+        if user is None:
+            return Response(
+                content={"status": "error", "message": f"User with ID {user_id} not found"},
+                status_code=HTTP_404_NOT_FOUND,
+            )
 
-        data = UserOut.model_validate(user)
-        return Response(content=data, status_code=HTTP_200_OK)
+        modified = modified_at(user)
+        headers = validator_headers(user_etag(user_id, modified), modified)
+        if is_not_modified(request.headers, headers["ETag"], modified):
+            return not_modified_response(headers)
+
+        return Response(content=user_record(user), status_code=HTTP_200_OK, headers=headers)
 
     @patch("/users/{user_id:int}")
     @handle_errors_and_logging(logger)
@@ -52,34 +281,108 @@ class UserController(Controller):
         self,
         user_id: int,
         data: UserUpdate,
-        rabbitmq: RabbitMQService,
-        task_repo: SQLAlchemyTaskResultRepository,
+        publisher: RabbitMQHandler,
+        hasher: PasswordHasher,
+        rpc: Optional[RpcClient],
+        sync: bool = SyncParam,
+        prefer: Optional[str] = PreferHeader,
     ) -> Response:
         """Обновляет информацию о пользователе"""
         user_data = data.dict(exclude_unset=True)
+        if data.password is not None:
+            user_data["password"] = await hasher.hash(data.password)
         user_data["user_id"] = user_id
 
-        result = await RabbitMQHandler(rabbitmq, task_repo).publish_task(
-            queue_name="user_actions",
-            action=UserAction.UPDATE,
-            data=user_data,
+        return await submit_user_action(
+            UserAction.UPDATE, user_data, publisher, rpc,
+            timeout=sync_timeout(sync, prefer),
+            success_status=HTTP_200_OK,
         )
-        return Response(content=result, status_code=HTTP_202_ACCEPTED)
 
     @delete("/users/{user_id:int}", status_code=HTTP_200_OK)
     @handle_errors_and_logging(logger)
     async def delete_user(
         self,
         user_id: int,
-        rabbitmq: RabbitMQService,
-        task_repo: SQLAlchemyTaskResultRepository,
+        publisher: RabbitMQHandler,
+        rpc: Optional[RpcClient],
+        sync: bool = SyncParam,
+        prefer: Optional[str] = PreferHeader,
     ) -> Response:
         """Удаляет пользователя"""
 
-        result = await RabbitMQHandler(rabbitmq, task_repo).publish_task(
+        return await submit_user_action(
+            UserAction.DELETE, dict(user_id=user_id), publisher, rpc,
+            timeout=sync_timeout(sync, prefer),
+            success_status=HTTP_200_OK,
+        )
+
+    @post("/users:batch")
+    @handle_errors_and_logging(logger)
+    async def create_users_batch(
+        self,
+        request: Request,
+        publisher: RabbitMQHandler,
+    ) -> Response:
+        """Пакетное создание пользователей из JSON-массива или NDJSON одной задачей.
+
+        Пароли хеширует worker, поэтому время ответа не зависит от размера пакета.
+        """
+        try:
+            users, errors = await validate_batch(request, UserCreate)
+        except ValueError as e:
+            return batch_error(str(e))
+        if errors:
+            return batch_error("Validation failed", errors)
+        if not users:
+            return batch_error("Batch is empty")
+
+        result = await publisher.publish_task(
             queue_name="user_actions",
-            action=UserAction.DELETE,
-            data=dict(user_id=user_id),
+            action=UserAction.BATCH_CREATE,
+            data={"items": [user.model_dump() for user in users]},
         )
+        return Response(content={**result, "total": len(users)}, status_code=HTTP_202_ACCEPTED)
 
-        return Response(content=result, status_code=HTTP_202_ACCEPTED)
+    @patch("/users:batch")
+    @handle_errors_and_logging(logger)
+    async def update_users_batch(
+        self,
+        request: Request,
+        publisher: RabbitMQHandler,
+    ) -> Response:
+        """Пакетное обновление пользователей: элементы вида {"id": ..., поля UserUpdate}"""
+        try:
+            updates, errors = await validate_batch(request, UserBatchUpdate)
+        except ValueError as e:
+            return batch_error(str(e))
+        if errors:
+            return batch_error("Validation failed", errors)
+        if not updates:
+            return batch_error("Batch is empty")
+
+        result = await publisher.publish_task(
+            queue_name="user_actions",
+            action=UserAction.BATCH_UPDATE,
+            data={"items": [update.model_dump(exclude_unset=True) for update in updates]},
+        )
+        return Response(content={**result, "total": len(updates)}, status_code=HTTP_202_ACCEPTED)
+
+    @delete("/users:batch", status_code=HTTP_202_ACCEPTED)
+    @handle_errors_and_logging(logger)
+    async def delete_users_batch(
+        self,
+        data: UserBatchDelete,
+        publisher: RabbitMQHandler,
+    ) -> Response:
+        """Пакетное удаление пользователей по списку id"""
+        if len(data.ids) > BATCH_MAX_ITEMS:
+            return batch_error(f"Batch is limited to {BATCH_MAX_ITEMS} items")
+
+        user_ids = list(dict.fromkeys(data.ids))
+        result = await publisher.publish_task(
+            queue_name="user_actions",
+            action=UserAction.BATCH_DELETE,
+            data={"ids": user_ids},
+        )
+        return Response(content={**result, "total": len(user_ids)}, status_code=HTTP_202_ACCEPTED)
@@ -0,0 +1,55 @@
+import base64
+from datetime import datetime
+from typing import Optional
+
+import msgspec
+
+from src.app.schemas.records import UserRecord
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+
+class InvalidCursorError(ValueError):
+    """Курсор пагинации не удалось разобрать"""
+
+
+def encode_cursor(last_id: int) -> str:
+    """Кодирует id последней записи страницы в непрозрачный курсор"""
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Восстанавливает id последней записи из курсора"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, value = base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        if prefix != "id":
+            raise ValueError(prefix)
+        return int(value)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def encode_search_cursor(sort: str, last_id: int, created_at: Optional[datetime] = None) -> str:
+    """Курсор поиска: порядок сортировки и ключ последней записи (created_at, id)"""
+    value = created_at.isoformat() if created_at is not None else ""
+    return base64.urlsafe_b64encode(f"s:{sort}:{last_id}:{value}".encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str, sort: str) -> tuple[int, Optional[datetime]]:
+    """Ключ последней записи; курсор от другой сортировки считается ошибкой"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, cursor_sort, last_id, value = base64.urlsafe_b64decode(padded).decode().split(":", 3)
+        if prefix != "s" or cursor_sort != sort:
+            raise ValueError(cursor_sort)
+        return int(last_id), datetime.fromisoformat(value) if value else None
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+class UserPage(msgspec.Struct):
+    """Страница пользователей с курсором на следующую страницу"""
+    data: list[UserRecord]
+    next_cursor: Optional[str] = None
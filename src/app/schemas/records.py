@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Any
+
+import msgspec
+
+
+class UserRecord(msgspec.Struct):
+    """Пользователь в ответах API и результатах задач (поля UserOut).
+
+    Собирается из строки ORM или словаря кэша и кодируется msgspec
+    без промежуточной pydantic-модели.
+    """
+    id: int
+    name: str
+    surname: str
+
+
+def user_record(user: Any) -> UserRecord:
+    if isinstance(user, dict):
+        return UserRecord(id=user["id"], name=user["name"], surname=user["surname"])
+    return UserRecord(id=user.id, name=user.name, surname=user.surname)
+
+
+def user_dict(user: Any) -> dict:
+    """Поля UserOut строки ORM в виде словаря (кэш, результаты задач)"""
+    return {"id": user.id, "name": user.name, "surname": user.surname}
+
+
+def modified_at(user: Any) -> datetime | None:
+    """Время последнего изменения: updated_at, а для не менявшихся записей — created_at"""
+    if isinstance(user, dict):
+        return user.get("modified")
+    return user.updated_at or user.created_at
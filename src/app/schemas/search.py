@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Literal, Optional
+
+import msgspec
+
+from src.app.schemas.records import UserRecord
+
+SearchSort = Literal["id", "-id", "created_at", "-created_at"]
+
+
+@dataclass(frozen=True)
+class UserSearchFilters:
+    """Условия GET /users/search; незаданные поля не фильтруют"""
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    name_prefix: Optional[str] = None
+    surname_prefix: Optional[str] = None
+    query: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    sort: SearchSort = "id"
+    after_id: Optional[int] = None
+    after_created_at: Optional[datetime] = None
+
+
+class UserSearchPage(msgspec.Struct, omit_defaults=True):
+    """Страница результатов поиска; plan — план запроса в режиме DEBUG"""
+    data: list[UserRecord]
+    next_cursor: Optional[str] = None
+    plan: Optional[list[Any]] = None
@@ -1,7 +1,6 @@
 import re
 from typing import Optional, Annotated
 
-from passlib.context import CryptContext
 from pydantic import BaseModel, ConfigDict, Field, field_validator, StringConstraints
 
 EXAMPLE_NAME_SURNAME_PASSWORD = {
@@ -20,9 +19,6 @@ EXAMPLE_ID_NAME_SURNAME = {
     }
 }
 
-# Конфигурация для хеширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Общие ограничения для строк
 NameStr = Annotated[
     str,
@@ -46,7 +42,7 @@ class UserCreate(BaseModel):
     @field_validator('password')
     @classmethod
     def validate_password(cls, v: str) -> str:
-        """Валидация сложности пароля"""
+        """Валидация сложности пароля (хеширование выполняет PasswordHasher)"""
         errors = []
         if not re.search(r"[A-Z]", v):
             errors.append("at least one uppercase letter")
@@ -57,7 +53,7 @@ class UserCreate(BaseModel):
         if errors:
             raise ValueError(f"Password must contain: {', '.join(errors)}")
 
-        return pwd_context.hash(v)
+        return v
 
     model_config = ConfigDict(
         from_attributes=True,
@@ -95,6 +91,16 @@ class UserUpdate(BaseModel):
     )
 
 
+class UserBatchUpdate(UserUpdate):
+    """Элемент пакетного обновления пользователей"""
+    id: int
+
+
+class UserBatchDelete(BaseModel):
+    """Тело пакетного удаления пользователей"""
+    ids: list[int] = Field(..., min_length=1)
+
+
 class UserOut(BaseModel):
     """Модель для вывода данных пользователя (без чувствительных данных)"""
     id: int
@@ -0,0 +1,184 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from src.app.services.single_flight import SingleFlight
+
+logger = logging.getLogger("app")
+
+USER_INVALIDATION_EXCHANGE = "user_invalidations"
+
+
+class CacheBackend(ABC):
+    """Интерфейс общего (разделяемого между репликами) уровня кэша"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None: ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Локальная замена общего кэша для тестов и одиночного запуска"""
+
+    def __init__(self):
+        self._data: dict[str, tuple[float, Any]] = {}
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+
+class LRUCache:
+    """Внутрипроцессный LRU-кэш с TTL и счётчиками попаданий"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]):
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class UserCache:
+    """Двухуровневый read-through кэш пользователей и страниц списка.
+
+    Пользователи хранятся в локальном LRU и, если задан, в общем backend.
+    Страницы списка хранятся только локально с коротким TTL: их сбрасывает
+    любое изменение, которое приходит fanout-сообщением от worker.
+    Одновременные промахи по одному пользователю объединяются (flights) в
+    пределах поколения: загрузка, начатая до инвалидации, после неё не переиспользуется.
+    """
+
+    def __init__(
+        self,
+        local: LRUCache,
+        shared: Optional[CacheBackend] = None,
+        list_ttl: float = 5.0,
+        flights: Optional[SingleFlight] = None,
+    ):
+        self.local = local
+        self.shared = shared
+        self.list_ttl = list_ttl
+        self.flights = flights
+        # Счётчик инвалидаций: не кладём в кэш то, что прочитано до сброса
+        self.generation = 0
+        self.invalidations = 0
+        self.shared_hits = 0
+
+    @staticmethod
+    def user_key(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    async def get_user(self, user_id: int, loader: Callable[[], Awaitable[Any]]) -> Any | None:
+        key = self.user_key(user_id)
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        generation = self.generation
+        if self.shared is not None:
+            value = await self.shared.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                if generation == self.generation:
+                    self.local.set(key, value)
+                return value
+
+        if self.flights is not None:
+            value = await self.flights.do("users", (user_id, generation), loader)
+        else:
+            value = await loader()
+        if value is not None and generation == self.generation:
+            self.local.set(key, value)
+            if self.shared is not None:
+                await self.shared.set(key, value, self.local.ttl)
+        return value
+
+    async def get_list(self, key: tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        list_key = ("users",) + key
+        value = self.local.get(list_key)
+        if value is not None:
+            return value
+
+        generation = self.generation
+        value = await loader()
+        if generation == self.generation:
+            self.local.set(list_key, value, ttl=self.list_ttl)
+        return value
+
+    async def invalidate(self, user_ids: Iterable[int] = (), lists: bool = True):
+        """Сбрасывает записи пользователей и, при необходимости, все страницы списка"""
+        self.generation += 1
+        self.invalidations += 1
+        keys = [self.user_key(user_id) for user_id in user_ids]
+        for key in keys:
+            self.local.delete(key)
+        if lists:
+            self.local.delete_where(lambda k: isinstance(k, tuple) and k[0] == "users")
+        if self.shared is not None and keys:
+            await self.shared.delete(*keys)
+
+    async def handle_invalidation(self, message_data: dict):
+        """Обработчик fanout-сообщения об изменении пользователей"""
+        await self.invalidate(message_data.get("user_ids", []), message_data.get("lists", True))
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.local),
+            "max_size": self.local.max_size,
+            "hits": self.local.hits,
+            "misses": self.local.misses,
+            "shared_hits": self.shared_hits,
+            "evictions": self.local.evictions,
+            "invalidations": self.invalidations,
+        }
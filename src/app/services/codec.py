@@ -0,0 +1,49 @@
+from typing import Any, Optional
+
+import msgspec
+
+# Формат тела сообщения передаётся в AMQP content_type
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_MSGPACK = "application/msgpack"
+
+MESSAGE_FORMATS = {
+    "json": CONTENT_TYPE_JSON,
+    "msgpack": CONTENT_TYPE_MSGPACK,
+}
+
+_json_encoder = msgspec.json.Encoder()
+_json_decoder = msgspec.json.Decoder()
+_msgpack_encoder = msgspec.msgpack.Encoder()
+_msgpack_decoder = msgspec.msgpack.Decoder()
+
+
+def json_encode(data: Any) -> bytes:
+    return _json_encoder.encode(data)
+
+
+def json_decode(body: bytes | str) -> Any:
+    """Как json.loads: при ошибке разбора — ValueError"""
+    try:
+        return _json_decoder.decode(body)
+    except msgspec.DecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+
+
+def encode_message(data: Any, content_type: str = CONTENT_TYPE_JSON) -> bytes:
+    if content_type == CONTENT_TYPE_MSGPACK:
+        return _msgpack_encoder.encode(data)
+    return _json_encoder.encode(data)
+
+
+def decode_message(body: bytes, content_type: Optional[str] = None) -> Any:
+    """Декодирует тело по content_type; сообщения без него считаются JSON"""
+    if content_type == CONTENT_TYPE_MSGPACK:
+        return _msgpack_decoder.decode(body)
+    return _json_decoder.decode(body)
+
+
+def message_content_type(message_format: str) -> str:
+    try:
+        return MESSAGE_FORMATS[message_format]
+    except KeyError:
+        raise ValueError(f"Unknown message format: {message_format}") from None
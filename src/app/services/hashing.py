@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger("app")
+
+
+class HashingOverloadedError(Exception):
+    """Очередь на хеширование переполнена"""
+
+
+class PasswordHasher:
+    """Хеширование паролей bcrypt в отдельном пуле потоков с ограничением очереди"""
+
+    def __init__(self, rounds: int = 12, max_workers: int = 4, max_pending: int = 64):
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds
+        )
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+
+        # Метрики
+        self.pending = 0
+        self.hashed = 0
+        self.rejected = 0
+
+    async def hash(self, password: str) -> str:
+        """Хеширует пароль, не блокируя event loop"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingOverloadedError("Password hashing queue is full")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            hashed = await loop.run_in_executor(self.executor, self.pwd_context.hash, password)
+        finally:
+            self.pending -= 1
+
+        self.hashed += 1
+        return hashed
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Хеширует пачку паролей параллельно в пуле потоков"""
+        if self.pending + len(passwords) > self.max_pending:
+            self.rejected += len(passwords)
+            raise HashingOverloadedError("Password hashing queue is full")
+
+        self.pending += len(passwords)
+        try:
+            loop = asyncio.get_running_loop()
+            hashed = await asyncio.gather(
+                *(loop.run_in_executor(self.executor, self.pwd_context.hash, p) for p in passwords)
+            )
+        finally:
+            self.pending -= len(passwords)
+
+        self.hashed += len(passwords)
+        return list(hashed)
+
+    def is_hash(self, value: str) -> bool:
+        """Строка уже является bcrypt-хешем"""
+        return self.pwd_context.identify(value, required=False) is not None
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "hashed": self.hashed,
+            "rejected": self.rejected,
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
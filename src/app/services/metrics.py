@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("app")
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Границы корзин гистограмм задержек (секунды)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами; наблюдение — bisect и два сложения"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(buckets)
+        # labels -> [счётчики по корзинам (+Inf последней), сумма]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса в текстовом формате Prometheus.
+
+    Кроме счётчиков и гистограмм выводит числовые поля stats() сервисов
+    как gauge с префиксом userhub_<имя>_.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._stats: Dict[str, Callable[[], dict]] = {}
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, name: str, collect: Callable[[], dict]):
+        self._stats[name] = collect
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, collect in self._stats.items():
+            try:
+                stats = collect() or {}
+            except Exception as e:
+                logger.warning(f"Failed to collect {name} stats: {e}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"userhub_{name}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by handler and status", ("handler", "method", "status")
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("handler", "method")
+)
+db_query_latency = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("operation",)
+)
+db_commit_latency = registry.histogram(
+    "db_commit_duration_seconds", "Session commit time, including flush"
+)
+publish_latency = registry.histogram(
+    "rabbitmq_publish_duration_seconds", "Time to publish a message and get the broker confirm", ("kind",)
+)
+worker_latency = registry.histogram(
+    "worker_task_duration_seconds", "Time from receiving a task to acknowledging it", ("action",)
+)
+worker_tasks = registry.counter(
+    "worker_tasks_total", "Processed worker tasks by action and status", ("action", "status")
+)
+worker_coalesced = registry.counter(
+    "worker_coalesced_updates_total", "Updates merged into an earlier update or cancelled by a delete", ("kind",)
+)
+
+SQL_OPERATIONS = ("select", "insert", "update", "delete")
+
+
+def _sql_operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].lower()
+    return operation if operation in SQL_OPERATIONS else "other"
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    db_query_latency.observe(time.perf_counter() - context._metrics_start, _sql_operation(statement))
+
+
+def _before_commit(session):
+    session.info["metrics_commit_start"] = time.perf_counter()
+
+
+def _after_commit(session):
+    start = session.info.pop("metrics_commit_start", None)
+    if start is not None:
+        db_commit_latency.observe(time.perf_counter() - start)
+
+
+def instrument_sqlalchemy():
+    """Подписывает замеры запросов и коммитов на все движки и сессии процесса"""
+    if event.contains(Engine, "before_cursor_execute", _before_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_execute)
+    event.listen(Engine, "after_cursor_execute", _after_execute)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
+
+
+async def start_metrics_server(host: str, port: int) -> asyncio.AbstractServer:
+    """Минимальный HTTP-сервер для /metrics в процессах без веб-фреймворка (worker)"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = registry.render().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                + f"Content-Type: {CONTENT_TYPE}; charset=utf-8\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Metrics server listening on {host}:{port}")
+    return server
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.app.models.outbox import OutboxMessage
+from src.app.repositories.outbox_repository import SQLAlchemyOutboxRepository
+from src.app.services.transport import MessageTransport
+
+logger = logging.getLogger("app")
+
+
+class OutboxRelay:
+    """Фоновая пересылка сообщений из таблицы outbox в RabbitMQ.
+
+    Запрос записывает задачу и сообщение одной транзакцией и будит relay;
+    relay забирает пачку строк (FOR UPDATE SKIP LOCKED), публикует их с
+    подтверждением брокера и удаляет только подтверждённые. Relay-ы реплик
+    API делят очереди через advisory-блокировки (см. fetch_batch), поэтому
+    сообщения одной очереди публикуются по порядку.
+    """
+
+    def __init__(
+        self,
+        rabbitmq: MessageTransport,
+        session_factory: async_sessionmaker,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+    ):
+        self.rabbitmq = rabbitmq
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self.relayed = 0
+        self.failed = 0
+        self.batches = 0
+
+    def notify(self):
+        """Сообщает relay о новых сообщениях в outbox"""
+        self._wakeup.set()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                while await self.relay_batch() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox relay failed: {e}")
+
+    async def relay_batch(self) -> int:
+        """Публикует одну пачку сообщений; возвращает размер пачки"""
+        async with self.session_factory() as session:
+            repo = SQLAlchemyOutboxRepository(session)
+            messages = await repo.fetch_batch(self.batch_size)
+            if not messages:
+                return 0
+
+            # Очереди публикуются параллельно, сообщения одной очереди — по порядку id
+            by_queue: dict[str, list[OutboxMessage]] = {}
+            for message in messages:
+                by_queue.setdefault(message.routing_key, []).append(message)
+            results = await asyncio.gather(*(self._publish_in_order(group) for group in by_queue.values()))
+            published = [message_id for group in results for message_id in group]
+            failed = len(messages) - len(published)
+
+            await repo.delete(published)
+            await session.commit()
+
+        self.batches += 1
+        self.relayed += len(published)
+        self.failed += failed
+        if failed:
+            logger.warning(f"Outbox relay: {failed} of {len(messages)} messages were not confirmed")
+            # Неотправленные сообщения будут повторены по таймеру
+            return 0
+        return len(messages)
+
+    async def _publish_in_order(self, messages: list[OutboxMessage]) -> list[int]:
+        """Публикует сообщения одной очереди последовательно; после ошибки остальные ждут повтора"""
+        published = []
+        for message in messages:
+            try:
+                await self.rabbitmq.publish(
+                    queue_name=message.routing_key,
+                    message_data=message.payload,
+                    reply_to=message.reply_to,
+                    correlation_id=message.correlation_id,
+                )
+            except Exception as e:
+                logger.debug(f"Failed to publish outbox message {message.id}: {e}")
+                break
+            published.append(message.id)
+        return published
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.batch_size,
+            "relayed": self.relayed,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
@@ -1,49 +1,275 @@
-import json
+import asyncio
 import logging
-from typing import Optional
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Callable, Optional
 
 import aio_pika
+from aio_pika.pool import Pool
+
+from src.app.services.codec import decode_message, encode_message, message_content_type
+from src.app.services.metrics import publish_latency
+from src.app.services.transport import IncomingMessage, MessageCallback, MessageTransport
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("rabbitmq")
 
-class RabbitMQService:
-    def __init__(self, connection_string: str):
+
+class AmqpMessage(IncomingMessage):
+    """Входящее сообщение RabbitMQ; тело декодируется при первом обращении"""
+
+    def __init__(self, message: aio_pika.abc.AbstractIncomingMessage):
+        self.message = message
+        self.reply_to = message.reply_to
+        self.correlation_id = message.correlation_id
+        self._data = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = decode_message(self.message.body, self.message.content_type)
+        return self._data
+
+    async def ack(self):
+        await self.message.ack()
+
+    async def reject(self, requeue: bool = False):
+        await self.message.reject(requeue=requeue)
+
+
+class RabbitMQService(MessageTransport):
+    """Транспорт через RabbitMQ: одно соединение и пул каналов на весь процесс"""
+
+    def __init__(self, connection_string: str, pool_size: int = 10, message_format: str = "json"):
         self.connection_string = connection_string
+        self.pool_size = pool_size
+        # Формат исходящих сообщений; входящие декодируются по их content_type
+        self.content_type = message_content_type(message_format)
         self.connection: Optional[aio_pika.RobustConnection] = None
-        self.channel: Optional[aio_pika.RobustChannel] = None
+        self.channel_pool: Optional[Pool[aio_pika.abc.AbstractChannel]] = None
+        self._connect_lock = asyncio.Lock()
+        self._declared_exchanges: set[str] = set()
+        # Очередь и consumer tag для stop_consuming
+        self._consumers: dict[str, tuple[aio_pika.abc.AbstractQueue, str]] = {}
+
+        # Метрики пула
+        self.channels_created = 0
+        self.in_flight = 0
+        self.published = 0
+        self.failed = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed
+
+    async def _create_channel(self) -> aio_pika.abc.AbstractChannel:
+        channel = await self.connection.channel()
+        self.channels_created += 1
+        return channel
 
     async def connect(self):
-        """Устанавливаем соединение с RabbitMQ"""
-        self.connection = await aio_pika.connect_robust(self.connection_string)
-        self.channel = await self.connection.channel()
-        logger.info("Connected to RabbitMQ")
+        """Устанавливаем соединение с RabbitMQ и создаём пул каналов"""
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+            self.connection = await aio_pika.connect_robust(self.connection_string)
+            self.channel_pool = Pool(self._create_channel, max_size=self.pool_size)
+            self.channels_created = 0
+            self._declared_exchanges.clear()
+            logger.info(f"Connected to RabbitMQ (channel pool size: {self.pool_size})")
 
-    async def publish(self, queue_name: str, message_data: dict):
+    async def publish(
+        self,
+        queue_name: str,
+        message_data: dict,
+        reply_to: Optional[str] = None,
+        correlation_id: Optional[str] = None,
+        persistent: bool = True,
+    ):
         """Публикация сообщения в указанную очередь"""
-        if not self.connection or self.connection.is_closed:
+        await self._publish(
+            message_data,
+            routing_key=queue_name,
+            reply_to=reply_to,
+            correlation_id=correlation_id,
+            persistent=persistent,
+        )
+        logger.debug(f"Message published to {queue_name}")
+
+    async def publish_fanout(self, exchange_name: str, message_data: dict):
+        """Публикация события во fanout-exchange (доставляется всем подписчикам)"""
+        await self._publish(message_data, exchange_name=exchange_name, persistent=False)
+
+    async def _publish(
+        self,
+        message_data: dict,
+        routing_key: str = "",
+        exchange_name: Optional[str] = None,
+        persistent: bool = True,
+        reply_to: Optional[str] = None,
+        correlation_id: Optional[str] = None,
+    ):
+        if not self.is_connected:
             await self.connect()
 
         message = aio_pika.Message(
-            body=json.dumps(message_data).encode(),
-            delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+            body=encode_message(message_data, self.content_type),
+            content_type=self.content_type,
+            delivery_mode=(
+                aio_pika.DeliveryMode.PERSISTENT if persistent else aio_pika.DeliveryMode.NOT_PERSISTENT
+            ),
+            reply_to=reply_to,
+            correlation_id=correlation_id,
+        )
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            async with self.channel_pool.acquire() as channel:
+                if exchange_name is None:
+                    exchange = channel.default_exchange
+                else:
+                    exchange = await self._get_fanout_exchange(channel, exchange_name)
+                await exchange.publish(message, routing_key=routing_key)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.published += 1
+        publish_latency.observe(time.perf_counter() - start, "queue" if exchange_name is None else "fanout")
+
+    async def _get_fanout_exchange(self, channel, exchange_name: str):
+        # Объявляем exchange один раз на соединение, дальше обходимся без round trip
+        if exchange_name not in self._declared_exchanges:
+            exchange = await channel.declare_exchange(
+                exchange_name, aio_pika.ExchangeType.FANOUT, durable=True
+            )
+            self._declared_exchanges.add(exchange_name)
+            return exchange
+        return await channel.get_exchange(exchange_name, ensure=False)
+
+    async def subscribe_fanout(
+        self, exchange_name: str, callback: Callable[[dict], Awaitable[Any]]
+    ):
+        """Подписка процесса на fanout-exchange через эксклюзивную очередь"""
+        if not self.is_connected:
+            await self.connect()
+
+        channel = await self.connection.channel()
+        exchange = await channel.declare_exchange(
+            exchange_name, aio_pika.ExchangeType.FANOUT, durable=True
         )
+        queue = await channel.declare_queue(exclusive=True)
+        await queue.bind(exchange)
+        await self._consume(queue, callback)
+        logger.info(f"Subscribed to {exchange_name}")
+
+    async def consume_replies(self, callback: Callable[[dict], Awaitable[Any]]) -> str:
+        """Создаёт эксклюзивную очередь для RPC-ответов и возвращает её имя для reply_to"""
+        if not self.is_connected:
+            await self.connect()
+
+        channel = await self.connection.channel()
+        queue = await channel.declare_queue(exclusive=True)
+        await self._consume(queue, callback)
+        logger.info(f"Listening for replies on {queue.name}")
+        return queue.name
+
+    @staticmethod
+    def _queue_arguments(single_active_consumer: bool) -> Optional[dict]:
+        # При нескольких подписчиках брокер доставляет сообщения только одному, остальные ждут
+        # его отключения: порядок сохраняется и при перераспределении шардов между worker
+        return {"x-single-active-consumer": True} if single_active_consumer else None
+
+    async def declare_queue(self, queue_name: str, single_active_consumer: bool = False):
+        if not self.is_connected:
+            await self.connect()
+        async with self.channel_pool.acquire() as channel:
+            await channel.declare_queue(
+                queue_name, durable=True, arguments=self._queue_arguments(single_active_consumer)
+            )
+
+    async def queue_status(self, queue_name: str) -> Optional[dict]:
+        """Число сообщений и потребителей очереди; None, если очереди нет"""
+        if not self.is_connected:
+            await self.connect()
+        # Пассивное объявление несуществующей очереди закрывает канал, поэтому канал отдельный
+        channel = await self.connection.channel()
+        try:
+            queue = await channel.declare_queue(queue_name, passive=True)
+        except aio_pika.exceptions.ChannelNotFoundEntity:
+            return None
+        finally:
+            if not channel.is_closed:
+                await channel.close()
+        result = queue.declaration_result
+        return {"messages": result.message_count, "consumers": result.consumer_count}
+
+    async def consume(
+        self, queue_name: str, callback: MessageCallback, prefetch: int, single_active_consumer: bool = False
+    ):
+        """Потребление durable-очереди через отдельный канал с prefetch"""
+        if not self.is_connected:
+            await self.connect()
 
-        await self.channel.default_exchange.publish(
-            message,
-            routing_key=queue_name
+        channel = await self.connection.channel()
+        await channel.set_qos(prefetch_count=prefetch)
+        queue = await channel.declare_queue(
+            queue_name, durable=True, arguments=self._queue_arguments(single_active_consumer)
         )
-        logger.info(f"Message published to {queue_name}")
+
+        async def on_message(message: aio_pika.abc.AbstractIncomingMessage):
+            await callback(AmqpMessage(message))
+
+        self._consumers[queue_name] = (queue, await queue.consume(on_message))
+        logger.info(f"Consuming {queue_name} (prefetch: {prefetch})")
+
+    async def stop_consuming(self, queue_name: str):
+        """Отменяет consumer; канал остаётся открытым, чтобы подтвердить полученное"""
+        consumer = self._consumers.pop(queue_name, None)
+        if consumer is None:
+            return
+        queue, consumer_tag = consumer
+        await queue.cancel(consumer_tag)
+        logger.info(f"Stopped consuming {queue_name}")
+
+    async def warm_up(self, channels: int) -> int:
+        """Открывает каналы пула до первых публикаций, удерживая их одновременно"""
+        if not self.is_connected:
+            await self.connect()
+        async with AsyncExitStack() as stack:
+            for _ in range(min(channels, self.pool_size)):
+                await stack.enter_async_context(self.channel_pool.acquire())
+        return self.channels_created
+
+    @staticmethod
+    async def _consume(queue: aio_pika.abc.AbstractQueue, callback: Callable[[dict], Awaitable[Any]]):
+        async def on_message(message: aio_pika.abc.AbstractIncomingMessage):
+            try:
+                await callback(decode_message(message.body, message.content_type))
+            except Exception as e:
+                logger.error(f"Failed to handle message from {queue.name}: {e}", exc_info=True)
+
+        await queue.consume(on_message, no_ack=True)
+
+    def stats(self) -> dict:
+        """Метрики пула каналов"""
+        return {
+            "transport": "amqp",
+            "connected": self.is_connected,
+            "pool_size": self.pool_size,
+            "channels_open": self.channels_created,
+            "in_flight": self.in_flight,
+            "published": self.published,
+            "failed": self.failed,
+        }
 
     async def close(self):
-        """Закрытие соединения"""
-        if self.connection and not self.connection.is_closed:
+        """Закрытие пула каналов и соединения"""
+        if self.channel_pool and not self.channel_pool.is_closed:
+            await self.channel_pool.close()
+        if self.is_connected:
             await self.connection.close()
             logger.info("Connection closed")
-
-    async def __aenter__(self):
-        await self.connect()
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
\ No newline at end of file
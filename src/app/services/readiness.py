@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.app.models.user import Base
+from src.app.models import outbox, task_result  # noqa: F401 — регистрируем таблицы в metadata
+from src.app.services.transport import MessageTransport
+
+logger = logging.getLogger("app")
+
+VERSIONS_DIR = Path(__file__).resolve().parents[3] / "alembic" / "versions"
+
+_REVISION = re.compile(r"^revision(?::[^=]+)?\s*=\s*['\"]([0-9a-zA-Z_]+)['\"]", re.MULTILINE)
+_DOWN_REVISION = re.compile(r"^down_revision(?::[^=]+)?\s*=\s*(.+)$", re.MULTILINE)
+
+
+class SchemaNotReady(Exception):
+    """Версия схемы в БД не совпадает с последней миграцией"""
+
+
+def migration_revisions(versions_dir: Path = VERSIONS_DIR) -> tuple[set[str], set[str]]:
+    """Все ревизии Alembic и те из них, что являются предками других, без импорта Alembic"""
+    revisions, parents = set(), set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = _REVISION.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down = _DOWN_REVISION.search(source)
+        if down is not None:
+            parents.update(re.findall(r"['\"]([0-9a-zA-Z_]+)['\"]", down.group(1)))
+    return revisions, parents
+
+
+def migration_heads(versions_dir: Path = VERSIONS_DIR) -> set[str]:
+    """Последние ревизии Alembic по файлам миграций"""
+    revisions, parents = migration_revisions(versions_dir)
+    return revisions - parents
+
+
+def schema_is_current(revisions: set[str], heads: set[str], known: set[str]) -> bool:
+    """Схема в БД не старше кода.
+
+    Ревизия, которой нет среди миграций кода, записана более новым релизом
+    (миграция при выкладке идёт раньше обновления подов), то есть происходит
+    от heads: старые поды при этом остаются готовыми. Известная коду ревизия,
+    не входящая в heads, — схема старее кода.
+    """
+    if not revisions:
+        return False
+    if heads <= revisions:
+        return True
+    return not revisions & known
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Экспоненциальная пауза с полным jitter: реплики не переподключаются одновременно"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _current_revisions(connection) -> set[str] | None:
+    if not inspect(connection).has_table("alembic_version"):
+        return None
+    return set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+
+async def wait_for_schema(
+    engine: AsyncEngine,
+    heads: set[str],
+    attempts: int = 8,
+    base: float = 0.2,
+    cap: float = 5,
+    create_tables: bool = True,
+    known: set[str] | None = None,
+) -> set[str] | None:
+    """Один запрос к alembic_version; при недоступной БД или старой схеме — повтор с паузой.
+
+    Возвращает текущие ревизии; None, если БД не под управлением Alembic
+    (тогда при create_tables создаются недостающие таблицы по моделям).
+    known — все ревизии миграций кода; без него требуются именно heads.
+    """
+    for attempt in range(attempts):
+        try:
+            async with engine.begin() as conn:
+                revisions = await conn.run_sync(_current_revisions)
+                if revisions is None:
+                    if not create_tables:
+                        raise SchemaNotReady("alembic_version table is missing")
+                    await conn.run_sync(Base.metadata.create_all)
+                    return None
+                if heads and not schema_is_current(revisions, heads, revisions if known is None else known):
+                    raise SchemaNotReady(f"schema revision {sorted(revisions)}, expected {sorted(heads)}")
+                return revisions
+        except (DBAPIError, OSError, SchemaNotReady) as e:
+            if attempt + 1 >= attempts:
+                raise RuntimeError(f"Database schema is not ready after {attempts} attempts: {e}") from e
+            delay = backoff_delay(attempt, base, cap)
+            logger.warning(f"Database is not ready ({e}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+async def warm_pool(engine: AsyncEngine, size: int) -> int:
+    """Открывает size соединений одновременно и возвращает их в пул"""
+    async with AsyncExitStack() as stack:
+        for _ in range(size):
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.exec_driver_sql("SELECT 1")
+    return size
+
+
+class Readiness:
+    """Готовность процесса принимать трафик (/readyz).
+
+    После старта сервисов в фоне прогревает пул БД и каналы брокера;
+    до окончания прогрева и после начала остановки процесс не готов.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        db_connections: int = 10,
+        channels: int = 10,
+        timeout: float = 10,
+    ):
+        self.engine = engine
+        self.transport: MessageTransport | None = None
+        self.db_connections = db_connections
+        self.channels = channels
+        self.timeout = timeout
+        self.status = "starting"
+        self.schema_revision: str | None = None
+        # Отсчёт от начала старта приложения, включая проверку схемы
+        self._created = time.perf_counter()
+        self._task: asyncio.Task | None = None
+
+        self.ready_after: float | None = None
+        self.db_connections_warmed = 0
+        self.channels_warmed = 0
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status == "ready"
+
+    async def start(self, transport: MessageTransport):
+        self.transport = transport
+        self._task = asyncio.create_task(self._warm_up())
+
+    async def stop(self):
+        self.status = "stopping"
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _warm_up(self):
+        db, channels = await asyncio.gather(
+            asyncio.wait_for(warm_pool(self.engine, self.db_connections), self.timeout),
+            asyncio.wait_for(self.transport.warm_up(self.channels), self.timeout),
+            return_exceptions=True,
+        )
+        # Прогрев ускоряет первые запросы, но не обязателен: ошибки только в лог
+        if isinstance(db, BaseException):
+            logger.warning(f"DB pool warm-up failed: {db!r}")
+        else:
+            self.db_connections_warmed = db
+        if isinstance(channels, BaseException):
+            logger.warning(f"Broker channels warm-up failed: {channels!r}")
+        else:
+            self.channels_warmed = channels
+
+        if self.status == "starting":
+            self.status = "ready"
+            self.ready_after = time.perf_counter() - self._created
+            logger.info(f"Ready to serve traffic in {self.ready_after:.3f}s")
+
+    def stats(self) -> dict:
+        return {
+            "status": self.status,
+            "ready": int(self.is_ready),
+            "schema_revision": self.schema_revision,
+            "ready_after_sec": round(self.ready_after, 3) if self.ready_after is not None else None,
+            "db_connections_warmed": self.db_connections_warmed,
+            "channels_warmed": self.channels_warmed,
+        }
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import column, delete, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.models.task_result import TaskResult
+
+logger = logging.getLogger("app")
+
+TASK_RESULTS_TABLE = "task_results"
+# Ключ pg_try_advisory_xact_lock: обслуживание партиций выполняет одна реплика
+MAINTENANCE_LOCK_ID = 0x7461736B  # "task"
+# Пауза между пачками DELETE, чтобы не вытеснять рабочую нагрузку
+BATCH_PAUSE = 0.05
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def partition_name(day: date) -> str:
+    """Имя дневной партиции task_results (то же, что создаёт миграция)"""
+    return f"{TASK_RESULTS_TABLE}_p{day:%Y%m%d}"
+
+
+def partition_upper_bound(bound: str) -> datetime | None:
+    """Верхняя граница из pg_get_expr(relpartbound); None для DEFAULT и MAXVALUE"""
+    match = _UPPER_BOUND.search(bound)
+    if match is None:
+        return None
+    upper = datetime.fromisoformat(match.group(1))
+    return upper if upper.tzinfo else upper.replace(tzinfo=timezone.utc)
+
+
+class TaskResultRetention:
+    """Срок хранения task_results.
+
+    Если таблица партиционирована по created_at (PostgreSQL, см. миграцию
+    partition_task_results), заранее создаёт дневные партиции и удаляет
+    целиком те, что старше срока хранения; из DEFAULT-партиции старые строки
+    удаляются пачками. Без партиций удаляет старые строки небольшими пачками,
+    каждая в своей короткой транзакции. retention_days=0 — хранить всё:
+    партиции всё равно создаются заранее.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        retention_days: int = 7,
+        interval: float = 3600,
+        batch_size: int = 1000,
+        premake_days: int = 7,
+        lock_timeout_ms: int = 2000,
+    ):
+        self.session_factory = session_factory
+        self.retention = timedelta(days=retention_days) if retention_days > 0 else None
+        self.interval = interval
+        self.batch_size = batch_size
+        self.premake_days = premake_days
+        self.lock_timeout_ms = lock_timeout_ms
+        self._task: asyncio.Task | None = None
+
+        self.runs = 0
+        self.failed = 0
+        self.partitions_created = 0
+        self.partitions_dropped = 0
+        self.rows_deleted = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Task results retention failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, now: datetime | None = None):
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - self.retention if self.retention is not None else None
+        async with self.session_factory() as session:
+            partitioned = await self._is_partitioned(session)
+
+        if partitioned:
+            await self.maintain_partitions(now, cutoff)
+        elif cutoff is not None:
+            await self.purge_rows(cutoff)
+        self.runs += 1
+
+    async def _is_partitioned(self, session: AsyncSession) -> bool:
+        if session.get_bind().dialect.name != "postgresql":
+            return False
+        result = await session.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+            ),
+            {"table": TASK_RESULTS_TABLE},
+        )
+        return result.scalar() is not None
+
+    async def maintain_partitions(self, now: datetime, cutoff: datetime | None):
+        """Создаёт партиции на premake_days вперёд и удаляет устаревшие (если задан cutoff).
+
+        Каждая DDL-операция — отдельная транзакция с lock_timeout: если
+        блокировку таблицы не удалось быстро получить, операция повторится
+        на следующем запуске, не задерживая запросы к task_results.
+        """
+        today = now.astimezone(timezone.utc).date()
+        for offset in range(self.premake_days + 1):
+            day = today + timedelta(days=offset)
+            start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+            created = await self._ddl(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF {TASK_RESULTS_TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{(start + timedelta(days=1)).isoformat()}')",
+                check=f"SELECT to_regclass('{partition_name(day)}') IS NULL",
+            )
+            self.partitions_created += created
+
+        if cutoff is None:
+            return
+        for name, bound in await self._partitions():
+            if bound == "DEFAULT":
+                # Строки вне дневных диапазонов: партицию нельзя удалить целиком
+                await self.purge_rows(cutoff, name)
+                continue
+            upper = partition_upper_bound(bound)
+            # Партиция удаляется, только когда все её строки старше срока хранения
+            if upper is not None and upper <= cutoff:
+                dropped = await self._ddl(f"DROP TABLE IF EXISTS {name}")
+                if dropped:
+                    self.partitions_dropped += 1
+                    logger.info(f"Dropped task results partition {name}")
+
+    async def _partitions(self) -> list[tuple[str, str]]:
+        """Имена партиций и их границы (pg_get_expr(relpartbound))"""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                text(
+                    "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+                ),
+                {"table": TASK_RESULTS_TABLE},
+            )
+            return [(name, bound) for name, bound in result.all()]
+
+    async def _ddl(self, statement: str, check: str | None = None) -> bool:
+        """Выполняет DDL под advisory-блокировкой; False, если другая реплика уже занята этим"""
+        async with self.session_factory() as session:
+            locked = await session.execute(text(f"SELECT pg_try_advisory_xact_lock({MAINTENANCE_LOCK_ID})"))
+            if not locked.scalar():
+                return False
+            if check is not None and not (await session.execute(text(check))).scalar():
+                return False
+            await session.execute(text(f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"))
+            await session.execute(text(statement))
+            await session.commit()
+            return True
+
+    async def purge_rows(self, cutoff: datetime, table_name: str = TASK_RESULTS_TABLE) -> int:
+        """Удаляет строки старше cutoff из таблицы или её партиции пачками по batch_size"""
+        target = TaskResult.__table__
+        if table_name != TASK_RESULTS_TABLE:
+            target = table(table_name, column("id"), column("created_at"))
+        deleted = 0
+        while True:
+            async with self.session_factory() as session:
+                batch = (
+                    select(target.c.id)
+                    .where(target.c.created_at < cutoff)
+                    .limit(self.batch_size)
+                    .scalar_subquery()
+                )
+                result = await session.execute(
+                    delete(target).where(target.c.id.in_(batch)).execution_options(synchronize_session=False)
+                )
+                await session.commit()
+            deleted += result.rowcount
+            self.rows_deleted += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+            await asyncio.sleep(BATCH_PAUSE)
+        if deleted:
+            logger.info(f"Purged {deleted} rows of {table_name} older than {cutoff.isoformat()}")
+        return deleted
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failed": self.failed,
+            "partitions_created": self.partitions_created,
+            "partitions_dropped": self.partitions_dropped,
+            "rows_deleted": self.rows_deleted,
+        }
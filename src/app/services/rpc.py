@@ -0,0 +1,29 @@
+import logging
+from typing import Optional
+
+from src.app.services.task_events import TaskDispatcher
+from src.app.services.transport import MessageTransport
+
+logger = logging.getLogger("app")
+
+
+class RpcClient:
+    """Ожидание ответа worker на конкретную задачу через эксклюзивную callback-очередь.
+
+    Worker отправляет ответ в очередь из reply_to с correlation_id, равным task_id;
+    ответы раздаются ожидающим запросам тем же механизмом, что и события задач.
+    """
+
+    def __init__(self, rabbitmq: MessageTransport):
+        self.rabbitmq = rabbitmq
+        self.dispatcher = TaskDispatcher()
+        self.callback_queue: Optional[str] = None
+
+    async def start(self):
+        self.callback_queue = await self.rabbitmq.consume_replies(self.handle_reply)
+
+    async def handle_reply(self, message_data: dict):
+        await self.dispatcher.handle_event({"tasks": [message_data]})
+
+    def stats(self) -> dict:
+        return {"callback_queue": self.callback_queue, **self.dispatcher.stats()}
@@ -0,0 +1,85 @@
+import os
+import re
+import zlib
+from typing import Any, Optional
+
+from src.app.services.transport import USER_ACTIONS_QUEUE
+
+
+def shard_of(key: Any, shards: int) -> int:
+    """Номер шарда по ключу; crc32 одинаков во всех процессах, в отличие от hash()"""
+    return zlib.crc32(str(key).encode()) % shards
+
+
+def shard_queue(shard: int, base: str = USER_ACTIONS_QUEUE) -> str:
+    return f"{base}.{shard}"
+
+
+def is_shard_queue(queue_name: str, base: str = USER_ACTIONS_QUEUE) -> bool:
+    return re.fullmatch(rf"{re.escape(base)}\.\d+", queue_name) is not None
+
+
+def shard_queues(shards: int, base: str = USER_ACTIONS_QUEUE) -> list[str]:
+    """Все очереди задач; при shards <= 1 — одна общая очередь, как до шардирования"""
+    if shards <= 1:
+        return [base]
+    return [shard_queue(shard, base) for shard in range(shards)]
+
+
+def route_task(queue_name: str, shards: int, data: Optional[dict], task_id: str) -> str:
+    """Очередь для задачи: все операции одного пользователя попадают в один шард.
+
+    Создание и пакетные задачи не привязаны к одному пользователю
+    и распределяются по шардам по task_id.
+    """
+    if shards <= 1:
+        return queue_name
+    user_id = (data or {}).get("user_id")
+    return shard_queue(shard_of(user_id if user_id is not None else task_id, shards), queue_name)
+
+
+def assign_shards(index: int, replicas: int, shards: int) -> list[int]:
+    """Шарды реплики index из replicas: поровну, по остатку от деления"""
+    return [shard for shard in range(shards) if shard % replicas == index]
+
+
+def parse_shards(spec: str) -> list[int]:
+    """Разбирает список шардов вида "0-3,8,10" """
+    result = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        result.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(result))
+
+
+def replica_index(configured: str, hostname: Optional[str] = None) -> int:
+    """Номер реплики: явная настройка или порядковый номер пода StatefulSet (worker-2 → 2)"""
+    if configured:
+        return int(configured)
+    match = re.search(r"-(\d+)$", hostname if hostname is not None else os.getenv("HOSTNAME", ""))
+    return int(match.group(1)) if match else 0
+
+
+def worker_queues(shards: list[int], total: int) -> list[str]:
+    """Очереди, которые читает worker с данными шардами.
+
+    Владелец шарда 0 дочитывает и общую очередь, оставшуюся с работы без шардов.
+    """
+    if total <= 1:
+        return [USER_ACTIONS_QUEUE]
+    queues = [shard_queue(shard) for shard in shards]
+    if 0 in shards:
+        queues.append(USER_ACTIONS_QUEUE)
+    return queues
+
+
+def rebalance_plan(old_replicas: int, new_replicas: int, shards: int) -> list[tuple[int, int, int]]:
+    """Шарды, меняющие владельца при изменении числа реплик: (шард, было, стало)"""
+    return [
+        (shard, shard % old_replicas, shard % new_replicas)
+        for shard in range(shards)
+        if shard % old_replicas != shard % new_replicas
+    ]
@@ -0,0 +1,74 @@
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SINGLE_FLIGHT_SCOPES = ("users", "tasks")
+
+
+def parse_scope(spec: str) -> frozenset[str]:
+    """Разбирает SINGLE_FLIGHT_SCOPE вида "users,tasks"; all — все виды чтений"""
+    names = {name.strip().lower() for name in spec.split(",") if name.strip()}
+    if "all" in names:
+        return frozenset(SINGLE_FLIGHT_SCOPES)
+    unknown = names - set(SINGLE_FLIGHT_SCOPES)
+    if unknown:
+        raise ValueError(f"Unknown single-flight scope: {', '.join(sorted(unknown))}")
+    return frozenset(names)
+
+
+def flight_session(session: AsyncSession) -> AsyncSession:
+    """Своя короткая сессия загрузки на engine сессии запроса.
+
+    Загрузка не зависит от сессии первого вызвавшего: его отмена или закрытие
+    сессии не ломают ожидающих, а после выхода из сессии объекты отсоединены.
+    """
+    return AsyncSession(session.bind, expire_on_commit=False)
+
+
+class SingleFlight:
+    """Объединение одновременных одинаковых чтений внутри процесса.
+
+    Пока идёт загрузка по ключу, остальные вызовы с тем же ключом ждут её
+    результат, а не выполняют свой запрос к БД. Результат не кэшируется:
+    вызов после завершения загрузки снова идёт в БД. Ожидающие получают
+    тот же объект, поэтому он должен использоваться только для чтения;
+    загрузчик открывает свою сессию (flight_session), а не сессию запроса.
+    """
+
+    def __init__(self, scope: Iterable[str] = SINGLE_FLIGHT_SCOPES):
+        self.scope = frozenset(scope)
+        self._flights: dict[tuple[str, Hashable], asyncio.Future] = {}
+        self.loads: Counter[str] = Counter()
+        self.collapsed: Counter[str] = Counter()
+
+    async def do(self, kind: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if kind not in self.scope:
+            return await loader()
+
+        flight_key = (kind, key)
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            # Загрузка — отдельная задача: отмена первого запроса не прерывает её для остальных
+            flight = asyncio.ensure_future(loader())
+            self._flights[flight_key] = flight
+            flight.add_done_callback(lambda done: self._finish(flight_key, done))
+            self.loads[kind] += 1
+        else:
+            self.collapsed[kind] += 1
+        return await asyncio.shield(flight)
+
+    def _finish(self, flight_key: tuple[str, Hashable], flight: asyncio.Future):
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+        if not flight.cancelled():
+            # Ошибку получают ожидающие; если их не осталось, не пишем "never retrieved"
+            flight.exception()
+
+    def stats(self) -> dict:
+        stats = {"scope": ",".join(sorted(self.scope)), "in_flight": len(self._flights)}
+        for kind in SINGLE_FLIGHT_SCOPES:
+            stats[f"{kind}_loads"] = self.loads[kind]
+            stats[f"{kind}_collapsed"] = self.collapsed[kind]
+        return stats
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger("app")
+
+TASK_EVENTS_EXCHANGE = "task_events"
+
+TERMINAL_STATUSES = ("done", "failed")
+
+# Коды ошибок задач в ответе worker: по ним API выбирает HTTP-статус
+TASK_ERROR_NOT_FOUND = "not_found"
+TASK_ERROR_INVALID = "invalid"
+TASK_ERROR_FAILED = "failed"
+
+
+class TaskDispatcher:
+    """Раздаёт события о завершении задач ожидающим их запросам процесса.
+
+    Worker публикует пакет событий во fanout-exchange, каждая реплика API
+    получает его и будит только тех, кто ждёт конкретный task_id.
+    """
+
+    def __init__(self):
+        self._waiters: defaultdict[str, set[asyncio.Future]] = defaultdict(set)
+        self.delivered = 0
+        self.timeouts = 0
+
+    def subscribe(self, task_id: str) -> asyncio.Future:
+        """Регистрирует ожидание до чтения статуса из БД, чтобы не пропустить событие"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[task_id].add(future)
+        return future
+
+    def unsubscribe(self, task_id: str, future: asyncio.Future):
+        waiters = self._waiters.get(task_id)
+        if waiters is None:
+            return
+        waiters.discard(future)
+        if not waiters:
+            del self._waiters[task_id]
+
+    async def wait(self, future: asyncio.Future, timeout: float) -> dict | None:
+        """Ждёт событие не дольше timeout секунд; None при таймауте"""
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return None
+
+    async def handle_event(self, message_data: dict):
+        """Обработчик fanout-сообщения со статусами пакета задач"""
+        for event in message_data.get("tasks", []):
+            for future in self._waiters.pop(event["task_id"], ()):
+                if not future.done():
+                    future.set_result(event)
+                    self.delivered += 1
+
+    def stats(self) -> dict:
+        return {
+            "waiting_tasks": len(self._waiters),
+            "waiters": sum(len(w) for w in self._waiters.values()),
+            "delivered": self.delivered,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,29 @@
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+
+def new_task_id() -> str:
+    """UUIDv7: первые 48 бит — время создания в миллисекундах, остальное — случайное.
+
+    Время из id совпадает с task_results.created_at, поэтому поиск по id
+    попадает в одну партицию и не зависит от объёма истории.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    # Версия 7 и вариант RFC 4122
+    value = value & ~(0xF << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return str(uuid.UUID(int=value))
+
+
+def task_id_time(task_id: str) -> datetime | None:
+    """Время создания из UUIDv7; None для прочих id (задачи до перехода на UUIDv7)"""
+    try:
+        value = uuid.UUID(task_id)
+    except ValueError:
+        return None
+    if value.version != 7:
+        return None
+    millis = value.int >> 80
+    return datetime.fromtimestamp(millis // 1000, tz=timezone.utc) + timedelta(milliseconds=millis % 1000)
@@ -0,0 +1,282 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger("app")
+
+USER_ACTIONS_QUEUE = "user_actions"
+
+
+class IncomingMessage(ABC):
+    """Сообщение из очереди, которое обрабатывает worker"""
+
+    reply_to: Optional[str]
+    correlation_id: Optional[str]
+
+    @property
+    @abstractmethod
+    def data(self) -> dict:
+        """Тело сообщения"""
+
+    @abstractmethod
+    async def ack(self):
+        ...
+
+    @abstractmethod
+    async def reject(self, requeue: bool = False):
+        ...
+
+
+MessageCallback = Callable[[IncomingMessage], Awaitable[Any]]
+EventCallback = Callable[[dict], Awaitable[Any]]
+
+
+class MessageTransport(ABC):
+    """Транспорт сообщений между API и worker.
+
+    Очереди задач (publish/consume), fanout-события для всех реплик API
+    (publish_fanout/subscribe_fanout) и очередь RPC-ответов процесса.
+    """
+
+    @property
+    @abstractmethod
+    def is_connected(self) -> bool:
+        ...
+
+    @abstractmethod
+    async def connect(self):
+        ...
+
+    @abstractmethod
+    async def publish(
+        self,
+        queue_name: str,
+        message_data: dict,
+        reply_to: Optional[str] = None,
+        correlation_id: Optional[str] = None,
+        persistent: bool = True,
+    ):
+        ...
+
+    @abstractmethod
+    async def publish_fanout(self, exchange_name: str, message_data: dict):
+        ...
+
+    @abstractmethod
+    async def subscribe_fanout(self, exchange_name: str, callback: EventCallback):
+        ...
+
+    @abstractmethod
+    async def consume_replies(self, callback: EventCallback) -> str:
+        """Подписывает callback на ответы процессу; возвращает адрес для reply_to"""
+
+    @abstractmethod
+    async def declare_queue(self, queue_name: str, single_active_consumer: bool = False):
+        """Создаёт durable-очередь задач; single_active_consumer — одновременно читает один потребитель"""
+
+    @abstractmethod
+    async def consume(
+        self, queue_name: str, callback: MessageCallback, prefetch: int, single_active_consumer: bool = False
+    ):
+        """Доставляет сообщения очереди в callback; не больше prefetch без подтверждения"""
+
+    @abstractmethod
+    async def stop_consuming(self, queue_name: str):
+        """Прекращает доставку из очереди; полученные сообщения можно подтвердить"""
+
+    @abstractmethod
+    async def warm_up(self, channels: int) -> int:
+        """Заранее открывает до channels каналов публикации; возвращает число открытых"""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class InProcessMessage(IncomingMessage):
+    def __init__(
+        self,
+        queue: "InProcessQueue",
+        data: dict,
+        reply_to: Optional[str] = None,
+        correlation_id: Optional[str] = None,
+    ):
+        self.queue = queue
+        self._data = data
+        self.reply_to = reply_to
+        self.correlation_id = correlation_id
+
+    @property
+    def data(self) -> dict:
+        return self._data
+
+    async def ack(self):
+        self.queue.settle(acked=True)
+
+    async def reject(self, requeue: bool = False):
+        self.queue.settle(acked=False)
+        if requeue:
+            await self.queue.put(self)
+
+
+class InProcessQueue:
+    """Очередь процесса с ограничением неподтверждённых сообщений, как prefetch в AMQP"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._messages: asyncio.Queue = asyncio.Queue()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self.acked = 0
+        self.rejected = 0
+
+    @property
+    def depth(self) -> int:
+        return self._messages.qsize()
+
+    async def put(self, message: InProcessMessage):
+        await self._messages.put(message)
+
+    def settle(self, acked: bool):
+        if acked:
+            self.acked += 1
+        else:
+            self.rejected += 1
+        if self._slots is not None:
+            self._slots.release()
+
+    def consume(self, callback: MessageCallback, prefetch: int):
+        if self._consumer is not None:
+            raise RuntimeError(f"Queue {self.name} already has a consumer")
+        self._slots = asyncio.Semaphore(prefetch)
+        self._consumer = asyncio.create_task(self._deliver(callback))
+
+    async def _deliver(self, callback: MessageCallback):
+        while True:
+            await self._slots.acquire()
+            message = await self._messages.get()
+            try:
+                await callback(message)
+            except Exception as e:
+                logger.error(f"Failed to deliver message from {self.name}: {e}", exc_info=True)
+                self.settle(acked=False)
+
+    async def close(self):
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+            self._consumer = None
+
+
+class InProcessTransport(MessageTransport):
+    """Транспорт в памяти процесса для одноузлового режима и тестов.
+
+    Словари сообщений передаются получателю как есть, без сериализации
+    и сети; очереди не переживают перезапуск процесса.
+    """
+
+    def __init__(self):
+        self.queues: dict[str, InProcessQueue] = {}
+        self._fanout: defaultdict[str, list[EventCallback]] = defaultdict(list)
+        self._reply_queues = 0
+        self.published = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return True
+
+    async def connect(self):
+        pass
+
+    def queue(self, name: str) -> InProcessQueue:
+        if name not in self.queues:
+            self.queues[name] = InProcessQueue(name)
+        return self.queues[name]
+
+    async def publish(
+        self,
+        queue_name: str,
+        message_data: dict,
+        reply_to: Optional[str] = None,
+        correlation_id: Optional[str] = None,
+        persistent: bool = True,
+    ):
+        queue = self.queue(queue_name)
+        await queue.put(InProcessMessage(queue, message_data, reply_to, correlation_id))
+        self.published += 1
+
+    async def publish_fanout(self, exchange_name: str, message_data: dict):
+        for callback in self._fanout[exchange_name]:
+            try:
+                await callback(message_data)
+            except Exception as e:
+                logger.error(f"Failed to handle event from {exchange_name}: {e}", exc_info=True)
+        self.published += 1
+
+    async def subscribe_fanout(self, exchange_name: str, callback: EventCallback):
+        self._fanout[exchange_name].append(callback)
+
+    async def consume_replies(self, callback: EventCallback) -> str:
+        self._reply_queues += 1
+        name = f"inprocess.replies.{self._reply_queues}"
+
+        async def on_message(message: IncomingMessage):
+            await message.ack()
+            await callback(message.data)
+
+        await self.consume(name, on_message, prefetch=100)
+        return name
+
+    async def declare_queue(self, queue_name: str, single_active_consumer: bool = False):
+        self.queue(queue_name)
+
+    async def consume(
+        self, queue_name: str, callback: MessageCallback, prefetch: int, single_active_consumer: bool = False
+    ):
+        # У очереди в памяти всегда один потребитель
+        self.queue(queue_name).consume(callback, prefetch)
+
+    async def stop_consuming(self, queue_name: str):
+        await self.queue(queue_name).close()
+
+    async def warm_up(self, channels: int) -> int:
+        # Каналов нет: публикация — вызов в памяти
+        return 0
+
+    def stats(self) -> dict:
+        return {
+            "transport": "inprocess",
+            "connected": True,
+            "published": self.published,
+            "queued": sum(queue.depth for queue in self.queues.values()),
+        }
+
+    async def close(self):
+        for queue in self.queues.values():
+            await queue.close()
+
+
+def create_transport(kind: str, url: str, pool_size: int = 10, message_format: str = "json") -> MessageTransport:
+    """Транспорт по настройке MESSAGE_TRANSPORT: amqp или inprocess"""
+    if kind == "inprocess":
+        return InProcessTransport()
+    if kind == "amqp":
+        from src.app.services.rabbitmq import RabbitMQService
+        return RabbitMQService(url, pool_size=pool_size, message_format=message_format)
+    raise ValueError(f"Unknown message transport: {kind}")
@@ -0,0 +1,231 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.models.user import UserAction
+from src.app.schemas.records import user_dict
+from src.app.services.metrics import worker_coalesced
+from src.app.services.task_events import TASK_ERROR_FAILED, TASK_ERROR_INVALID, TASK_ERROR_NOT_FOUND
+from src.app.worker.worker_handlers import (
+    USER_FIELDS,
+    handle_create,
+    handle_update,
+    handle_delete,
+    handle_read,
+)
+
+logger = logging.getLogger("worker")
+
+
+@dataclass
+class WorkItem:
+    """Одна задача из очереди и результат её выполнения"""
+    task_id: str
+    action: str
+    payload: Dict[str, Any]
+    message: Any = None
+    status: str = "done"
+    result: Any = None
+    error: Optional[str] = None
+    # Машиночитаемый код ошибки (TASK_ERROR_*), не зависит от текста error
+    error_code: Optional[str] = None
+    # id пользователей, изменённых или удалённых задачей (для инвалидации кэша)
+    changed_ids: List[int] = field(default_factory=list)
+    # Момент получения сообщения (time.perf_counter) для метрик
+    received_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def user_id(self) -> Optional[int]:
+        return self.payload.get("user_id")
+
+    def reset(self):
+        self.status, self.result, self.error, self.error_code = "done", None, None, None
+        self.changed_ids = []
+
+    def fail(self, error: str, code: str = TASK_ERROR_FAILED):
+        self.status = "failed"
+        self.error = error
+        self.error_code = code
+        self.result = None
+
+
+@dataclass
+class Segment:
+    """Группа задач, которые не затрагивают одних и тех же пользователей"""
+    creates: List[WorkItem] = field(default_factory=list)
+    updates: List[WorkItem] = field(default_factory=list)
+    deletes: List[WorkItem] = field(default_factory=list)
+    reads: List[WorkItem] = field(default_factory=list)
+    user_ids: set = field(default_factory=set)
+
+    def __bool__(self):
+        return bool(self.creates or self.updates or self.deletes or self.reads)
+
+
+@dataclass
+class Coalesced:
+    """Задачи items, которые выполнены одной задачей target и получают её итог"""
+    target: WorkItem
+    items: List[WorkItem]
+    position: int = 0
+
+
+def coalesce_updates(items: List[WorkItem]) -> tuple[List[WorkItem], List[Coalesced]]:
+    """Сливает обновления одного пользователя внутри пакета в одно UPDATE.
+
+    Обновления без промежуточных чтений этого пользователя объединяются
+    (поздние поля важнее), а обновления перед DELETE не выполняются вовсе.
+    Исходные задачи не меняются: объединённое обновление — новая задача.
+    Возвращает задачи для выполнения и группы для resolve_coalesced.
+    """
+    work: List[Optional[WorkItem]] = []
+    open_groups: Dict[int, Coalesced] = {}
+    groups: List[Coalesced] = []
+
+    for item in items:
+        user_id = item.user_id
+        if item.action == UserAction.UPDATE and user_id:
+            group = open_groups.get(user_id)
+            if group is None:
+                open_groups[user_id] = Coalesced(item, [item], len(work))
+                work.append(item)
+                continue
+            if len(group.items) == 1:
+                # Первое слияние: выполнять будем копию, исходная задача получит итог
+                group.target = WorkItem(
+                    task_id=group.target.task_id, action=UserAction.UPDATE, payload=dict(group.target.payload)
+                )
+                work[group.position] = group.target
+                groups.append(group)
+            group.target.payload.update({k: v for k, v in item.payload.items() if v is not None})
+            group.items.append(item)
+            worker_coalesced.inc("merged")
+            continue
+
+        if item.action == UserAction.DELETE and user_id and user_id in open_groups:
+            # Пользователь всё равно будет удалён: обновления отменяются
+            group = open_groups.pop(user_id)
+            work[group.position] = None
+            if group in groups:
+                groups.remove(group)
+            groups.append(Coalesced(item, group.items))
+            worker_coalesced.inc("cancelled", amount=len(group.items))
+        elif item.action == UserAction.READ:
+            # Чтение должно видеть промежуточное состояние: дальнейшие обновления — отдельно
+            if user_id:
+                open_groups.pop(user_id, None)
+            else:
+                open_groups.clear()
+        work.append(item)
+
+    return [item for item in work if item is not None], groups
+
+
+def resolve_coalesced(groups: List[Coalesced]):
+    """Переносит итог выполненной задачи на все слитые с ней задачи"""
+    for group in groups:
+        target = group.target
+        for item in group.items:
+            item.status, item.error, item.error_code = target.status, target.error, target.error_code
+            item.changed_ids = list(target.changed_ids)
+            # После удаления от обновлений не остаётся состояния пользователя
+            item.result = target.result if target.action == UserAction.UPDATE else None
+
+
+def split_segments(items: List[WorkItem]) -> List[Segment]:
+    """Делит пакет на сегменты, сохраняя порядок операций над одним пользователем.
+
+    Внутри сегмента операции над разными пользователями независимы и выполняются
+    групповыми запросами; повторное обращение к пользователю начинает новый сегмент.
+    """
+    segments = [Segment()]
+    for item in items:
+        current = segments[-1]
+        if item.action == UserAction.CREATE:
+            current.creates.append(item)
+            continue
+
+        if item.action == UserAction.READ and not item.user_id:
+            # Чтение списка должно видеть все предыдущие изменения
+            if current:
+                segments.append(Segment())
+            segments[-1].reads.append(item)
+            segments.append(Segment())
+            continue
+
+        if item.user_id in current.user_ids:
+            current = Segment()
+            segments.append(current)
+        current.user_ids.add(item.user_id)
+
+        if item.action == UserAction.UPDATE:
+            current.updates.append(item)
+        elif item.action == UserAction.DELETE:
+            current.deletes.append(item)
+        elif item.action == UserAction.READ:
+            current.reads.append(item)
+        else:
+            item.fail(f"Unknown action: {item.action}", TASK_ERROR_INVALID)
+
+    return [segment for segment in segments if segment]
+
+
+def serialize(result: Any) -> Any:
+    if isinstance(result, list):
+        return [user_dict(r) for r in result]
+    if result is not None:
+        return user_dict(result)
+    return None
+
+
+async def apply_segment(session: AsyncSession, segment: Segment):
+    """Выполняет сегмент групповыми запросами и заполняет результаты задач"""
+    creates = []
+    for item in segment.creates:
+        missing = [f for f in USER_FIELDS if f not in item.payload]
+        if missing:
+            item.fail(f"Missing fields: {', '.join(missing)}", TASK_ERROR_INVALID)
+        else:
+            creates.append(item)
+    users = await handle_create(session, [item.payload for item in creates])
+    for item, user in zip(creates, users):
+        item.result = serialize(user)
+
+    updated = await handle_update(
+        session, [(item.user_id, item.payload) for item in segment.updates]
+    )
+    for item in segment.updates:
+        if item.user_id in updated:
+            item.result = serialize(updated[item.user_id])
+            item.changed_ids = [item.user_id]
+        else:
+            item.fail(f"User with ID {item.user_id} not found", TASK_ERROR_NOT_FOUND)
+
+    deletes = []
+    for item in segment.deletes:
+        if not item.user_id:
+            item.fail("User ID is required for delete", TASK_ERROR_INVALID)
+        else:
+            deletes.append(item)
+    deleted = await handle_delete(session, [item.user_id for item in deletes])
+    for item in deletes:
+        if item.user_id in deleted:
+            item.changed_ids = [item.user_id]
+        else:
+            item.fail(f"User with ID {item.user_id} not found", TASK_ERROR_NOT_FOUND)
+
+    for item in segment.reads:
+        item.result = serialize(await handle_read(session, item.user_id))
+
+
+async def apply_batch(session: AsyncSession, items: List[WorkItem], coalesce: bool = True):
+    """Применяет пакет задач в текущей транзакции"""
+    groups: List[Coalesced] = []
+    if coalesce:
+        items, groups = coalesce_updates(items)
+    for segment in split_segments(items):
+        await apply_segment(session, segment)
+    resolve_coalesced(groups)
@@ -0,0 +1,148 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.models.user import UserAction
+from src.app.services.hashing import PasswordHasher
+from src.app.worker.batch import WorkItem
+from src.app.worker.worker_handlers import handle_create, handle_update, handle_delete
+
+logger = logging.getLogger("worker")
+
+BULK_ACTIONS = (UserAction.BATCH_CREATE, UserAction.BATCH_UPDATE, UserAction.BATCH_DELETE)
+
+# (индекс элемента в исходном пакете, данные элемента)
+Entry = Tuple[int, Any]
+# Прогресс задачи после записи части: по результатам элементов этой части
+Progress = Callable[[List[Dict[str, Any]]], Dict[str, Any]]
+
+
+def count_failed(results: List[Dict[str, Any]]) -> int:
+    return sum(1 for r in results if r["status"] == "failed")
+
+
+def bulk_progress(total: int, processed: int, failed: int, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Прогресс пакетной задачи; items — результаты элементов только последней записанной части"""
+    return {"total": total, "processed": processed, "failed": failed, "items": items}
+
+
+def resume_progress(task_status: Optional[str], task_result: Any) -> Tuple[int, int]:
+    """Сколько элементов (всего, из них с ошибкой) записано до повторной доставки сообщения"""
+    if task_status == "processing" and isinstance(task_result, dict):
+        return task_result.get("processed", 0), task_result.get("failed", 0)
+    return 0, 0
+
+
+def bulk_entries(item: WorkItem) -> List[Entry]:
+    if item.action == UserAction.BATCH_DELETE:
+        return list(enumerate(item.payload.get("ids", [])))
+    return list(enumerate(item.payload.get("items", [])))
+
+
+async def hash_passwords(entries: List[Entry], hasher: PasswordHasher) -> List[Entry]:
+    """Хеширует пароли элементов до открытия транзакции.
+
+    Уже захешированные значения пропускаются: повторная обработка части после
+    перезапуска не хеширует хеш.
+    """
+    positions = [
+        n for n, (_, data) in enumerate(entries)
+        if isinstance(data, dict) and data.get("password") and not hasher.is_hash(data["password"])
+    ]
+    if not positions:
+        return entries
+    hashed = await hasher.hash_many([entries[n][1]["password"] for n in positions])
+    entries = list(entries)
+    for n, password in zip(positions, hashed):
+        index, data = entries[n]
+        entries[n] = (index, {**data, "password": password})
+    return entries
+
+
+async def apply_bulk_chunk(session: AsyncSession, action: str, entries: List[Entry]) -> List[Dict[str, Any]]:
+    """Применяет часть пакетной задачи и возвращает результаты по элементам"""
+    if action == UserAction.BATCH_CREATE:
+        users = await handle_create(session, [data for _, data in entries])
+        return [{"index": index, "status": "done", "id": user.id} for (index, _), user in zip(entries, users)]
+
+    if action == UserAction.BATCH_UPDATE:
+        updated = await handle_update(session, [(data["id"], data) for _, data in entries])
+        return [
+            {"index": index, "status": "done", "id": data["id"]}
+            if data["id"] in updated
+            else {"index": index, "status": "failed", "id": data["id"], "error": f"User with ID {data['id']} not found"}
+            for index, data in entries
+        ]
+
+    deleted = await handle_delete(session, [user_id for _, user_id in entries])
+    return [
+        {"index": index, "status": "done", "id": user_id}
+        if user_id in deleted
+        else {"index": index, "status": "failed", "id": user_id, "error": f"User with ID {user_id} not found"}
+        for index, user_id in entries
+    ]
+
+
+async def process_bulk(
+    item: WorkItem,
+    commit_chunk: Callable[[WorkItem, List[Entry], Progress], Awaitable[List[Dict[str, Any]]]],
+    hasher: PasswordHasher,
+    chunk_size: int,
+    resumed: Tuple[int, int] = (0, 0),
+):
+    """Выполняет пакетную задачу частями по chunk_size элементов.
+
+    Каждая часть — отдельная транзакция, в которой сохраняется и прогресс:
+    счётчики и результаты элементов этой части. resumed — счётчики из прошлой
+    попытки: повторно доставленное сообщение продолжает с первого незаписанного
+    элемента, а items итога содержат только элементы этой попытки.
+    Если часть не удалось записать целиком, её элементы повторяются по одному.
+    """
+    entries = bulk_entries(item)
+    processed, failed = resumed
+    if processed:
+        logger.info(f"Resuming bulk task {item.task_id} after {processed} of {len(entries)} items")
+    results: List[Dict[str, Any]] = []
+
+    def progress(chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return bulk_progress(
+            len(entries),
+            processed + len(chunk_results),
+            failed + count_failed(chunk_results),
+            chunk_results,
+        )
+
+    for start in range(processed, len(entries), chunk_size):
+        chunk = await hash_passwords(entries[start:start + chunk_size], hasher)
+        try:
+            chunk_results = await commit_chunk(item, chunk, progress)
+        except Exception as e:
+            logger.warning(f"Chunk of task {item.task_id} failed ({e}), retrying one by one")
+            chunk_results = []
+            for entry in chunk:
+                try:
+                    entry_results = await commit_chunk(item, [entry], progress)
+                except Exception as e:
+                    entry_results = [{"index": entry[0], "status": "failed", "error": str(e)}]
+                processed += len(entry_results)
+                failed += count_failed(entry_results)
+                chunk_results.extend(entry_results)
+        else:
+            processed += len(chunk_results)
+            failed += count_failed(chunk_results)
+        results.extend(chunk_results)
+
+    item.changed_ids = [
+        r["id"] for r in results
+        if r["status"] == "done" and item.action != UserAction.BATCH_CREATE
+    ]
+    item.result = {
+        "total": len(entries),
+        "succeeded": len(entries) - failed,
+        "failed": failed,
+        "items": results,
+    }
+    if resumed[0]:
+        item.result["resumed_after"] = resumed[0]
+    logger.info(f"Bulk task {item.task_id} ({item.action}): {item.result['succeeded']}/{len(entries)} done")
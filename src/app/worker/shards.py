@@ -0,0 +1,81 @@
+"""Распределение шардов очереди задач между репликами worker.
+
+    python -m src.app.worker.shards plan --replicas 3 --from-replicas 2
+    python -m src.app.worker.shards status
+    python -m src.app.worker.shards declare
+
+plan печатает шарды каждой реплики и шарды, меняющие владельца. Менять
+WORKER_REPLICAS можно без остановки: очереди шардов объявлены с
+single active consumer, поэтому новый владелец начинает читать шард только
+после того, как прежний отписался и подтвердил полученное.
+"""
+import argparse
+import asyncio
+import sys
+
+from src.app.services.rabbitmq import RabbitMQService
+from src.app.services.sharding import assign_shards, is_shard_queue, rebalance_plan, shard_queues
+from src.app.services.transport import USER_ACTIONS_QUEUE
+from src.app.settings import RABBITMQ_URL, USER_ACTION_SHARDS, WORKER_REPLICAS
+
+
+def print_plan(shards: int, replicas: int, old_replicas: int | None):
+    for index in range(replicas):
+        owned = assign_shards(index, replicas, shards)
+        print(f"replica {index}: {len(owned)} shards {','.join(map(str, owned))}")
+    if old_replicas is not None:
+        moves = rebalance_plan(old_replicas, replicas, shards)
+        print(f"{len(moves)} of {shards} shards change owner ({old_replicas} -> {replicas} replicas)")
+        for shard, old, new in moves:
+            print(f"  shard {shard}: replica {old} -> replica {new}")
+
+
+async def print_status(shards: int) -> int:
+    """Глубина и потребители очередей; код 1, если у непустого шарда нет потребителя"""
+    rabbitmq = RabbitMQService(RABBITMQ_URL, pool_size=1)
+    orphaned = 0
+    try:
+        for queue_name in [*shard_queues(shards), USER_ACTIONS_QUEUE] if shards > 1 else shard_queues(shards):
+            status = await rabbitmq.queue_status(queue_name)
+            if status is None:
+                print(f"{queue_name}: missing")
+                continue
+            print(f"{queue_name}: {status['messages']} messages, {status['consumers']} consumers")
+            if status["messages"] and not status["consumers"]:
+                orphaned += 1
+    finally:
+        await rabbitmq.close()
+    if orphaned:
+        print(f"{orphaned} queues have messages but no consumers")
+    return 1 if orphaned else 0
+
+
+async def declare(shards: int):
+    rabbitmq = RabbitMQService(RABBITMQ_URL, pool_size=1)
+    try:
+        for queue_name in shard_queues(shards):
+            await rabbitmq.declare_queue(queue_name, single_active_consumer=is_shard_queue(queue_name))
+            print(f"declared {queue_name}")
+    finally:
+        await rabbitmq.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Shard assignment for UserHubAPI workers")
+    parser.add_argument("command", choices=("plan", "status", "declare"))
+    parser.add_argument("--shards", type=int, default=USER_ACTION_SHARDS, help="число шардов (USER_ACTION_SHARDS)")
+    parser.add_argument("--replicas", type=int, default=WORKER_REPLICAS, help="новое число реплик worker")
+    parser.add_argument("--from-replicas", type=int, help="текущее число реплик, чтобы показать перенос шардов")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        print_plan(args.shards, args.replicas, args.from_replicas)
+        return 0
+    if args.command == "status":
+        return asyncio.run(print_status(args.shards))
+    asyncio.run(declare(args.shards))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.context import SpawnProcess
+from typing import Optional
+
+from src.app.settings import WORKER_DRAIN_TIMEOUT
+from src.app.worker.worker import run_process
+
+logger = logging.getLogger("worker")
+
+# Пауза перед перезапуском упавшего процесса растёт при частых падениях
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 30.0
+# Процесс, проработавший дольше, считается стабильным
+STABLE_UPTIME = 30.0
+# Запас сверх WORKER_DRAIN_TIMEOUT на закрытие соединений
+SHUTDOWN_GRACE = 10.0
+
+
+class Supervisor:
+    """Запускает processes процессов worker и перезапускает упавшие.
+
+    Процессы создаются через spawn: у каждого свои соединение с брокером,
+    prefetch и пул соединений с БД. SIGTERM/SIGINT пересылаются процессам,
+    которые дообрабатывают полученные сообщения и завершаются.
+    """
+
+    def __init__(self, processes: int, concurrency: int):
+        self.processes = processes
+        self.concurrency = concurrency
+        self.context = multiprocessing.get_context("spawn")
+        self.children: list[Optional[SpawnProcess]] = [None] * processes
+        self.started_at = [0.0] * processes
+        self.delays = [RESTART_DELAY] * processes
+        self.restart_at = [0.0] * processes
+        self.restarts = 0
+        self.stopping = False
+
+    def start_child(self, index: int):
+        process = self.context.Process(
+            target=run_process, args=(index, self.processes, self.concurrency), name=f"worker-{index}"
+        )
+        process.start()
+        self.children[index] = process
+        self.started_at[index] = time.monotonic()
+        logger.info(f"Started worker process {index} (pid {process.pid})")
+
+    def check_children(self):
+        """Перезапускает завершившиеся процессы с нарастающей паузой"""
+        now = time.monotonic()
+        for index, process in enumerate(self.children):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.error(f"Worker process {index} (pid {process.pid}) exited with code {process.exitcode}")
+                uptime = now - self.started_at[index]
+                if uptime < STABLE_UPTIME:
+                    self.delays[index] = min(self.delays[index] * 2, MAX_RESTART_DELAY)
+                else:
+                    self.delays[index] = RESTART_DELAY
+                self.restart_at[index] = now + self.delays[index]
+                self.children[index] = None
+                self.restarts += 1
+            if now >= self.restart_at[index]:
+                self.start_child(index)
+
+    def request_stop(self, signum, frame):
+        if not self.stopping:
+            logger.info(f"Received signal {signum}, stopping worker processes...")
+        self.stopping = True
+
+    def shutdown(self):
+        """Пересылает SIGTERM процессам и ждёт их дообработки"""
+        alive = [process for process in self.children if process is not None and process.is_alive()]
+        for process in alive:
+            process.terminate()
+        deadline = time.monotonic() + WORKER_DRAIN_TIMEOUT + SHUTDOWN_GRACE
+        for process in alive:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker process {process.name} did not stop in time, killing")
+                process.kill()
+                process.join()
+        logger.info("All worker processes stopped")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        logger.info(f"Supervisor started: {self.processes} processes, concurrency {self.concurrency}")
+        for index in range(self.processes):
+            self.start_child(index)
+        while not self.stopping:
+            time.sleep(0.5)
+            if not self.stopping:
+                self.check_children()
+        self.shutdown()
@@ -1,50 +1,73 @@
-from typing import Dict, Any, List
+import logging
+from typing import Dict, Any, List, Iterable, Tuple
 
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.asgi import logger
 from src.app.models.user import User
 from src.app.repositories.user_repository import SQLAlchemyUserRepository
 
+logger = logging.getLogger("worker")
 
-async def handle_create(session: AsyncSession, data: Dict[str, Any]) -> User:
-    """Обработка создания пользователя"""
+USER_FIELDS = ("name", "surname", "password")
 
-    user = User(
-        name=data["name"],
-        surname=data["surname"],
-        password=data["password"],
-    )
 
-    repo = SQLAlchemyUserRepository(session)
-    return await repo.create(user)
+async def handle_create(session: AsyncSession, payloads: List[Dict[str, Any]]) -> List[User]:
+    """Создание пользователей одним многострочным INSERT ... RETURNING"""
+    if not payloads:
+        return []
 
+    rows = [{field: data[field] for field in USER_FIELDS} for data in payloads]
+    result = await session.scalars(
+        insert(User).returning(User, sort_by_parameter_order=True),
+        rows,
+    )
+    return list(result.all())
 
-async def handle_update(
-    session: AsyncSession, user_id: int, data: Dict[str, Any]
-) -> User:
-    """Обработка обновления пользователя"""
-    update_data = {k: v for k, v in data.items() if v is not None}
-    logger.info(f"Updating user {user_id} with data: {update_data}")
 
-    repo = SQLAlchemyUserRepository(session)
-    user = await repo.get_by_id(user_id)
-    if not user:
-        raise ValueError(f"User with ID {user_id} not found")
+async def handle_update(
+    session: AsyncSession, updates: Iterable[Tuple[int, Dict[str, Any]]]
+) -> Dict[int, User]:
+    """Обновление пользователей по первичному ключу одним пакетом.
+
+    Возвращает обновлённых пользователей по id; отсутствующих в БД id в ответе нет.
+    """
+    updates = [
+        (user_id, {k: v for k, v in data.items() if k in USER_FIELDS and v is not None})
+        for user_id, data in updates
+    ]
+    if not updates:
+        return {}
+
+    user_ids = [user_id for user_id, _ in updates]
+    existing = set(await session.scalars(select(User.id).where(User.id.in_(user_ids))))
+    rows = [{"id": user_id, **data} for user_id, data in updates if user_id in existing and data]
+    logger.info(f"Updating {len(rows)} users")
+
+    if rows:
+        await session.execute(update(User), rows)
+
+    users = await session.scalars(
+        select(User)
+        .where(User.id.in_(existing))
+        .execution_options(populate_existing=True)
+    )
+    return {user.id: user for user in users}
 
-    return await repo.update(user, update_data)
 
-async def handle_delete(session: AsyncSession, user_id: int) -> None:
-    """Обработка удаления пользователя"""
-    if not user_id:
-        raise ValueError("User ID is required for delete")
+async def handle_delete(session: AsyncSession, user_ids: List[int]) -> set[int]:
+    """Удаление пользователей одним DELETE; возвращает id действительно удалённых"""
+    if not user_ids:
+        return set()
 
-    repo = SQLAlchemyUserRepository(session)
-    return await repo.delete(user_id)
+    result = await session.scalars(
+        delete(User).where(User.id.in_(user_ids)).returning(User.id)
+    )
+    return set(result.all())
 
 
 async def handle_read(session: AsyncSession, user_id: int | None) -> List[User]:
-    """Обработка удаления пользователя"""
+    """Обработка чтения пользователя или списка пользователей"""
     repo = SQLAlchemyUserRepository(session)
 
     if not user_id:
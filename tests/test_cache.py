@@ -0,0 +1,55 @@
+import pytest
+
+from src.app.services.cache import InMemoryCacheBackend, LRUCache, UserCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_lru_expires_entries():
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.set("a", 1, ttl=-1)
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_user_cache_read_through_and_invalidation():
+    shared = InMemoryCacheBackend()
+    cache = UserCache(local=LRUCache(), shared=shared)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"id": 1, "name": "Test", "surname": "User"}
+
+    assert (await cache.get_user(1, loader))["name"] == "Test"
+    await cache.get_user(1, loader)
+    assert len(calls) == 1
+
+    await cache.handle_invalidation({"user_ids": [1], "lists": True})
+    assert await shared.get(cache.user_key(1)) is None
+    await cache.get_user(1, loader)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_user_cache_skips_value_read_before_invalidation():
+    cache = UserCache(local=LRUCache())
+
+    async def loader():
+        # Инвалидация пришла, пока шло чтение из БД
+        await cache.invalidate([1])
+        return {"id": 1}
+
+    await cache.get_user(1, loader)
+    assert len(cache.local) == 0
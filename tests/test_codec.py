@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import msgspec
+import pytest
+
+from src.app.models.user import UserAction
+from src.app.schemas.pagination import UserPage
+from src.app.schemas.records import user_dict, user_record
+from src.app.services.codec import (
+    CONTENT_TYPE_MSGPACK,
+    decode_message,
+    encode_message,
+    json_decode,
+    message_content_type,
+)
+
+MESSAGE = {"task_id": "t", "action": UserAction.CREATE, "data": {"name": "Иван", "user_id": None}}
+
+
+@pytest.mark.parametrize("content_type", [None, "application/json", CONTENT_TYPE_MSGPACK])
+def test_message_roundtrip(content_type):
+    body = encode_message(MESSAGE, content_type or "application/json")
+
+    assert decode_message(body, content_type) == {**MESSAGE, "action": "create"}
+
+
+def test_msgpack_is_more_compact():
+    assert len(encode_message(MESSAGE, CONTENT_TYPE_MSGPACK)) < len(encode_message(MESSAGE))
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        json_decode(b"{not json")
+    with pytest.raises(ValueError):
+        message_content_type("xml")
+
+
+def test_user_record_from_row_and_cache():
+    row = SimpleNamespace(id=1, name="Иван", surname="Петров", password="hash")
+
+    assert user_record(row) == user_record(user_dict(row))
+    page = msgspec.json.encode(UserPage(data=[user_record(row)], next_cursor=None))
+    assert msgspec.json.decode(page) == {"data": [{"id": 1, "name": "Иван", "surname": "Петров"}], "next_cursor": None}
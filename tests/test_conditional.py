@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.app.models.user import Base
+from src.app.repositories.user_repository import SQLAlchemyUserRepository
+from src.app.routes.users_routes import UserController
+from src.app.worker.worker_handlers import handle_create, handle_update
+from src.app.routes.conditional import is_not_modified, page_etag, user_etag, validator_headers
+from src.app.schemas.records import modified_at
+
+MODIFIED = datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+def test_etag_changes_with_modification():
+    assert user_etag(1, MODIFIED) != user_etag(1, MODIFIED + timedelta(microseconds=1))
+    assert user_etag(1, MODIFIED) != user_etag(2, MODIFIED)
+    assert page_etag(20, 40, MODIFIED) != page_etag(19, 40, MODIFIED)
+    assert page_etag(0, None, None).startswith('W/"')
+
+
+def test_naive_datetime_is_utc():
+    naive = MODIFIED.replace(tzinfo=None)
+
+    assert user_etag(1, naive) == user_etag(1, MODIFIED)
+    assert validator_headers("x", naive)["Last-Modified"] == "Wed, 01 May 2024 12:30:15 GMT"
+
+
+def test_if_none_match():
+    etag = page_etag(1, 1, MODIFIED)
+
+    assert is_not_modified({"if-none-match": etag}, etag, MODIFIED)
+    assert is_not_modified({"if-none-match": f'"other", {etag[2:]}'}, etag, MODIFIED)
+    assert is_not_modified({"if-none-match": "*"}, etag, MODIFIED)
+    assert not is_not_modified({"if-none-match": '"other"'}, etag, MODIFIED)
+    assert not is_not_modified({}, etag, MODIFIED)
+
+
+def test_if_none_match_takes_precedence():
+    headers = {"if-none-match": '"other"', "if-modified-since": "Wed, 01 May 2024 12:30:15 GMT"}
+
+    assert not is_not_modified(headers, user_etag(1, MODIFIED), MODIFIED)
+
+
+def test_if_modified_since():
+    etag = user_etag(1, MODIFIED)
+
+    assert is_not_modified({"if-modified-since": "Wed, 01 May 2024 12:30:15 GMT"}, etag, MODIFIED)
+    assert not is_not_modified({"if-modified-since": "Wed, 01 May 2024 12:30:14 GMT"}, etag, MODIFIED)
+    assert not is_not_modified({"if-modified-since": "garbage"}, etag, MODIFIED)
+
+
+def test_modified_at_falls_back_to_created_at():
+    row = SimpleNamespace(updated_at=None, created_at=MODIFIED)
+
+    assert modified_at(row) == MODIFIED
+    assert modified_at({"id": 1, "modified": MODIFIED}) == MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_after_update_in_same_second():
+    # SQLite хранит CURRENT_TIMESTAMP с точностью до секунды
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_user(headers: dict):
+        async with session_factory() as session:
+            request = SimpleNamespace(headers=headers)
+            return await UserController.get_user_by_id.fn(
+                None, request=request, user_id=1, user_repo=SQLAlchemyUserRepository(session)
+            )
+
+    async with session_factory() as session:
+        await handle_create(session, [{"name": "Ann", "surname": "Test", "password": "x"}])
+        await session.commit()
+    etag = (await get_user({})).headers["ETag"]
+
+    async with session_factory() as session:
+        await handle_update(session, [(1, {"name": "Anna"})])
+        await session.commit()
+    response = await get_user({"if-none-match": etag})
+
+    assert response.status_code == 200
+    assert response.content.name == "Anna"
+    assert response.headers["ETag"] != etag
+    await engine.dispose()
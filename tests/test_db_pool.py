@@ -0,0 +1,46 @@
+import time
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.app.db_pool import InstrumentedPool, PoolMetrics
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_track_checkouts_and_churn():
+    metrics = PoolMetrics()
+    pool_class = type("TestPool", (InstrumentedPool,), {"metrics": metrics})
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=pool_class, pool_size=2, max_overflow=0)
+    metrics.attach(engine)
+
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+        busy = metrics.stats(engine, capacity=2)
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+    await engine.dispose()
+
+    assert busy["checked_out"] == 1
+    assert busy["utilization"] == 0.5
+    stats = metrics.stats(engine, capacity=2)
+    assert stats["checkouts"] == 2
+    assert stats["connects"] == 1
+    assert stats["closes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_wait_excludes_connect_time():
+    metrics = PoolMetrics()
+    pool_class = type("TestPool", (InstrumentedPool,), {"metrics": metrics})
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=pool_class, pool_size=1, max_overflow=0)
+    # Медленное подключение к БД
+    event.listen(engine.sync_engine, "connect", lambda *args: time.sleep(0.05))
+
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+    await engine.dispose()
+
+    stats = metrics.stats(engine, capacity=1)
+    assert stats["connect_max_ms"] >= 50
+    assert stats["wait_max_ms"] < 50
@@ -0,0 +1,31 @@
+import pytest
+
+from src.app.services.hashing import PasswordHasher, HashingOverloadedError
+
+
+@pytest.mark.asyncio
+async def test_hash_runs_in_executor():
+    hasher = PasswordHasher(rounds=4, max_workers=1)
+    hashed = await hasher.hash("TestPass123")
+
+    assert hashed != "TestPass123"
+    assert hasher.pwd_context.verify("TestPass123", hashed)
+    assert hasher.stats()["hashed"] == 1
+    hasher.close()
+
+
+@pytest.mark.asyncio
+async def test_hash_rejects_when_queue_is_full():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=0)
+
+    with pytest.raises(HashingOverloadedError):
+        await hasher.hash("TestPass123")
+    assert hasher.stats()["rejected"] == 1
+    hasher.close()
+
+
+def test_is_hash_tells_bcrypt_hash_from_password():
+    hasher = PasswordHasher(rounds=4, max_workers=1)
+    assert hasher.is_hash(hasher.pwd_context.hash("Pass1"))
+    assert not hasher.is_hash("Pass1")
+    hasher.close()
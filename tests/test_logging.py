@@ -0,0 +1,67 @@
+import json
+import logging
+import sys
+
+from src.app.logging_config import BoundedQueueHandler, JsonFormatter, SamplingFilter, parse_sampling
+
+
+def make_record(level=logging.INFO, msg="hello %s", args=("world",), name="app"):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_queue_handler_drops_when_full():
+    handler = BoundedQueueHandler(maxsize=2)
+    for _ in range(5):
+        handler.emit(make_record())
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_queue_handler_formats_before_enqueue():
+    handler = BoundedQueueHandler(maxsize=2)
+    items = ["a"]
+    handler.emit(make_record(msg="items %s", args=(items,)))
+    items.append("b")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record(level=logging.ERROR, msg="failed", args=())
+        record.exc_info = sys.exc_info()
+        handler.emit(record)
+
+    first, second = handler.queue.get_nowait(), handler.queue.get_nowait()
+    assert (first.getMessage(), first.args) == ("items ['a']", None)
+    assert second.exc_info is None and second.exc_text is None
+    assert "ValueError: boom" in second.getMessage()
+
+
+def test_sampling_keeps_warnings():
+    sampler = SamplingFilter({"app": 0})
+
+    assert not sampler.filter(make_record(logging.INFO))
+    assert sampler.filter(make_record(logging.WARNING))
+
+
+def test_sampling_matches_logger_prefix():
+    sampler = SamplingFilter({"sqlalchemy.engine": 0, "worker": 0, "app.static": 1})
+
+    assert not sampler.filter(make_record(name="sqlalchemy.engine.Engine"))
+    assert not sampler.filter(make_record(name="worker"))
+    assert sampler.filter(make_record(name="sqlalchemy.pool"))
+    assert sampler.filter(make_record(name="workers"))
+    assert sampler.rate_for("app.static.pages") == 1
+    assert sampler.rate_for("httpx") is None
+
+
+def test_parse_sampling():
+    assert parse_sampling("sqlalchemy.engine=0.01, app=1,") == {"sqlalchemy.engine": 0.01, "app": 1.0}
+    assert parse_sampling("") == {}
+
+
+def test_json_formatter():
+    data = json.loads(JsonFormatter().format(make_record()))
+
+    assert data["message"] == "hello world"
+    assert data["level"] == "INFO"
+    assert data["logger"] == "app"
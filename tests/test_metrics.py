@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from src.app.services.metrics import MetricsRegistry, start_metrics_server, registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    metrics = MetricsRegistry()
+    latency = metrics.histogram("test_duration_seconds", "Test latency", ("handler",), buckets=(0.1, 1.0))
+    latency.observe(0.05, "a")
+    latency.observe(0.5, "a")
+    latency.observe(5, "a")
+
+    text = metrics.render()
+
+    assert 'test_duration_seconds_bucket{handler="a",le="0.1"} 1' in text
+    assert 'test_duration_seconds_bucket{handler="a",le="1.0"} 2' in text
+    assert 'test_duration_seconds_bucket{handler="a",le="+Inf"} 3' in text
+    assert 'test_duration_seconds_count{handler="a"} 3' in text
+
+
+def test_counter_and_stats_gauges():
+    metrics = MetricsRegistry()
+    tasks = metrics.counter("test_tasks_total", "Test tasks", ("status",))
+    tasks.inc("done")
+    tasks.inc("done")
+    metrics.register_stats("outbox", lambda: {"relayed": 3, "name": "skipped"})
+
+    text = metrics.render()
+
+    assert 'test_tasks_total{status="done"} 2' in text
+    assert "userhub_outbox_relayed 3" in text
+    assert "skipped" not in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_server():
+    server = await start_metrics_server("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: worker\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+    finally:
+        server.close()
+
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert registry.render().split("\n")[0].encode() in response
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.app.models.user import Base
+from src.app.repositories.outbox_repository import SQLAlchemyOutboxRepository, locked_routing_keys_query
+from src.app.services.outbox import OutboxRelay
+from src.app.services.transport import InProcessTransport
+
+
+def test_relay_locks_whole_queue_in_postgres():
+    sql = str(locked_routing_keys_query().compile(dialect=postgresql.dialect()))
+
+    assert "pg_try_advisory_xact_lock" in sql
+    assert "hashtext(anon_1.routing_key)" in sql
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_queue_in_order():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        repo = SQLAlchemyOutboxRepository(session)
+        for n in range(5):
+            repo.add(f"user_actions.{n % 2}", {"n": n})
+        await session.commit()
+
+    transport = InProcessTransport()
+    relay = OutboxRelay(transport, session_factory, batch_size=3)
+    assert await relay.relay_batch() == 3
+    assert await relay.relay_batch() == 2
+
+    published = {name: [] for name in ("user_actions.0", "user_actions.1")}
+    for name, values in published.items():
+        async def collect(message, values=values):
+            values.append(message.data["n"])
+            await message.ack()
+
+        await transport.consume(name, collect, prefetch=10)
+    while sum(map(len, published.values())) < 5:
+        await asyncio.sleep(0.001)
+    assert published == {"user_actions.0": [0, 2, 4], "user_actions.1": [1, 3]}
+    await transport.close()
+    await engine.dispose()
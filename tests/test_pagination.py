@@ -0,0 +1,15 @@
+import pytest
+
+from src.app.schemas.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor(12345)
+    assert "12345" not in cursor
+    assert decode_cursor(cursor) == 12345
+
+
+@pytest.mark.parametrize("cursor", ["zzz", "", encode_cursor(1)[:-1] + "!"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
@@ -0,0 +1,84 @@
+import pytest
+from litestar.datastructures import State
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.app.routes.system_routes import SystemController
+from src.app.services.readiness import (
+    Readiness,
+    backoff_delay,
+    migration_heads,
+    schema_is_current,
+    wait_for_schema,
+)
+from src.app.services.transport import InProcessTransport
+
+
+def test_migration_heads():
+    assert migration_heads() == {"e5b2c7a9d1f4"}
+
+
+def test_schema_is_current_accepts_newer_revision():
+    known = {"base", "head"}
+    assert schema_is_current({"head"}, {"head"}, known)
+    # Миграция следующего релиза уже применена, а под ещё старый
+    assert schema_is_current({"next"}, {"head"}, known)
+    assert not schema_is_current({"base"}, {"head"}, known)
+    assert not schema_is_current(set(), {"head"}, known)
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=0.2, cap=1) <= min(1, 0.2 * 2 ** attempt)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_schema_creates_tables_without_alembic():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    assert await wait_for_schema(engine, {"head"}, attempts=1) is None
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(lambda sync: inspect(sync).get_table_names())
+    assert {"users", "task_results", "outbox"} <= set(tables)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_schema_checks_revision():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        await conn.execute(text("INSERT INTO alembic_version VALUES ('old')"))
+
+    with pytest.raises(RuntimeError, match="expected"):
+        await wait_for_schema(engine, {"head"}, attempts=2, base=0)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE alembic_version SET version_num = 'head'"))
+    assert await wait_for_schema(engine, {"head"}, attempts=1) == {"head"}
+
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE alembic_version SET version_num = 'next'"))
+    assert await wait_for_schema(engine, {"head"}, attempts=1, known={"old", "head"}) == {"next"}
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_readiness_after_warm_up():
+    engine = create_async_engine("sqlite+aiosqlite:///file:readiness?mode=memory&uri=true")
+    readiness = Readiness(engine, db_connections=3, channels=2)
+    assert not readiness.is_ready
+
+    await readiness.start(InProcessTransport())
+    await readiness._task
+    assert readiness.is_ready
+    assert readiness.stats()["db_connections_warmed"] == 3
+
+    await readiness.stop()
+    assert readiness.stats()["status"] == "stopping"
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_readyz_before_readiness_is_created():
+    response = await SystemController.readyz.fn(None, state=State())
+    assert response.status_code == 503
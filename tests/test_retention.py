@@ -0,0 +1,142 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.app.models.task_result import TaskResult
+from src.app.repositories.task_repository import SQLAlchemyTaskResultRepository
+from src.app.services.retention import TaskResultRetention, partition_upper_bound
+from src.app.services.task_ids import new_task_id, task_id_time
+
+
+def test_task_id_carries_creation_time():
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    task_id = new_task_id()
+
+    assert uuid.UUID(task_id).version == 7
+    assert before <= task_id_time(task_id) <= datetime.now(timezone.utc)
+    assert new_task_id() != task_id
+    assert task_id_time(str(uuid.uuid4())) is None
+    assert task_id_time("not-a-uuid") is None
+
+
+def test_partition_upper_bound():
+    bound = "FOR VALUES FROM ('2026-10-18 00:00:00+00') TO ('2026-10-19 00:00:00+00')"
+
+    assert partition_upper_bound(bound) == datetime(2026, 10, 19, tzinfo=timezone.utc)
+    assert partition_upper_bound("DEFAULT") is None
+
+
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(TaskResult.__table__.create)
+    return engine, async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_get_and_upsert_by_time_ordered_id():
+    engine, factory = await session_factory()
+    task_id = new_task_id()
+
+    async with factory() as session:
+        repo = SQLAlchemyTaskResultRepository(session)
+        await repo.create(task_id)
+        await repo.update_many([{"id": task_id, "status": "done", "result": {"id": 1}, "error": None}])
+        await session.commit()
+
+    async with factory() as session:
+        task = await SQLAlchemyTaskResultRepository(session).get(task_id)
+        count = await session.scalar(select(func.count()).select_from(TaskResult))
+    assert task.status == "done"
+    assert count == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_purge_rows_in_batches():
+    engine, factory = await session_factory()
+    now = datetime.now(timezone.utc)
+    async with factory() as session:
+        await session.execute(insert(TaskResult), [
+            {"id": f"old{i}", "created_at": now - timedelta(days=10), "status": "done"} for i in range(5)
+        ] + [{"id": "new", "created_at": now - timedelta(days=1), "status": "done"}])
+        await session.commit()
+
+    retention = TaskResultRetention(factory, retention_days=7, batch_size=2)
+    await retention.run_once(now)
+
+    async with factory() as session:
+        remaining = (await session.scalars(select(TaskResult.id))).all()
+    assert remaining == ["new"]
+    assert retention.stats()["rows_deleted"] == 5
+    await engine.dispose()
+
+
+class RecordingRetention(TaskResultRetention):
+    """Партиции и DDL PostgreSQL подменены: проверяется только выбор действий"""
+
+    def __init__(self, *args, partitions=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.partitions = list(partitions)
+        self.statements = []
+
+    async def _partitions(self):
+        return self.partitions
+
+    async def _ddl(self, statement, check=None):
+        self.statements.append(statement.split(" PARTITION OF")[0])
+        return True
+
+
+@pytest.mark.asyncio
+async def test_partitions_premade_without_retention_and_default_purged_in_batches():
+    engine, factory = await session_factory()
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE task_results_default (id VARCHAR(36), created_at DATETIME)"))
+    now = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+    async with factory() as session:
+        await session.execute(
+            text("INSERT INTO task_results_default VALUES (:id, :created_at)"),
+            [{"id": f"old{i}", "created_at": now - timedelta(days=10)} for i in range(3)]
+            + [{"id": "new", "created_at": now}],
+        )
+        await session.commit()
+    partitions = [
+        ("task_results_default", "DEFAULT"),
+        ("task_results_p20261001", "FOR VALUES FROM ('2026-10-01 00:00:00+00') TO ('2026-10-02 00:00:00+00')"),
+    ]
+
+    keep_all = RecordingRetention(factory, retention_days=0, premake_days=1, partitions=partitions)
+    await keep_all.maintain_partitions(now, None)
+    assert keep_all.statements == [
+        "CREATE TABLE IF NOT EXISTS task_results_p20261018",
+        "CREATE TABLE IF NOT EXISTS task_results_p20261019",
+    ]
+
+    retention = RecordingRetention(factory, retention_days=7, premake_days=0, batch_size=2, partitions=partitions)
+    await retention.maintain_partitions(now, now - timedelta(days=7))
+    assert retention.statements[-1] == "DROP TABLE IF EXISTS task_results_p20261001"
+    async with factory() as session:
+        remaining = (await session.scalars(text("SELECT id FROM task_results_default"))).all()
+    assert remaining == ["new"]
+    assert retention.stats()["rows_deleted"] == 3
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_zero_retention_keeps_rows():
+    engine, factory = await session_factory()
+    async with factory() as session:
+        await session.execute(insert(TaskResult), [
+            {"id": "old", "created_at": datetime.now(timezone.utc) - timedelta(days=100), "status": "done"}
+        ])
+        await session.commit()
+
+    await TaskResultRetention(factory, retention_days=0).run_once()
+
+    async with factory() as session:
+        assert await session.scalar(select(func.count()).select_from(TaskResult)) == 1
+    await engine.dispose()
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from src.app.services.sharding import (
+    assign_shards,
+    is_shard_queue,
+    parse_shards,
+    rebalance_plan,
+    replica_index,
+    route_task,
+    shard_queues,
+    worker_queues,
+)
+from src.app.services.transport import USER_ACTIONS_QUEUE, InProcessTransport
+from src.app.worker import worker
+
+
+def test_user_actions_stay_in_one_shard():
+    queues = {route_task(USER_ACTIONS_QUEUE, 8, {"user_id": 42}, f"task-{n}") for n in range(20)}
+
+    assert len(queues) == 1
+    assert is_shard_queue(queues.pop())
+    assert route_task(USER_ACTIONS_QUEUE, 1, {"user_id": 42}, "task") == USER_ACTIONS_QUEUE
+    assert not is_shard_queue("inprocess.replies.1")
+
+
+def test_assignment_covers_every_shard_once():
+    owned = [shard for index in range(3) for shard in assign_shards(index, 3, 16)]
+
+    assert sorted(owned) == list(range(16))
+    assert all(old != new for _, old, new in rebalance_plan(2, 3, 16))
+    assert rebalance_plan(2, 2, 16) == []
+
+
+def test_worker_queues_and_replica_index():
+    assert parse_shards("0-2, 5,5") == [0, 1, 2, 5]
+    assert replica_index("", hostname="worker-3") == 3
+    assert replica_index("1", hostname="worker-3") == 1
+    assert replica_index("", hostname="worker") == 0
+    # Владелец шарда 0 дочитывает общую очередь
+    assert worker_queues([0, 2], 4) == ["user_actions.0", "user_actions.2", USER_ACTIONS_QUEUE]
+    assert worker_queues([1], 1) == [USER_ACTIONS_QUEUE]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loops_keep_shard_order(monkeypatch):
+    processed: dict[int, list[int]] = {}
+
+    async def process_batch(messages, services):
+        # Пакеты разной длительности: общий буфер перемешал бы порядок
+        await asyncio.sleep(0.001 * len(messages))
+        for message in messages:
+            processed.setdefault(message.data["user_id"], []).append(message.data["n"])
+            await message.ack()
+
+    monkeypatch.setattr(worker, "process_batch", process_batch)
+    transport = InProcessTransport()
+    queues = shard_queues(4)
+    for n in range(40):
+        user_id = n % 5
+        await transport.publish(route_task(USER_ACTIONS_QUEUE, 4, {"user_id": user_id}, str(n)), {
+            "user_id": user_id, "n": n,
+        })
+
+    stopping = asyncio.Event()
+    consumer = asyncio.create_task(
+        worker.consume_batches(transport, batch_size=3, wait_ms=1, concurrency=2, stopping=stopping, queues=queues)
+    )
+    while sum(transport.queue(name).acked for name in queues) < 40:
+        await asyncio.sleep(0.005)
+    stopping.set()
+    await asyncio.wait_for(consumer, 1)
+
+    assert all(values == sorted(values) for values in processed.values())
+    await transport.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited_to_queue_count(monkeypatch):
+    processed, running = [], []
+
+    async def process_batch(messages, services):
+        running.append(1)
+        assert len(running) == 1  # одна очередь — один пакет одновременно
+        await asyncio.sleep(0.001)
+        processed.extend(message.data["n"] for message in messages)
+        for message in messages:
+            await message.ack()
+        running.pop()
+
+    monkeypatch.setattr(worker, "process_batch", process_batch)
+    transport = InProcessTransport()
+    for n in range(20):
+        await transport.publish(USER_ACTIONS_QUEUE, {"user_id": 1, "n": n})
+
+    stopping = asyncio.Event()
+    consumer = asyncio.create_task(
+        worker.consume_batches(transport, batch_size=3, wait_ms=1, concurrency=4, stopping=stopping)
+    )
+    while transport.queue(USER_ACTIONS_QUEUE).acked < 20 and not consumer.done():
+        await asyncio.sleep(0.005)
+    stopping.set()
+    await asyncio.wait_for(consumer, 1)
+
+    assert processed == list(range(20))
+    await transport.close()
@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.app.models.user import Base, User
+from src.app.repositories.user_repository import SQLAlchemyUserRepository
+from src.app.services.cache import LRUCache, UserCache
+from src.app.services.single_flight import SingleFlight, parse_scope
+
+
+def test_parse_scope():
+    assert parse_scope("users, tasks") == {"users", "tasks"}
+    assert parse_scope("all") == {"users", "tasks"}
+    assert parse_scope("") == frozenset()
+    with pytest.raises(ValueError):
+        parse_scope("orders")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load():
+    flights = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    results = await asyncio.gather(*(flights.do("users", 1, load) for _ in range(10)))
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    # Результат не кэшируется: следующее чтение снова идёт в загрузчик
+    await flights.do("users", 1, load)
+    assert calls == 2
+    stats = flights.stats()
+    assert (stats["users_loads"], stats["users_collapsed"], stats["in_flight"]) == (2, 9, 0)
+
+
+@pytest.mark.asyncio
+async def test_leader_cancel_and_errors_reach_waiters():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        raise RuntimeError("db is down")
+
+    leader = asyncio.create_task(flights.do("tasks", "t", load))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(flights.do("tasks", "t", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+
+    with pytest.raises(RuntimeError, match="db is down"):
+        await waiter
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_scope_excludes_kind():
+    flights = SingleFlight(parse_scope("tasks"))
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(flights.do("users", 1, load) for _ in range(3)))
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_user_reads_from_many_sessions_hit_db_once(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'flights.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(User(name="N", surname="S", password="p"))
+        await session.commit()
+
+    selects = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda *args: selects.append(args[2]) if args[2].startswith("SELECT") else None,
+    )
+    flights = SingleFlight()
+    all_loaded = asyncio.Barrier(20)
+
+    async def read():
+        async with session_factory() as session:
+            user = await SQLAlchemyUserRepository(session, flights).get_by_id(1)
+            await all_loaded.wait()
+            # Общий объект загружен своей сессией и не принадлежит ни одному запросу
+            assert user not in session
+            return user.name
+
+    assert await asyncio.gather(*(read() for _ in range(20))) == ["N"] * 20
+    assert len(selects) == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_first_reader_does_not_break_waiters(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cancel.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(User(name="N", surname="S", password="p"))
+        await session.commit()
+    flights = SingleFlight()
+    first_session = asyncio.Event()
+
+    async def read(first=False):
+        async with session_factory() as session:
+            if first:
+                first_session.set()
+            user = await SQLAlchemyUserRepository(session, flights).get_by_id(1)
+            return user, session
+
+    leader = asyncio.create_task(read(first=True))
+    await first_session.wait()
+    while not flights.stats()["in_flight"]:
+        await asyncio.sleep(0)
+    waiter = asyncio.create_task(read())
+    await asyncio.sleep(0)
+    # Первый запрос отменён посреди загрузки, его сессия закрывается
+    leader.cancel()
+
+    user, session = await asyncio.wait_for(waiter, 1)
+    assert user.name == "N"
+    assert user not in session
+    assert flights.stats()["users_collapsed"] == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_cache_does_not_reuse_flight_started_before_invalidation():
+    cache = UserCache(LRUCache(), flights=SingleFlight())
+    release = asyncio.Event()
+
+    async def load_before_write():
+        await release.wait()
+        return {"id": 1, "name": "Ann"}
+
+    async def load_after_write():
+        return {"id": 1, "name": "Anna"}
+
+    stale = asyncio.create_task(cache.get_user(1, load_before_write))
+    await asyncio.sleep(0)
+    # Worker записал изменение и прислал инвалидацию, пока первая загрузка ещё идёт
+    await cache.invalidate([1])
+    fresh = await asyncio.wait_for(cache.get_user(1, load_after_write), 1)
+    release.set()
+
+    assert fresh["name"] == "Anna"
+    assert (await stale)["name"] == "Ann"
+    assert (await cache.get_user(1, load_before_write))["name"] == "Anna"
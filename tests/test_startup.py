@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+from src.app import db
+
+
+def imported_modules(code: str) -> set[str]:
+    """Модули, загруженные новым интерпретатором после выполнения code"""
+    output = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{code}\nprint(' '.join(sys.modules))"],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return set(output.split())
+
+
+def test_db_import_does_not_create_engine():
+    modules = imported_modules("import src.app.db as db\nassert db.get_engine.cache_info().currsize == 0")
+    # Диалект PostgreSQL и asyncpg загружаются вместе с engine
+    assert "asyncpg" not in modules
+
+
+def test_worker_does_not_import_api():
+    # Транспорт и пул потоков bcrypt создаются в run_worker/start_inline, а не при импорте
+    modules = imported_modules(
+        "import src.app.worker.worker as worker\nassert not hasattr(worker, 'events') and not hasattr(worker, 'hasher')"
+    )
+    assert "litestar" not in modules
+    assert "alembic" not in modules
+
+
+def test_api_does_not_import_alembic():
+    assert "alembic" not in imported_modules("import src.app.asgi")
+
+
+def test_database_url_from_env(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite://")
+    db.database_url.cache_clear()
+    try:
+        assert db.database_url() == "sqlite+aiosqlite://"
+        assert db.engine_options()["connect_args"] == {}
+    finally:
+        db.database_url.cache_clear()
+
+
+def test_failed_startup_reports_schema_error():
+    # БД недоступна: остановка не должна подменять исходную ошибку AttributeError
+    result = subprocess.run(
+        [sys.executable, "-c", "from litestar.testing import TestClient\nfrom src.app.asgi import app\nTestClient(app).__enter__()"],
+        capture_output=True, text=True,
+        env={
+            **os.environ,
+            "DATABASE_URL": "sqlite+aiosqlite:////nonexistent/dir/x.db",
+            "STARTUP_DB_ATTEMPTS": "1",
+            "MESSAGE_TRANSPORT": "inprocess",
+        },
+    )
+    assert result.returncode != 0
+    assert "Database schema is not ready" in result.stderr
+    assert "AttributeError" not in result.stderr
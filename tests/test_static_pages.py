@@ -0,0 +1,76 @@
+import gzip
+import os
+
+import pytest
+
+from src.app.routes.static_pages import StaticPages, choose_encoding, encoding_weights
+
+BODY = "<html><body>" + "Привет, UserHubAPI! " * 50 + "</body></html>"
+
+
+@pytest.fixture
+def pages(tmp_path):
+    (tmp_path / "index.html").write_text(BODY, encoding="utf-8")
+    static = StaticPages(directory=tmp_path, max_age=60)
+    static.load()
+    return static
+
+
+def test_encoding_weights():
+    assert encoding_weights("gzip, deflate;q=0.5, br;q=0") == {"gzip": 1.0, "deflate": 0.5, "br": 0.0}
+    assert encoding_weights("gzip;level=1;q=0.2") == {"gzip": 0.2}
+    assert encoding_weights(None) == {}
+
+
+def test_choose_encoding_respects_q_values():
+    available = {"identity", "gzip", "br"}
+
+    assert choose_encoding("gzip;q=0", available) == "identity"
+    assert choose_encoding("*, gzip;q=0", {"identity", "gzip"}) == "identity"
+    assert choose_encoding("br;q=0.1, gzip", available) == "gzip"
+    assert choose_encoding("gzip, br", available) == "br"
+    assert choose_encoding("*", {"identity", "gzip"}) == "gzip"
+
+
+def test_refused_encoding_is_not_served(pages):
+    response = pages.response("index.html", {"accept-encoding": "gzip;q=0"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.content.decode() == BODY
+
+
+def test_negotiates_precompressed_variant(pages):
+    response = pages.response("index.html", {"accept-encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+    assert gzip.decompress(response.content).decode() == BODY
+
+
+def test_identity_without_accept_encoding(pages):
+    response = pages.response("index.html", {})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.content == BODY.encode()
+
+
+def test_etag_per_encoding_and_not_modified(pages):
+    plain = pages.response("index.html", {}).headers["ETag"]
+    compressed = pages.response("index.html", {"accept-encoding": "gzip"}).headers["ETag"]
+    assert plain != compressed
+
+    response = pages.response("index.html", {"accept-encoding": "gzip", "if-none-match": compressed})
+    assert response.status_code == 304
+    assert pages.stats()["served_not_modified"] == 1
+
+
+def test_reload_changed(pages, tmp_path):
+    path = tmp_path / "index.html"
+    old_etag = pages.pages["index.html"].etags["identity"]
+    path.write_text("<html>new</html>", encoding="utf-8")
+    os.utime(path, (0, 0))
+
+    assert pages.reload_changed() == ["index.html"]
+    assert pages.pages["index.html"].etags["identity"] != old_etag
+    assert pages.reload_changed() == []
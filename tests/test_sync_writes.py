@@ -0,0 +1,19 @@
+import pytest
+
+from src.app.routes.users_routes import sync_timeout
+from src.app.settings import RPC_TIMEOUT, RPC_MAX_TIMEOUT
+
+
+@pytest.mark.parametrize(
+    "sync, prefer, expected",
+    [
+        (False, None, None),
+        (True, None, RPC_TIMEOUT),
+        (False, "wait=2", 2.0),
+        (False, "respond-async, wait=3", 3.0),
+        (False, "wait=100000", RPC_MAX_TIMEOUT),
+        (False, "return=minimal", None),
+    ],
+)
+def test_sync_timeout(sync, prefer, expected):
+    assert sync_timeout(sync, prefer) == expected
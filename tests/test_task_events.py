@@ -0,0 +1,41 @@
+import pytest
+from litestar.datastructures import State
+
+from src.app.routes.task_routes import TaskController
+from src.app.services.task_events import TaskDispatcher
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_wakes_waiters_of_task():
+    dispatcher = TaskDispatcher()
+    first = dispatcher.subscribe("t1")
+    second = dispatcher.subscribe("t1")
+    other = dispatcher.subscribe("t2")
+
+    await dispatcher.handle_event({"tasks": [{"task_id": "t1", "status": "done", "result": None, "error": None}]})
+
+    assert (await dispatcher.wait(first, 1))["status"] == "done"
+    assert (await dispatcher.wait(second, 1))["status"] == "done"
+    assert not other.done()
+    assert dispatcher.stats()["delivered"] == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_wait_timeout():
+    dispatcher = TaskDispatcher()
+    future = dispatcher.subscribe("t1")
+
+    assert await dispatcher.wait(future, 0.01) is None
+    dispatcher.unsubscribe("t1", future)
+    assert dispatcher.stats()["waiting_tasks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sse_subscribes_only_when_stream_starts():
+    dispatcher = TaskDispatcher()
+    state = State({"task_dispatcher": dispatcher})
+
+    # Клиент отключился до начала потока: генератор не запускался
+    await TaskController.task_events.fn(None, task_id="t1", state=state, timeout=1)
+
+    assert dispatcher.stats()["waiters"] == 0
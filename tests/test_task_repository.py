@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.app.models.task_result import TaskResult
+from src.app.repositories.task_repository import SQLAlchemyTaskResultRepository
+
+
+@pytest.mark.asyncio
+async def test_update_many_upserts_on_sqlite():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(TaskResult.__table__.create)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        repo = SQLAlchemyTaskResultRepository(session)
+        await repo.create("a")
+        await repo.update_many([
+            {"id": "a", "status": "done", "result": {"id": 1}, "error": None},
+            {"id": "b", "status": "failed", "result": None, "error": "boom"},
+        ])
+        await session.commit()
+
+    async with session_factory() as session:
+        repo = SQLAlchemyTaskResultRepository(session)
+        assert (await repo.get("a")).result == {"id": 1}
+        assert (await repo.get("b")).error == "boom"
+    await engine.dispose()
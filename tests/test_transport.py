@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from src.app.services.transport import InProcessTransport, create_transport
+
+
+@pytest.mark.asyncio
+async def test_inprocess_queue_respects_prefetch():
+    transport = InProcessTransport()
+    received = []
+    await transport.consume("jobs", lambda message: asyncio.sleep(0, received.append(message)), prefetch=2)
+
+    for n in range(3):
+        await transport.publish("jobs", {"n": n})
+    await asyncio.sleep(0.01)
+    assert [m.data["n"] for m in received] == [0, 1]
+
+    await received[0].ack()
+    await asyncio.sleep(0.01)
+    assert [m.data["n"] for m in received] == [0, 1, 2]
+    await transport.close()
+
+
+@pytest.mark.asyncio
+async def test_inprocess_fanout_and_replies():
+    transport = InProcessTransport()
+    events, replies = [], []
+
+    async def on_event(data):
+        events.append(data)
+
+    async def on_reply(data):
+        replies.append(data)
+
+    await transport.subscribe_fanout("task_events", on_event)
+    await transport.subscribe_fanout("task_events", on_event)
+    reply_to = await transport.consume_replies(on_reply)
+
+    await transport.publish_fanout("task_events", {"tasks": []})
+    await transport.publish(reply_to, {"task_id": "t"}, correlation_id="t")
+    await asyncio.sleep(0.01)
+
+    assert events == [{"tasks": []}, {"tasks": []}]
+    assert replies == [{"task_id": "t"}]
+    await transport.close()
+
+
+def test_create_transport_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        create_transport("kafka", "")
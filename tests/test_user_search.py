@@ -0,0 +1,84 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.app.models.user import User
+from src.app.repositories.user_repository import SQLAlchemyUserRepository
+from src.app.schemas.pagination import InvalidCursorError, decode_search_cursor, encode_search_cursor
+from src.app.schemas.search import UserSearchFilters
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PEOPLE = [("Anna", "Ivanova"), ("Anton", "Petrov"), ("Boris", "Ivanov"), ("Anna", "Sidorova"), ("An_na", "Orlova")]
+
+
+@asynccontextmanager
+async def seeded_repo():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(User.__table__.create)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        await session.execute(insert(User), [
+            {"name": name, "surname": surname, "password": "x", "created_at": START + timedelta(days=i)}
+            for i, (name, surname) in enumerate(PEOPLE)
+        ])
+        await session.commit()
+        yield SQLAlchemyUserRepository(session)
+    await engine.dispose()
+
+
+async def search_ids(repo, limit=10, **filters):
+    return [user.id for user in await repo.search(UserSearchFilters(**filters), limit)]
+
+
+def test_search_cursor_roundtrip():
+    cursor = encode_search_cursor("-created_at", 7, START)
+
+    assert decode_search_cursor(cursor, "-created_at") == (7, START)
+    assert decode_search_cursor(encode_search_cursor("id", 7), "id") == (7, None)
+    with pytest.raises(InvalidCursorError):
+        decode_search_cursor(cursor, "id")
+
+
+@pytest.mark.asyncio
+async def test_filters():
+    async with seeded_repo() as repo:
+        await check_filters(repo)
+
+
+async def check_filters(repo):
+    assert await search_ids(repo, name="Anna") == [1, 4]
+    assert await search_ids(repo, name_prefix="an") == [1, 2, 4, 5]
+    # _ в префиксе — обычный символ, а не шаблон LIKE
+    assert await search_ids(repo, name_prefix="an_") == [5]
+    assert await search_ids(repo, surname_prefix="ivan", sort="-id") == [3, 1]
+    assert await search_ids(repo, query="anna ivan") == [1]
+    assert await search_ids(repo, created_from=START + timedelta(days=1), created_to=START + timedelta(days=3)) == [2, 3]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort, expected", [("id", [1, 2, 3, 4, 5]), ("-created_at", [5, 4, 3, 2, 1])])
+async def test_keyset_pages(sort, expected):
+    seen, after_id, after_created_at = [], None, None
+    async with seeded_repo() as repo:
+        while True:
+            page = await repo.search(
+                UserSearchFilters(sort=sort, after_id=after_id, after_created_at=after_created_at), limit=2
+            )
+            seen += [user.id for user in page]
+            if len(page) < 2:
+                break
+            after_id, after_created_at = page[-1].id, page[-1].created_at
+
+    assert seen == expected
+
+
+@pytest.mark.asyncio
+async def test_explain_search():
+    async with seeded_repo() as repo:
+        plan = await repo.explain_search(UserSearchFilters(after_id=2), limit=2)
+
+    assert any("PRIMARY KEY" in line for line in plan)
@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.app.models.user import Base, User, UserAction
+from src.app.services.task_events import TASK_ERROR_INVALID, TASK_ERROR_NOT_FOUND
+from src.app.worker.batch import WorkItem, apply_batch, coalesce_updates, split_segments
+
+
+def make_item(action: UserAction, user_id: int | None = None) -> WorkItem:
+    payload = {"user_id": user_id} if user_id else {"name": "Test", "surname": "User", "password": "x"}
+    return WorkItem(task_id=f"{action}-{user_id}", action=action, payload=payload)
+
+
+def test_independent_items_share_one_segment():
+    items = [
+        make_item(UserAction.CREATE),
+        make_item(UserAction.UPDATE, 1),
+        make_item(UserAction.UPDATE, 2),
+        make_item(UserAction.DELETE, 3),
+    ]
+    segments = split_segments(items)
+
+    assert len(segments) == 1
+    assert len(segments[0].creates) == 1
+    assert len(segments[0].updates) == 2
+    assert len(segments[0].deletes) == 1
+
+
+def test_same_user_starts_new_segment():
+    items = [
+        make_item(UserAction.UPDATE, 1),
+        make_item(UserAction.DELETE, 1),
+        make_item(UserAction.UPDATE, 1),
+    ]
+    segments = split_segments(items)
+
+    assert [len(s.updates) for s in segments] == [1, 0, 1]
+    assert [len(s.deletes) for s in segments] == [0, 1, 0]
+
+
+def test_unknown_action_fails_item():
+    item = WorkItem(task_id="t", action="unknown", payload={"user_id": 1})
+    assert split_segments([item]) == []
+    assert (item.status, item.error_code) == ("failed", TASK_ERROR_INVALID)
+
+
+def make_update(task_id: str, user_id: int, **fields) -> WorkItem:
+    return WorkItem(task_id=task_id, action=UserAction.UPDATE, payload={"user_id": user_id, **fields})
+
+
+def test_coalesce_merges_updates_until_read():
+    items = [
+        make_update("a", 1, name="A"),
+        make_update("b", 2, name="B"),
+        make_update("c", 1, surname="C", name=None),
+        WorkItem(task_id="r", action=UserAction.READ, payload={"user_id": 1}),
+        make_update("d", 1, name="D"),
+    ]
+    work, groups = coalesce_updates(items)
+
+    assert [item.task_id for item in work] == ["a", "b", "r", "d"]
+    assert work[0].payload == {"user_id": 1, "name": "A", "surname": "C"}
+    # Исходная задача не меняется
+    assert items[0].payload == {"user_id": 1, "name": "A"}
+    assert [[item.task_id for item in group.items] for group in groups] == [["a", "c"]]
+
+
+def test_coalesce_cancels_updates_before_delete():
+    items = [
+        make_update("a", 1, name="A"),
+        make_update("b", 1, name="B"),
+        WorkItem(task_id="x", action=UserAction.DELETE, payload={"user_id": 1}),
+    ]
+    work, groups = coalesce_updates(items)
+
+    assert [item.task_id for item in work] == ["x"]
+    assert len(groups) == 1 and groups[0].target is items[2]
+
+
+@pytest.mark.asyncio
+async def test_apply_batch_issues_one_update_per_user():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        await session.execute(insert(User), [{"name": "N", "surname": "S", "password": "p"}] * 2)
+        statements.clear()
+        items = [
+            make_update("a", 1, name="A"),
+            make_update("b", 1, surname="B"),
+            make_update("c", 2, name="C"),
+            WorkItem(task_id="x", action=UserAction.DELETE, payload={"user_id": 2}),
+            make_update("m", 3, name="M"),
+        ]
+        await apply_batch(session, items)
+        await session.commit()
+
+    assert sum(sql.startswith("UPDATE") for sql in statements) == 1
+    assert all(item.status == "done" for item in items[:4])
+    assert (items[4].status, items[4].error_code) == ("failed", TASK_ERROR_NOT_FOUND)
+    assert items[0].result == items[1].result
+    assert (items[1].result["name"], items[1].result["surname"]) == ("A", "B")
+    assert items[2].result is None and items[2].changed_ids == [2]
+    await engine.dispose()
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from src.app.models.user import UserAction
+from src.app.services.hashing import PasswordHasher
+from src.app.worker.batch import WorkItem
+from src.app.worker.bulk import process_bulk, resume_progress
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_retries_failed_chunk_one_by_one():
+    item = WorkItem(task_id="t", action=UserAction.BATCH_DELETE, payload={"ids": [1, 2, 3]})
+    progress_seen = []
+
+    async def commit_chunk(item, entries, progress):
+        progress_seen.append(progress([{"status": "done"}] * len(entries))["processed"])
+        if progress_seen[-1] == 3 and len(entries) == 1:
+            progress_seen.append(progress([{"status": "done"}])["failed"])
+        if len(entries) > 1 or entries[0][1] == 2:
+            raise RuntimeError("deadlock")
+        return [{"index": index, "status": "done", "id": user_id} for index, user_id in entries]
+
+    hasher = PasswordHasher(rounds=4, max_workers=1)
+    await process_bulk(item, commit_chunk, hasher, chunk_size=3)
+    hasher.close()
+
+    assert item.result["total"] == 3
+    assert item.result["succeeded"] == 2
+    assert [r["status"] for r in item.result["items"]] == ["done", "failed", "done"]
+    assert item.changed_ids == [1, 3]
+    # Ошибка второго элемента учтена в прогрессе записи третьего
+    assert progress_seen == [3, 1, 2, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_redelivered_bulk_task_resumes_after_committed_chunks():
+    item = WorkItem(task_id="t", action=UserAction.BATCH_CREATE, payload={"items": [{"name": n} for n in "abcde"]})
+    committed: list = []
+    stored = {}
+    crash = [True]
+
+    async def commit_chunk(item, entries, progress):
+        if entries[0][0] == 2 and crash.pop():
+            raise asyncio.CancelledError  # процесс остановлен посреди задачи
+        results = [{"index": index, "status": "done", "id": index + 1} for index, _ in entries]
+        committed.extend(data["name"] for _, data in entries)
+        stored["result"] = progress(results)
+        return results
+
+    hasher = PasswordHasher(rounds=4, max_workers=1)
+    with pytest.raises(asyncio.CancelledError):
+        await process_bulk(item, commit_chunk, hasher, chunk_size=2)
+    crash.append(False)
+
+    # В прогрессе только счётчики и результаты последней записанной части
+    assert stored["result"] == {"total": 5, "processed": 2, "failed": 0, "items": [
+        {"index": 0, "status": "done", "id": 1}, {"index": 1, "status": "done", "id": 2},
+    ]}
+    await process_bulk(item, commit_chunk, hasher, chunk_size=2, resumed=resume_progress("processing", stored["result"]))
+    hasher.close()
+
+    assert committed == ["a", "b", "c", "d", "e"]
+    assert stored["result"]["processed"] == 5 and len(stored["result"]["items"]) == 1
+    assert (item.result["succeeded"], item.result["resumed_after"]) == (5, 2)
+    assert [r["id"] for r in item.result["items"]] == [3, 4, 5]
+    assert resume_progress("done", item.result) == (0, 0)
+    assert resume_progress("queued", None) == (0, 0)
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from src.app.services.transport import USER_ACTIONS_QUEUE, InProcessTransport
+from src.app.worker import worker
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_received_messages(monkeypatch):
+    batches = []
+
+    async def process_batch(messages, services):
+        await asyncio.sleep(0.01)
+        batches.append(len(messages))
+        for message in messages:
+            await message.ack()
+
+    monkeypatch.setattr(worker, "process_batch", process_batch)
+    transport = InProcessTransport()
+    queue = transport.queue(USER_ACTIONS_QUEUE)
+    for n in range(10):
+        await transport.publish(USER_ACTIONS_QUEUE, {"n": n})
+
+    stopping = asyncio.Event()
+    consumer = asyncio.create_task(
+        worker.consume_batches(transport, batch_size=3, wait_ms=50, concurrency=2, stopping=stopping)
+    )
+    await asyncio.sleep(0)
+    stopping.set()
+    await asyncio.wait_for(consumer, 1)
+
+    # После остановки новые сообщения остаются в очереди
+    await transport.publish(USER_ACTIONS_QUEUE, {"n": 10})
+    await asyncio.sleep(0.01)
+
+    assert queue.acked == 10
+    assert sum(batches) == 10 and max(batches) <= 3
+    assert queue.depth == 1
+    await transport.close()
+
+
+@pytest.mark.asyncio
+async def test_drain_timeout_leaves_messages_unacked(monkeypatch):
+    async def process_batch(messages, services):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(worker, "process_batch", process_batch)
+    transport = InProcessTransport()
+    await transport.publish(USER_ACTIONS_QUEUE, {"n": 0})
+
+    stopping = asyncio.Event()
+    consumer = asyncio.create_task(
+        worker.consume_batches(transport, batch_size=1, wait_ms=0, stopping=stopping, drain_timeout=0.05)
+    )
+    await asyncio.sleep(0.01)
+    stopping.set()
+    await asyncio.wait_for(consumer, 1)
+
+    assert transport.queue(USER_ACTIONS_QUEUE).acked == 0
+    await transport.close()
+
+
+def test_parse_args():
+    args = worker.parse_args(["--processes", "4", "--concurrency", "2"])
+
+    assert (args.processes, args.concurrency) == (4, 2)